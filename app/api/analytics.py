@@ -1,15 +1,25 @@
 from typing import Optional, List
 from datetime import datetime
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
+from database import use_analytics_db
+from etag import conditional_get
 from models import SocialAccount, ProfileSnapshot, Video
 from schemas import SocialAccountAnalyticsResponse
 from api.comparative_analytics import calculate_comparative_analytics
 import statistics
 
-router = APIRouter(prefix="/api/analytics", tags=["analytics"])
+router = APIRouter(
+    prefix="/api/analytics",
+    tags=["analytics"],
+    dependencies=[Depends(use_analytics_db)],
+)
 
 
-@router.get("/{social_account_id}", response_model=SocialAccountAnalyticsResponse)
+@router.get(
+    "/{social_account_id}",
+    response_model=SocialAccountAnalyticsResponse,
+    dependencies=[Depends(conditional_get("account"))],
+)
 async def get_social_account_analytics(
     social_account_id: int,
     current_start: datetime = Query(..., description="Начало текущего периода"),
@@ -224,7 +234,10 @@ def _calculate_comparison_metrics(current: dict, previous: dict) -> dict:
     }
 
 
-@router.get("/comparative/platforms")
+@router.get(
+    "/comparative/platforms",
+    dependencies=[Depends(conditional_get(relative_period=True))],
+)
 async def get_comparative_analytics(
     platforms: List[str] = Query(default=None),
     start_date: Optional[str] = Query(
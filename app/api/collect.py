@@ -1,20 +1,69 @@
+import asyncio
 from typing import List, Optional
-from datetime import datetime
-from fastapi import APIRouter, HTTPException, Query
-from models import SocialAccount, Video
+from datetime import datetime, timedelta, timezone
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from tortoise import connections
+from config import settings
+from database import ANALYTICS_CONNECTION
+from etag import conditional_get
+from events import collection_events
+from models import CollectionJob, SocialAccount, Video
 from schemas import (
     CollectDataRequest,
     CollectDataResponse,
+    CollectJobRequest,
+    CollectJobResponse,
+    CreditUsageResponse,
     VideoResponse,
     ProfileSnapshotResponse,
+    ProfileSeriesResponse,
 )
 from services.tiktok_service import TikTokService
 from services.youtube_service import collect_youtube_channel_data
 from services.instagram_service import collect_instagram_profile_data
 from services.telegram_service import collect_telegram_channel_data
+from services.credits import get_usage_summary
+from services.jobs import enqueue_collection
 
 router = APIRouter(prefix="/api/collect", tags=["collect"])
 
+# Максимум аккаунтов и точек ряда в одном запросе profile-series
+PROFILE_SERIES_MAX_ACCOUNTS = 200
+PROFILE_SERIES_MAX_BUCKETS = 1100
+
+# Ряд метрик профиля с шагом day/week/month и forward-fill:
+# для каждого бакета берётся последний снимок, сделанный до конца бакета.
+# LATERAL + LIMIT 1 использует индекс (social_account_id, snapshot_date).
+PROFILE_SERIES_SQL = """
+WITH buckets AS (
+    SELECT generate_series(
+        date_trunc($1, $2::timestamptz),
+        date_trunc($1, $3::timestamptz),
+        ('1 ' || $1)::interval
+    ) AS bucket
+)
+SELECT
+    a.id AS social_account_id,
+    b.bucket,
+    s.followers_count,
+    s.total_posts,
+    s.total_likes
+FROM social_accounts a
+CROSS JOIN buckets b
+LEFT JOIN LATERAL (
+    SELECT ps.followers_count, ps.total_posts, ps.total_likes
+    FROM profile_snapshots ps
+    WHERE ps.social_account_id = a.id
+      AND ps.snapshot_date < b.bucket + ('1 ' || $1)::interval
+    ORDER BY ps.snapshot_date DESC
+    LIMIT 1
+) s ON TRUE
+WHERE a.id = ANY($4::int[])
+ORDER BY a.id, b.bucket
+"""
+
 
 @router.post("/tiktok/{social_account_id}", response_model=CollectDataResponse)
 async def collect_tiktok_data(
@@ -48,7 +97,7 @@ async def collect_tiktok_data(
         )
 
         return CollectDataResponse(
-            success=True,
+            success=result["success"],
             message=result["message"],
             posts_collected=result["posts_collected"],
             profile_updated=result["profile_updated"],
@@ -91,7 +140,7 @@ async def collect_youtube_data(
         )
 
         return CollectDataResponse(
-            success=True,
+            success=result["success"],
             message=result["message"],
             posts_collected=result["posts_collected"],
             profile_updated=result["profile_updated"],
@@ -134,7 +183,7 @@ async def collect_instagram_data(
         )
 
         return CollectDataResponse(
-            success=True,
+            success=result["success"],
             message=result["message"],
             posts_collected=result["posts_collected"],
             profile_updated=result["profile_updated"],
@@ -178,7 +227,7 @@ async def collect_telegram_data(
         )
 
         return CollectDataResponse(
-            success=True,
+            success=result["success"],
             message=result["message"],
             posts_collected=result["posts_collected"],
             profile_updated=result["profile_updated"],
@@ -188,6 +237,83 @@ async def collect_telegram_data(
         raise HTTPException(status_code=500, detail=f"Error collecting data: {str(e)}")
 
 
+@router.post("/jobs", response_model=CollectJobResponse, status_code=202)
+async def create_collect_job(request: CollectJobRequest):
+    """
+    Поставить сбор аккаунта в очередь (выполняет cli.py worker)
+
+    Повторная постановка того же сбора, пока он не выполнен, возвращает
+    существующую задачу.
+    """
+    social_account = await SocialAccount.filter(id=request.social_account_id).first()
+    if not social_account:
+        raise HTTPException(status_code=404, detail="Social account not found")
+
+    return await enqueue_collection(
+        social_account,
+        start_date=request.start_date,
+        end_date=request.end_date,
+        priority=request.priority,
+        max_credits=request.max_credits,
+    )
+
+
+@router.get("/jobs/{job_id}", response_model=CollectJobResponse)
+async def get_collect_job(job_id: int):
+    """Состояние задачи сбора: queued, running, done или dead"""
+    job = await CollectionJob.filter(id=job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Collection job not found")
+    return job
+
+
+@router.get("/events")
+async def stream_collection_events(
+    social_account_ids: Optional[List[int]] = Query(None),
+):
+    """
+    Ход идущих сборов (Server-Sent Events)
+
+    События started, page и finished: страниц, сохранённых записей,
+    скачанных медиа, потраченных кредитов, скорость, доля периода и
+    оценка оставшегося времени. social_account_ids - только эти аккаунты.
+    """
+    accounts = set(social_account_ids or ())
+
+    async def stream():
+        async with collection_events.subscribe() as queue:
+            yield "retry: 5000\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(
+                        queue.get(), settings.events_keepalive_seconds
+                    )
+                except asyncio.TimeoutError:
+                    # Не даёт прокси закрыть молчащее соединение
+                    yield ": keepalive\n\n"
+                    continue
+                if accounts and event["social_account_id"] not in accounts:
+                    continue
+                yield f"event: {event['type']}\ndata: {orjson.dumps(event).decode()}\n\n"
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/credits", response_model=List[CreditUsageResponse])
+async def get_credit_usage():
+    """
+    Расход кредитов ScrapeCreators по платформам
+
+    Потрачено за текущие сутки и месяц (UTC), бюджеты и последний
+    остаток кредитов по ответам API.
+    """
+    return await get_usage_summary()
+
+
 @router.get("/videos/{social_account_id}", response_model=List[VideoResponse])
 async def get_account_videos(
     social_account_id: int,
@@ -263,3 +389,76 @@ async def get_profile_snapshots(social_account_id: int, limit: int = 30):
         ProfileSnapshotResponse.model_validate(snapshot, from_attributes=True)
         for snapshot in snapshots
     ]
+
+
+@router.get(
+    "/profile-series",
+    response_model=List[ProfileSeriesResponse],
+    dependencies=[Depends(conditional_get("accounts"))],
+)
+async def get_profile_series(
+    social_account_ids: List[int] = Query(..., description="ID аккаунтов"),
+    interval: str = Query("day", regex="^(day|week|month)$"),
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+):
+    """
+    Получить ряды followers/total_posts/total_likes с равным шагом
+
+    - interval: day, week, month
+    - date_from/date_to: период (по умолчанию - последние 90 дней)
+    - пропуски заполняются последним известным снимком (forward-fill)
+
+    Ресемплинг выполняется в БД одним запросом для всех аккаунтов
+    """
+    if len(social_account_ids) > PROFILE_SERIES_MAX_ACCOUNTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many accounts (max {PROFILE_SERIES_MAX_ACCOUNTS})",
+        )
+
+    # Устанавливаем дефолтные даты если не указаны
+    if date_to is None:
+        date_to = datetime.now(timezone.utc)
+    elif date_to.tzinfo is None:
+        date_to = date_to.replace(tzinfo=timezone.utc)
+
+    if date_from is None:
+        date_from = date_to - timedelta(days=90)
+    elif date_from.tzinfo is None:
+        date_from = date_from.replace(tzinfo=timezone.utc)
+
+    if date_from > date_to:
+        raise HTTPException(status_code=400, detail="date_from must be <= date_to")
+
+    bucket_days = {"day": 1, "week": 7, "month": 28}[interval]
+    if (date_to - date_from).days // bucket_days > PROFILE_SERIES_MAX_BUCKETS:
+        raise HTTPException(
+            status_code=400, detail="Too many points, use a larger interval"
+        )
+
+    # Тяжёлое чтение (generate_series + LATERAL) - через пул аналитики
+    rows = await connections.get(ANALYTICS_CONNECTION).execute_query_dict(
+        PROFILE_SERIES_SQL,
+        [interval, date_from, date_to, list(set(social_account_ids))],
+    )
+
+    # Группируем строки по аккаунтам в колоночный формат
+    series: dict = {}
+    for row in rows:
+        item = series.get(row["social_account_id"])
+        if item is None:
+            item = series[row["social_account_id"]] = {
+                "social_account_id": row["social_account_id"],
+                "interval": interval,
+                "dates": [],
+                "followers_count": [],
+                "total_posts": [],
+                "total_likes": [],
+            }
+        item["dates"].append(row["bucket"])
+        item["followers_count"].append(row["followers_count"])
+        item["total_posts"].append(row["total_posts"])
+        item["total_likes"].append(row["total_likes"])
+
+    return [ProfileSeriesResponse(**item) for item in series.values()]
@@ -1,8 +1,10 @@
+import math
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 from models import SocialAccount, ProfileSnapshot, Video
-import numpy as np
-from scipy import stats
+from singleflight import SingleFlight
+
+_comparative = SingleFlight("comparative_analytics")
 
 
 def calculate_percentile(values: List[float], value: float) -> float:
@@ -20,17 +22,19 @@ def calculate_percentile(values: List[float], value: float) -> float:
         return 50.0
 
     # Убираем None и NaN
-    clean_values = [v for v in values if v is not None and not np.isnan(v)]
+    clean_values = [v for v in values if v is not None and not math.isnan(v)]
     if not clean_values:
         return 50.0
 
-    if value is None or np.isnan(value):
+    if value is None or math.isnan(value):
         return 0.0
 
-    # Используем scipy для точного расчета перцентиля
-
-    percentile = stats.percentileofscore(clean_values, value, kind="rank")
-    return float(percentile)
+    # То же, что scipy.stats.percentileofscore(kind="rank"): при равных
+    # значениях берётся средний ранг. Без scipy - он тяжёлый при импорте
+    below = sum(1 for v in clean_values if v < value)
+    below_or_equal = sum(1 for v in clean_values if v <= value)
+    percentile = (below + below_or_equal + (below_or_equal > below)) * 50.0
+    return percentile / len(clean_values)
 
 
 def get_period_dates(
@@ -206,6 +210,34 @@ async def calculate_comparative_analytics(
     custom_start: Optional[str] = None,
     custom_end: Optional[str] = None,
     include_previous: bool = True,
+) -> Dict:
+    """
+    Сравнительная аналитика (см. _calculate_comparative_analytics)
+
+    Одновременные одинаковые расчёты (дашборд у нескольких пользователей,
+    дашборд и отчёт) выполняются один раз; результат общий - не изменять.
+    """
+    key = (
+        tuple(sorted(set(platforms))),
+        period,
+        custom_start,
+        custom_end,
+        include_previous,
+    )
+    return await _comparative.do(
+        key,
+        lambda: _calculate_comparative_analytics(
+            platforms, period, custom_start, custom_end, include_previous
+        ),
+    )
+
+
+async def _calculate_comparative_analytics(
+    platforms: List[str],
+    period: str | None = "30d",
+    custom_start: Optional[str] = None,
+    custom_end: Optional[str] = None,
+    include_previous: bool = True,
 ) -> Dict:
     """
     Рассчитывает сравнительную аналитику по выбранным платформам
@@ -2,14 +2,20 @@
 API endpoints для генерации отчетов
 """
 
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Depends, Query
 from fastapi.responses import StreamingResponse
+from database import use_analytics_db
 from typing import List, Optional
 from datetime import datetime
 from api.comparative_analytics import calculate_comparative_analytics
-from reports import WordReportGenerator, ExcelReportGenerator
+from metrics import REPORT_RENDER_SECONDS
+from middleware.admission import run_in_thread
 
-router = APIRouter(prefix="/api/reports", tags=["reports"])
+router = APIRouter(
+    prefix="/api/reports",
+    tags=["reports"],
+    dependencies=[Depends(use_analytics_db)],
+)
 
 
 @router.get("/word")
@@ -42,9 +48,13 @@ async def generate_word_report(
         include_previous=include_previous,
     )
 
-    # Генерируем Word отчет
+    # Генерируем Word отчет (python-docx и matplotlib - при первом отчёте)
+    from reports import WordReportGenerator
+
     generator = WordReportGenerator()
-    doc_stream = generator.generate(data)
+    with REPORT_RENDER_SECONDS.labels("docx").time():
+        # В потоке: формирование файла не блокирует цикл событий
+        doc_stream = await run_in_thread(generator.generate, data)
 
     # Формируем имя файла
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -89,8 +99,12 @@ async def generate_excel_report(
     )
 
     # Генерируем Excel отчет
+    from reports import ExcelReportGenerator
+
     generator = ExcelReportGenerator()
-    excel_stream = generator.generate(data)
+    with REPORT_RENDER_SECONDS.labels("xlsx").time():
+        # В потоке: формирование файла не блокирует цикл событий
+        excel_stream = await run_in_thread(generator.generate, data)
 
     # Формируем имя файла
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -5,14 +5,23 @@ API для аналитики Telegram каналов
 
 from typing import Optional
 from datetime import datetime
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
+from database import use_analytics_db
+from etag import conditional_get
 from models import SocialAccount, ProfileSnapshot, Video, Author
 import statistics
 
-router = APIRouter(prefix="/api/telegram-analytics", tags=["telegram-analytics"])
+router = APIRouter(
+    prefix="/api/telegram-analytics",
+    tags=["telegram-analytics"],
+    dependencies=[Depends(use_analytics_db)],
+)
 
 
-@router.get("/channel/{social_account_id}")
+@router.get(
+    "/channel/{social_account_id}",
+    dependencies=[Depends(conditional_get("account"))],
+)
 async def get_telegram_channel_analytics(
     social_account_id: int,
     current_start: datetime = Query(..., description="Начало текущего периода"),
@@ -83,7 +92,10 @@ async def get_telegram_channel_analytics(
     }
 
 
-@router.get("/authors/{author_id}")
+@router.get(
+    "/authors/{author_id}",
+    dependencies=[Depends(conditional_get("author"))],
+)
 async def get_author_telegram_analytics(
     author_id: int,
     current_start: datetime = Query(..., description="Начало текущего периода"),
@@ -381,7 +393,7 @@ def _calculate_comparison_metrics(current: dict, previous: dict) -> dict:
     return comparison
 
 
-@router.get("/all-authors")
+@router.get("/all-authors", dependencies=[Depends(conditional_get())])
 async def get_all_authors_telegram_analytics(
     current_start: datetime = Query(..., description="Начало текущего периода"),
     current_end: datetime = Query(..., description="Конец текущего периода"),
@@ -3,16 +3,22 @@ API для генерации отчетов по Telegram каналам
 """
 
 from datetime import datetime
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi.responses import StreamingResponse
+from database import use_analytics_db
 from api.telegram_analytics import (
     _calculate_telegram_period_metrics,
     _calculate_comparison_metrics,
 )
 from models import SocialAccount
-from reports_telegram.excel_generator import generate_telegram_excel_report
+from metrics import REPORT_RENDER_SECONDS
+from middleware.admission import run_in_thread
 
-router = APIRouter(prefix="/api/telegram-reports", tags=["telegram-reports"])
+router = APIRouter(
+    prefix="/api/telegram-reports",
+    tags=["telegram-reports"],
+    dependencies=[Depends(use_analytics_db)],
+)
 
 
 @router.get("/excel/all-authors")
@@ -172,7 +178,8 @@ async def generate_all_authors_telegram_excel(
 
     # Сохраняем в BytesIO
     excel_file = BytesIO()
-    wb.save(excel_file)
+    with REPORT_RENDER_SECONDS.labels("xlsx").time():
+        await run_in_thread(wb.save, excel_file)
     excel_file.seek(0)
 
     filename = (
@@ -248,7 +255,10 @@ async def generate_telegram_excel(
     }
 
     # Генерируем Excel
-    excel_file = generate_telegram_excel_report(report_data)
+    from reports_telegram.excel_generator import generate_telegram_excel_report
+
+    with REPORT_RENDER_SECONDS.labels("xlsx").time():
+        excel_file = await run_in_thread(generate_telegram_excel_report, report_data)
 
     # Формируем имя файла
     filename = f"telegram_report_{social_account.username or social_account_id}_{current_start.date()}_to_{current_end.date()}.xlsx"
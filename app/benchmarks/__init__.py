@@ -0,0 +1,53 @@
+"""
+Бенчмарки и генератор синтетических данных
+
+Всё, что пишет в БД или читает синтетические данные (seed, collectors,
+analytics, payloads), работает только с отдельной БД BENCH_DATABASE_URL:
+use_bench_database() переключает на неё процесс до импорта config,
+схема создаётся миграциями aerich (migrate_bench_database).
+"""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+from dotenv import dotenv_values
+
+APP_DIR = Path(__file__).resolve().parent.parent
+
+_active = False
+
+
+def use_bench_database() -> None:
+    """
+    Переключить процесс на BENCH_DATABASE_URL (вызывать до импорта config)
+
+    Без отдельной БД (переменная не задана или совпадает с DATABASE_URL)
+    процесс завершается: синтетические аккаунты и записи не должны попасть
+    в рабочую БД.
+    """
+    global _active
+    if _active:
+        return
+
+    url = os.environ.get("BENCH_DATABASE_URL")
+    if not url:
+        sys.exit("BENCH_DATABASE_URL не задан: бенчмарки работают только с отдельной БД")
+    live_url = os.environ.get("DATABASE_URL") or dotenv_values(APP_DIR / ".env").get(
+        "DATABASE_URL"
+    )
+    if url == live_url:
+        sys.exit("BENCH_DATABASE_URL совпадает с DATABASE_URL: нужна отдельная БД")
+    if "config" in sys.modules:
+        raise RuntimeError("use_bench_database() нужно вызвать до импорта config")
+
+    os.environ["DATABASE_URL"] = url
+    os.environ["ANALYTICS_DATABASE_URL"] = url
+    _active = True
+
+
+def migrate_bench_database() -> None:
+    """Применить миграции aerich к БД бенчмарков"""
+    if not _active:
+        raise RuntimeError("Сначала use_bench_database()")
+    subprocess.run(["aerich", "upgrade"], cwd=APP_DIR, check=True)
@@ -0,0 +1,205 @@
+"""
+Бенчмарк эндпоинтов аналитики и отчётов
+
+Запросы выполняются в процессе через ASGI-транспорт (без сети), для
+каждого эндпоинта измеряются время (min/median/p95), число и время
+SQL-запросов и размер ответа. Данные - из benchmarks.seed в отдельной БД
+BENCH_DATABASE_URL; аккаунты seed включаются только на время прогона.
+
+Запуск (из каталога app):
+    python -m benchmarks.analytics --save-baseline bench_analytics.json
+    python -m benchmarks.analytics --baseline bench_analytics.json
+
+При сравнении с базовой линией регрессией считается рост медианы времени
+больше чем на --tolerance или рост числа SQL-запросов; код выхода - 1.
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+from benchmarks import use_bench_database
+
+# Только отдельная БД бенчмарков - до импорта config
+use_bench_database()
+
+import httpx  # noqa: E402
+from instrumentation import track_queries  # noqa: E402
+from models import Author, SocialAccount, Video  # noqa: E402
+from benchmarks.seed import SEED_AUTHOR_PREFIX, seed_accounts_active  # noqa: E402
+
+
+async def _pick_targets() -> Dict[str, int]:
+    """Аккаунты и автор сгенерированных данных для запросов"""
+    targets = {}
+    for platform in ("tiktok", "telegram"):
+        account = (
+            await SocialAccount.filter(
+                platform=platform, author__name__startswith=SEED_AUTHOR_PREFIX
+            )
+            .order_by("id")
+            .first()
+        )
+        if account is None:
+            raise SystemExit(
+                f"Нет сгенерированных аккаунтов {platform}: запустите python -m benchmarks.seed"
+            )
+        targets[platform] = account.id
+        targets[f"{platform}_author"] = account.author_id
+    return targets
+
+
+def _endpoints(targets: Dict[str, int]) -> List[Tuple[str, str, list]]:
+    """(имя, путь, параметры) всех эндпоинтов аналитики и отчётов"""
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    periods = [
+        ("current_start", (now - timedelta(days=30)).isoformat()),
+        ("current_end", now.isoformat()),
+        ("previous_start", (now - timedelta(days=60)).isoformat()),
+        ("previous_end", (now - timedelta(days=30)).isoformat()),
+    ]
+    platforms = [("platforms", p) for p in ("tiktok", "instagram", "youtube")]
+    series = [
+        ("social_account_ids", targets["tiktok"]),
+        ("social_account_ids", targets["telegram"]),
+        ("interval", "day"),
+    ]
+
+    return [
+        ("analytics_account", f"/api/analytics/{targets['tiktok']}", periods),
+        (
+            "analytics_comparative",
+            "/api/analytics/comparative/platforms",
+            platforms + [("period", "30d")],
+        ),
+        (
+            "telegram_channel",
+            f"/api/telegram-analytics/channel/{targets['telegram']}",
+            periods,
+        ),
+        (
+            "telegram_author",
+            f"/api/telegram-analytics/authors/{targets['telegram_author']}",
+            periods,
+        ),
+        ("telegram_all_authors", "/api/telegram-analytics/all-authors", periods),
+        ("profile_series", "/api/collect/profile-series", series),
+        ("report_word", "/api/reports/word", platforms + [("period", "30d")]),
+        ("report_excel", "/api/reports/excel", platforms + [("period", "30d")]),
+        (
+            "telegram_report_channel",
+            f"/api/telegram-reports/excel/{targets['telegram']}",
+            periods,
+        ),
+        ("telegram_report_all", "/api/telegram-reports/excel/all-authors", periods),
+    ]
+
+
+async def _measure(
+    client: httpx.AsyncClient, path: str, params: list, repeat: int
+) -> dict:
+    """Прогреть эндпоинт и измерить repeat запросов"""
+    await client.get(path, params=params)
+
+    timings, sql_counts, sql_times = [], [], []
+    for _ in range(repeat):
+        with track_queries() as stats:
+            started = time.perf_counter()
+            response = await client.get(path, params=params)
+            timings.append((time.perf_counter() - started) * 1000)
+        sql_counts.append(stats.count)
+        sql_times.append(stats.seconds * 1000)
+
+    timings.sort()
+    return {
+        "status": response.status_code,
+        "min_ms": round(timings[0], 1),
+        "median_ms": round(statistics.median(timings), 1),
+        "p95_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 1),
+        "sql_queries": max(sql_counts),
+        "sql_ms": round(statistics.median(sql_times), 1),
+        "response_bytes": len(response.content),
+    }
+
+
+async def run_benchmark(repeat: int, only: Optional[List[str]]) -> dict:
+    from main import app
+
+    async with app.router.lifespan_context(app), seed_accounts_active():
+        targets = await _pick_targets()
+        dataset = {
+            "authors": await Author.filter(name__startswith=SEED_AUTHOR_PREFIX).count(),
+            "accounts": await SocialAccount.all().count(),
+            "videos": await Video.all().count(),
+        }
+
+        transport = httpx.ASGITransport(app=app)
+        results = {}
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench", timeout=None
+        ) as client:
+            for name, path, params in _endpoints(targets):
+                if only and name not in only:
+                    continue
+                results[name] = await _measure(client, path, params, repeat)
+                print(f"{name:26} {results[name]}")
+
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "dataset": dataset,
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def compare(baseline: dict, current: dict, tolerance: float) -> List[str]:
+    """Регрессии текущего прогона относительно базовой линии"""
+    regressions = []
+    for name, result in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            continue
+        if result["median_ms"] > base["median_ms"] * (1 + tolerance):
+            regressions.append(
+                f"{name}: median {base['median_ms']} -> {result['median_ms']} ms"
+            )
+        if result["sql_queries"] > base["sql_queries"]:
+            regressions.append(
+                f"{name}: SQL queries {base['sql_queries']} -> {result['sql_queries']}"
+            )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Бенчмарк аналитики")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", nargs="+", help="Только указанные эндпоинты")
+    parser.add_argument("--baseline", help="Сравнить с базовой линией")
+    parser.add_argument("--save-baseline", help="Сохранить результаты как базовую линию")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    current = asyncio.run(run_benchmark(args.repeat, args.only))
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(current, f, indent=2, ensure_ascii=False)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("dataset") != current["dataset"]:
+            print(f"Внимание: другой набор данных {baseline.get('dataset')}")
+        regressions = compare(baseline, current, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
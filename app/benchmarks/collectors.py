@@ -0,0 +1,214 @@
+"""
+Бенчмарк сборщиков против локального fake_upstream
+
+Для каждой платформы в отдельном процессе выполняется полный сбор
+тестового аккаунта и измеряются:
+- posts/s - записей в секунду (весь сбор: профиль, страницы, медиа, БД);
+- SQL/post - запросов к БД на запись;
+- peak RSS - пиковая память процесса сбора.
+
+Запуск (из каталога app, BENCH_DATABASE_URL - отдельная БД для бенчмарков,
+схема применяется миграциями aerich):
+    python -m benchmarks.collectors --posts 500 --latency-ms 50 --json bench.json
+
+Аккаунты бенчмарка (автор "benchmark", platform_user_id bench-*) удаляются
+вместе с записями после каждого прогона.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from benchmarks import migrate_bench_database, use_bench_database
+
+PLATFORMS = ("tiktok", "youtube", "youtube_shorts", "instagram", "telegram")
+
+BENCH_AUTHOR = "benchmark"
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for_port(port: int, timeout: float = 15.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.2):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"fake upstream did not start on port {port}")
+
+
+async def run_one(platform: str, posts: int, post_interval_minutes: int) -> dict:
+    """Собрать тестовый аккаунт платформы и вернуть метрики"""
+    from tortoise import Tortoise
+    from config import TORTOISE_ORM
+    from instrumentation import track_queries
+    from models import Author, SocialAccount
+    from services.base import close_http_client
+    from services.registry import collect_social_account
+
+    await Tortoise.init(config=TORTOISE_ORM)
+    try:
+        author, _ = await Author.get_or_create(name=BENCH_AUTHOR)
+        platform_user_id = f"bench-{platform}"
+        # Остатки прерванного прогона
+        await SocialAccount.filter(
+            platform=platform, platform_user_id=platform_user_id
+        ).delete()
+        account = await SocialAccount.create(
+            author=author, platform=platform, platform_user_id=platform_user_id
+        )
+
+        end_date = datetime.now(timezone.utc) + timedelta(minutes=5)
+        start_date = end_date - timedelta(
+            minutes=posts * post_interval_minutes, days=1
+        )
+
+        try:
+            with track_queries() as stats:
+                started = time.perf_counter()
+                result = await collect_social_account(account, start_date, end_date)
+                elapsed = time.perf_counter() - started
+        finally:
+            await account.delete()
+            if not await SocialAccount.filter(author=author).exists():
+                await author.delete()
+            await close_http_client()
+    finally:
+        await Tortoise.close_connections()
+
+    collected = result["posts_collected"]
+    return {
+        "platform": platform,
+        "posts": collected,
+        "requests": result.get("requests_made"),
+        "seconds": round(elapsed, 3),
+        "posts_per_second": round(collected / elapsed, 1) if elapsed else None,
+        "sql_statements": stats.count,
+        "sql_per_post": round(stats.count / collected, 2) if collected else None,
+        "sql_seconds": round(stats.seconds, 3),
+        # ru_maxrss в Linux - в килобайтах
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def run_benchmark(args) -> list:
+    """Поднять fake_upstream и прогнать сборщики в отдельных процессах"""
+    port = _free_port()
+    upstream_url = f"http://127.0.0.1:{port}"
+    fake_env = {
+        **os.environ,
+        "FAKE_LATENCY_MS": str(args.latency_ms),
+        "FAKE_PAGE_SIZE": str(args.page_size),
+        "FAKE_TOTAL_POSTS": str(args.posts),
+        "FAKE_POST_INTERVAL_MINUTES": str(args.post_interval_minutes),
+        "FAKE_RATE_LIMIT_RATIO": str(args.rate_limit_ratio),
+        "FAKE_MEDIA_BYTES": str(args.media_bytes),
+    }
+    server = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "benchmarks.fake_upstream:app",
+            "--port", str(port), "--log-level", "warning", "--no-access-log",
+        ],
+        env=fake_env,
+    )
+
+    results = []
+    try:
+        _wait_for_port(port)
+        with tempfile.TemporaryDirectory(prefix="bench-") as workdir:
+            collector_env = {
+                **os.environ,
+                "SCRAPECREATORS_API_URL": upstream_url,
+                "SCRAPECREATORS_API_KEY": os.environ.get("SCRAPECREATORS_API_KEY", "bench"),
+                "TGSTAT_API_URL": upstream_url,
+                "TGSTAT_API_TOKEN": os.environ.get("TGSTAT_API_TOKEN", "bench"),
+                "MEDIA_ROOT": os.path.join(workdir, "media"),
+                "ARCHIVE_ROOT": os.path.join(workdir, "archive"),
+                # Бюджеты кредитов не должны прерывать бенчмарк
+                "CREDIT_DAILY_BUDGETS": "{}",
+                "CREDIT_MONTHLY_BUDGETS": "{}",
+            }
+            for platform in args.platforms:
+                process = subprocess.run(
+                    [
+                        sys.executable, "-m", "benchmarks.collectors",
+                        "--run-one", platform,
+                        "--posts", str(args.posts),
+                        "--post-interval-minutes", str(args.post_interval_minutes),
+                    ],
+                    env=collector_env,
+                    capture_output=True,
+                    text=True,
+                )
+                if process.returncode != 0:
+                    print(process.stderr, file=sys.stderr)
+                    raise RuntimeError(f"benchmark for {platform} failed")
+                # Последняя строка вывода - результат в JSON
+                results.append(json.loads(process.stdout.strip().splitlines()[-1]))
+    finally:
+        server.terminate()
+        server.wait()
+
+    return results
+
+
+def print_results(results: list) -> None:
+    columns = [
+        ("platform", 16), ("posts", 7), ("requests", 9), ("seconds", 9),
+        ("posts_per_second", 17), ("sql_per_post", 13), ("sql_seconds", 12),
+        ("peak_rss_mb", 12),
+    ]
+    print("".join(name.ljust(width) for name, width in columns))
+    for row in results:
+        print("".join(str(row[name]).ljust(width) for name, width in columns))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Бенчмарк сборщиков")
+    parser.add_argument("--platforms", nargs="+", choices=PLATFORMS, default=list(PLATFORMS))
+    parser.add_argument("--posts", type=int, default=300)
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--post-interval-minutes", type=int, default=120)
+    parser.add_argument("--rate-limit-ratio", type=float, default=0)
+    parser.add_argument("--media-bytes", type=int, default=20000)
+    parser.add_argument("--json", help="Сохранить результаты в файл")
+    parser.add_argument("--run-one", choices=PLATFORMS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_one:
+        # Дочерний процесс получает окружение уже переключённым на БД бенчмарков
+        if not os.environ.get("BENCH_DATABASE_URL") or (
+            os.environ.get("DATABASE_URL") != os.environ["BENCH_DATABASE_URL"]
+        ):
+            sys.exit("--run-one запускается только из benchmarks.collectors")
+        result = asyncio.run(
+            run_one(args.run_one, args.posts, args.post_interval_minutes)
+        )
+        print(json.dumps(result))
+        return
+
+    use_bench_database()
+    migrate_bench_database()
+    results = run_benchmark(args)
+    print_results(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
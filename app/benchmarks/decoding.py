@@ -0,0 +1,208 @@
+"""
+Бенчмарк декодирования страниц записей API
+
+Для страниц записей из ответов архива (raw_responses) каждой платформы
+сравниваются:
+- json - json.loads всей страницы в словари (как response.json());
+- typed - msgspec: записи как исходные байты и структура записи
+  сборщика (BaseCollector.item_type) только с читаемыми полями.
+
+Измеряются медианное время декодирования страницы, пик памяти
+(tracemalloc) и память, занятая результатом, а также путь записи:
+время подготовки записей страницы к videos.extra_data целиком (как у
+TikTok) - Video(extra_data=...) и to_db_value: словарь сериализуется
+заново, RawJSON уходит как есть. Если в архиве нет страниц платформы,
+страницы берутся у benchmarks.fake_upstream.
+
+Запуск (из каталога app):
+    python -m benchmarks.decoding --pages 50 --repeat 20
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+import httpx
+import msgspec
+from tortoise import Tortoise
+from config import TORTOISE_ORM
+from models import RawResponse, SocialAccount, Video
+from services.archive import archive_path, read_content
+from services.payloads import decode, decode_items, encode_page
+from services.registry import COLLECTORS
+
+# Страницы fake_upstream: путь, параметры и поле записей ответа
+FAKE_PAGES = {
+    "tiktok": ("/v3/tiktok/profile/videos", "user_id", "max_cursor", "aweme_list"),
+    "youtube": ("/v1/youtube/channel-videos", "channelId", "continuationToken", "videos"),
+    "youtube_shorts": ("/v1/youtube/channel/shorts", "channelId", "continuationToken", "shorts"),
+    "instagram": ("/v2/instagram/user/posts", "handle", "next_max_id", "items"),
+}
+
+
+async def archived_pages(platform: str, limit: int) -> List[bytes]:
+    """Страницы записей платформы из последних ответов архива"""
+    collector = COLLECTORS[platform](
+        SocialAccount(platform=platform, platform_user_id="bench")
+    )
+    responses = await RawResponse.filter(platform=platform).order_by("-id").values_list(
+        "content_hash", "endpoint"
+    )
+    pages = []
+    for content_hash, endpoint in dict.fromkeys(responses):
+        if not archive_path(content_hash).exists():
+            continue
+        items = collector.archived_items(endpoint, read_content(content_hash))
+        if items:
+            pages.append(encode_page(items))
+            if len(pages) >= limit:
+                break
+    return pages
+
+
+async def fake_pages(platform: str, limit: int) -> List[bytes]:
+    """Страницы fake_upstream (без задержек и медиа)"""
+    os.environ.setdefault("FAKE_LATENCY_MS", "0")
+    os.environ.setdefault("FAKE_TOTAL_POSTS", str(limit * 20))
+    from benchmarks import fake_upstream
+
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=fake_upstream.app), base_url="http://bench"
+    ) as client:
+        if platform == "telegram":
+            response = await client.get(
+                "/channels/posts",
+                params={"channelId": "bench", "limit": 50, "startTime": 0},
+            )
+            items = response.json()["response"]["items"]
+            return [json.dumps(items[:20], ensure_ascii=False).encode()] * limit
+
+        path, id_param, cursor_param, items_key = FAKE_PAGES[platform]
+        pages = []
+        for page in range(limit):
+            params = {id_param: "bench"}
+            if page:
+                params[cursor_param] = page * fake_upstream.PAGE_SIZE
+            response = await client.get(path, params=params)
+            pages.append(
+                json.dumps(response.json()[items_key], ensure_ascii=False).encode()
+            )
+        return pages
+
+
+def _median_ms(func: Callable[[], object], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return round(statistics.median(timings), 3)
+
+
+def _memory_kb(func: Callable[[], object]) -> tuple:
+    """Пик памяти при вызове и память, занятая результатом, КБ"""
+    tracemalloc.start()
+    try:
+        result = func()
+        retained, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return round(peak / 1024, 1), round(retained / 1024, 1)
+
+
+def _extra_data_db_values(values: list) -> list:
+    """Значения extra_data, как их готовит к записи Tortoise"""
+    field = Video._meta.fields_map["extra_data"]
+    return [
+        field.to_db_value(Video(extra_data=value).extra_data, None) for value in values
+    ]
+
+
+def measure_pages(pages: List[bytes], item_type: type, repeat: int) -> Dict[str, dict]:
+    """Время и память декодирования и записи страниц обоими способами"""
+    decoders = {
+        "json": json.loads,
+        "typed": lambda page: decode_items(decode(page, List[msgspec.Raw]), item_type),
+    }
+    extra_data = {"json": lambda items: items, "typed": lambda items: [i.json for i in items]}
+    results = {}
+    for name, decoder in decoders.items():
+        peaks, retained = zip(*(_memory_kb(lambda: decoder(page)) for page in pages))
+        decoded = [extra_data[name](decoder(page)) for page in pages]
+        results[name] = {
+            "page_ms": round(
+                statistics.median(_median_ms(lambda: decoder(page), repeat) for page in pages),
+                3,
+            ),
+            "peak_kb": round(statistics.median(peaks), 1),
+            "retained_kb": round(statistics.median(retained), 1),
+            "write_ms": round(
+                statistics.median(
+                    _median_ms(lambda: _extra_data_db_values(values), repeat)
+                    for values in decoded
+                ),
+                3,
+            ),
+        }
+    return results
+
+
+async def run_benchmark(platforms: List[str], limit: int, repeat: int) -> dict:
+    await Tortoise.init(config=TORTOISE_ORM)
+    try:
+        results = {}
+        for platform in platforms:
+            pages = await archived_pages(platform, limit)
+            source = "archive"
+            if not pages:
+                pages, source = await fake_pages(platform, limit), "fake_upstream"
+            results[platform] = {
+                "source": source,
+                "pages": len(pages),
+                "page_kb": round(statistics.median(map(len, pages)) / 1024, 1),
+                **measure_pages(pages, COLLECTORS[platform].item_type, repeat),
+            }
+        return results
+    finally:
+        await Tortoise.close_connections()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Бенчмарк декодирования страниц API")
+    parser.add_argument(
+        "--platforms", nargs="+", choices=list(COLLECTORS), default=list(COLLECTORS)
+    )
+    parser.add_argument("--pages", type=int, default=50, help="Страниц на платформу")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--json", help="Сохранить результаты в файл")
+    args = parser.parse_args()
+
+    results = asyncio.run(run_benchmark(args.platforms, args.pages, args.repeat))
+
+    print(
+        f"{'Платформа':<15} {'страниц':>7} {'КБ':>7} {'json мс':>8} {'typed мс':>9} "
+        f"{'json пик':>9} {'typed пик':>10} {'json КБ':>8} {'typed КБ':>9} "
+        f"{'json БД мс':>11} {'typed БД мс':>12}"
+    )
+    for platform, r in results.items():
+        print(
+            f"{platform:<15} {r['pages']:>7} {r['page_kb']:>7} "
+            f"{r['json']['page_ms']:>8} {r['typed']['page_ms']:>9} "
+            f"{r['json']['peak_kb']:>9} {r['typed']['peak_kb']:>10} "
+            f"{r['json']['retained_kb']:>8} {r['typed']['retained_kb']:>9} "
+            f"{r['json']['write_ms']:>11} {r['typed']['write_ms']:>12}"
+            + ("" if r["source"] == "archive" else f"  ({r['source']})")
+        )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
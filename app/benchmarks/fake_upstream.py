@@ -0,0 +1,348 @@
+"""
+Локальная замена ScrapeCreators и TGStat для бенчмарков сборщиков
+
+Отдаёт детерминированные записи в форматах, которые разбирают сборщики:
+- ScrapeCreators: /v3/tiktok/profile/videos, /v1/youtube/channel,
+  /v1/youtube/channel-videos, /v1/youtube/channel/shorts,
+  /v1/instagram/profile, /v2/instagram/user/posts;
+- TGStat: /channels/stat, /channels/posts, /posts/stat-multi;
+- медиа: /media/{name}.
+
+id записей начинаются с "bench-" (у Telegram - отрицательные числа), чтобы
+не совпасть с настоящими записями при общем platform_video_id.
+
+Параметры - переменные окружения:
+    FAKE_LATENCY_MS       задержка ответа API, мс (50)
+    FAKE_PAGE_SIZE        записей на странице ScrapeCreators (20)
+    FAKE_TOTAL_POSTS      записей у каждого аккаунта (300)
+    FAKE_POST_INTERVAL_MINUTES  интервал между записями (120)
+    FAKE_RATE_LIMIT_RATIO доля ответов 429 (0)
+    FAKE_RETRY_AFTER      значение заголовка Retry-After, сек (0.1)
+    FAKE_MEDIA_BYTES      размер медиафайла, байт (20000; 0 - без медиа)
+
+Запуск (из каталога app):
+    uvicorn benchmarks.fake_upstream:app --port 9100
+"""
+
+import asyncio
+import os
+import random
+import zlib
+from datetime import datetime, timezone
+from typing import List, Optional
+from fastapi import FastAPI, Query, Request
+from fastapi.responses import JSONResponse, Response
+
+LATENCY_MS = float(os.environ.get("FAKE_LATENCY_MS", 50))
+PAGE_SIZE = int(os.environ.get("FAKE_PAGE_SIZE", 20))
+TOTAL_POSTS = int(os.environ.get("FAKE_TOTAL_POSTS", 300))
+POST_INTERVAL_SECONDS = int(os.environ.get("FAKE_POST_INTERVAL_MINUTES", 120)) * 60
+RATE_LIMIT_RATIO = float(os.environ.get("FAKE_RATE_LIMIT_RATIO", 0))
+RETRY_AFTER = os.environ.get("FAKE_RETRY_AFTER", "0.1")
+MEDIA_BYTES = int(os.environ.get("FAKE_MEDIA_BYTES", 20000))
+
+# Лимит offset TGStat /channels/posts
+TGSTAT_MAX_OFFSET = 1000
+
+# Время самой свежей записи фиксируется при старте, чтобы страницы были стабильны
+NOW = int(datetime.now(timezone.utc).timestamp())
+
+app = FastAPI(title="Fake ScrapeCreators/TGStat")
+
+
+@app.middleware("http")
+async def emulate_upstream(request: Request, call_next):
+    """Задержка и ответы 429 для запросов к API (медиа отдаются сразу)"""
+    if not request.url.path.startswith("/media/"):
+        if LATENCY_MS:
+            await asyncio.sleep(LATENCY_MS / 1000)
+        if RATE_LIMIT_RATIO and random.random() < RATE_LIMIT_RATIO:
+            return JSONResponse(
+                {"success": False, "message": "Too many requests"},
+                status_code=429,
+                headers={"Retry-After": RETRY_AFTER},
+            )
+    return await call_next(request)
+
+
+def _post_time(index: int) -> int:
+    """Unix-время записи с номером index (0 - самая свежая)"""
+    return NOW - index * POST_INTERVAL_SECONDS
+
+
+def _metric(key: str, index: int, scale: int) -> int:
+    """Детерминированное значение метрики записи"""
+    return zlib.crc32(f"{key}:{index}".encode()) % scale
+
+
+def _media_url(request: Request, name: str) -> Optional[str]:
+    if not MEDIA_BYTES:
+        return None
+    return f"{str(request.base_url).rstrip('/')}/media/{name}.jpeg"
+
+
+def _page(offset: int, size: int) -> range:
+    return range(offset, min(offset + size, TOTAL_POSTS))
+
+
+@app.get("/media/{name}")
+async def media(name: str):
+    """Медиафайл заданного размера"""
+    return Response(b"\xff\xd8" + b"\0" * max(MEDIA_BYTES - 2, 0), media_type="image/jpeg")
+
+
+# ScrapeCreators: TikTok
+
+
+@app.get("/v3/tiktok/profile/videos")
+async def tiktok_profile_videos(
+    request: Request, user_id: str, max_cursor: int = 0, sort_by: str = "latest"
+):
+    avatar = _media_url(request, f"tt-avatar-{user_id}")
+    author = {
+        "uid": user_id,
+        "unique_id": f"bench_{user_id}",
+        "follower_count": 10000 + _metric(user_id, 0, 1000),
+        "following_count": 10,
+        "total_favorited": 500000,
+        "aweme_count": TOTAL_POSTS,
+        "avatar_larger": {"url_list": [avatar] if avatar else []},
+    }
+
+    aweme_list = []
+    page = _page(max_cursor, PAGE_SIZE)
+    for index in page:
+        video_id = f"bench-tt-{user_id}-{index}"
+        cover = _media_url(request, f"tt-cover-{video_id}")
+        aweme_list.append(
+            {
+                "aweme_id": video_id,
+                "desc": f"Видео {index}",
+                "create_time": _post_time(index),
+                "share_url": f"https://www.tiktok.com/@bench/video/{video_id}",
+                "author": author,
+                "video": {
+                    "duration": 15000,
+                    "play_addr": {"url_list": [f"https://example.com/{video_id}.mp4"]},
+                    "cover": {"url_list": [cover] if cover else []},
+                    "origin_cover": {"url_list": [cover] if cover else []},
+                },
+                "statistics": {
+                    "play_count": _metric(video_id, 1, 1_000_000),
+                    "digg_count": _metric(video_id, 2, 100_000),
+                    "comment_count": _metric(video_id, 3, 1_000),
+                    "share_count": _metric(video_id, 4, 1_000),
+                    "collect_count": _metric(video_id, 5, 1_000),
+                },
+            }
+        )
+
+    return {
+        "success": True,
+        "credits_remaining": 100000,
+        "aweme_list": aweme_list,
+        "has_more": int(page.stop < TOTAL_POSTS),
+        "max_cursor": page.stop,
+    }
+
+
+# ScrapeCreators: YouTube
+
+
+@app.get("/v1/youtube/channel")
+async def youtube_channel(request: Request, channelId: str):
+    avatar = _media_url(request, f"yt-avatar-{channelId}")
+    return {
+        "success": True,
+        "credits_remaining": 100000,
+        "name": f"bench_{channelId}",
+        "subscriberCount": 50000,
+        "videoCount": TOTAL_POSTS,
+        "avatar": {"image": {"sources": [{"url": avatar}] if avatar else []}},
+    }
+
+
+def _youtube_items(request: Request, channel_id: str, offset: int) -> dict:
+    items = []
+    page = _page(offset, PAGE_SIZE)
+    for index in page:
+        video_id = f"bench-yt-{channel_id}-{index}"
+        items.append(
+            {
+                "id": video_id,
+                "title": f"Видео {index}",
+                "url": f"https://www.youtube.com/watch?v={video_id}",
+                "thumbnail": _media_url(request, f"yt-thumb-{video_id}"),
+                "publishDate": datetime.fromtimestamp(
+                    _post_time(index), tz=timezone.utc
+                ).isoformat(),
+                "lengthSeconds": 60,
+                "viewCountInt": _metric(video_id, 1, 1_000_000),
+                "likeCountInt": _metric(video_id, 2, 100_000),
+                "commentCountInt": _metric(video_id, 3, 1_000),
+            }
+        )
+    return {
+        "items": items,
+        "continuationToken": str(page.stop) if page.stop < TOTAL_POSTS else None,
+    }
+
+
+@app.get("/v1/youtube/channel-videos")
+async def youtube_channel_videos(
+    request: Request, channelId: str, continuationToken: int = 0
+):
+    page = _youtube_items(request, channelId, continuationToken)
+    return {
+        "success": True,
+        "credits_remaining": 100000,
+        "videos": page["items"],
+        "continuationToken": page["continuationToken"],
+    }
+
+
+@app.get("/v1/youtube/channel/shorts")
+async def youtube_channel_shorts(
+    request: Request, channelId: str, continuationToken: int = 0
+):
+    page = _youtube_items(request, channelId, continuationToken)
+    return {
+        "success": True,
+        "credits_remaining": 100000,
+        "shorts": page["items"],
+        "continuationToken": page["continuationToken"],
+    }
+
+
+# ScrapeCreators: Instagram
+
+
+@app.get("/v1/instagram/profile")
+async def instagram_profile(request: Request, handle: str):
+    return {
+        "success": True,
+        "credits_remaining": 100000,
+        "data": {
+            "user": {
+                "username": handle,
+                "full_name": f"Bench {handle}",
+                "edge_followed_by": {"count": 20000},
+                "edge_follow": {"count": 100},
+                "profile_pic_url_hd": _media_url(request, f"ig-avatar-{handle}"),
+            }
+        },
+    }
+
+
+@app.get("/v2/instagram/user/posts")
+async def instagram_user_posts(request: Request, handle: str, next_max_id: int = 0):
+    items = []
+    page = _page(next_max_id, PAGE_SIZE)
+    for index in page:
+        post_id = f"bench-ig-{handle}-{index}"
+        timestamp = _post_time(index)
+        items.append(
+            {
+                "id": post_id,
+                "code": post_id,
+                "taken_at": timestamp,
+                "device_timestamp": timestamp,
+                "caption": {"text": f"Пост {index}"},
+                "play_count": _metric(post_id, 1, 1_000_000),
+                "like_count": _metric(post_id, 2, 100_000),
+                "comment_count": _metric(post_id, 3, 1_000),
+                "video_duration": 30.5,
+                "display_uri": _media_url(request, f"ig-post-{post_id}"),
+            }
+        )
+    return {
+        "success": True,
+        "credits_remaining": 100000,
+        "items": items,
+        "more_available": page.stop < TOTAL_POSTS,
+        "next_max_id": str(page.stop),
+    }
+
+
+# TGStat
+
+
+def _telegram_post_id(channel_id: str, index: int) -> int:
+    # Отрицательные id не пересекаются с настоящими постами TGStat
+    return -(zlib.crc32(channel_id.encode()) % 100000 * 1_000_000 + index)
+
+
+@app.get("/channels/stat")
+async def tgstat_channel_stat(request: Request, channelId: str):
+    avatar = _media_url(request, f"tg-avatar-{channelId}")
+    return {
+        "status": "ok",
+        "response": {
+            "title": f"Bench {channelId}",
+            "username": channelId,
+            "participants_count": 30000,
+            "posts_count": TOTAL_POSTS,
+            "avg_post_reach": 5000,
+            "image640": avatar or "",
+        },
+    }
+
+
+@app.get("/channels/posts")
+async def tgstat_channel_posts(
+    request: Request,
+    channelId: str,
+    limit: int = 50,
+    offset: int = 0,
+    startTime: int = 0,
+    endTime: int = NOW,
+):
+    if offset >= TGSTAT_MAX_OFFSET:
+        return {"status": "ok", "response": {"count": 0, "items": []}}
+
+    # Записи окна [startTime, endTime] от новых к старым
+    first = max(0, -(-(NOW - endTime) // POST_INTERVAL_SECONDS))
+    last = min(TOTAL_POSTS - 1, (NOW - startTime) // POST_INTERVAL_SECONDS)
+    indexes = range(first + offset, min(first + offset + limit, last + 1))
+
+    items = []
+    for index in indexes:
+        image = _media_url(request, f"tg-post-{channelId}-{index}")
+        items.append(
+            {
+                "id": _telegram_post_id(channelId, index),
+                "date": _post_time(index),
+                "views": _metric(channelId, index, 100_000),
+                "link": f"t.me/{channelId}/{index}",
+                "channel_id": channelId,
+                "is_deleted": 0,
+                "text": f"Пост {index}",
+                "media": {
+                    "media_type": "mediaPhoto",
+                    "file_url": image,
+                },
+            }
+        )
+    return {"status": "ok", "response": {"count": len(items), "items": items}}
+
+
+@app.get("/posts/stat-multi")
+async def tgstat_posts_stat_multi(channelId: str, postsIds: str = Query("")):
+    stats: List[dict] = []
+    for post_id in filter(None, postsIds.split(",")):
+        stats.append(
+            {
+                "postId": int(post_id),
+                "viewsCount": _metric(post_id, 1, 100_000),
+                "sharesCount": _metric(post_id, 2, 1_000),
+                "commentsCount": _metric(post_id, 3, 1_000),
+                "reactionsCount": _metric(post_id, 4, 10_000),
+            }
+        )
+    return {"status": "ok", "response": stats}
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(app, host="127.0.0.1", port=int(os.environ.get("FAKE_PORT", 9100)))
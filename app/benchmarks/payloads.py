@@ -0,0 +1,114 @@
+"""
+Бенчмарк размера и сериализации JSON-ответов аналитики
+
+Для JSON-эндпоинтов benchmarks.analytics на данных benchmarks.seed
+ответ получается один раз, затем измеряются:
+- сериализация: стандартный json (JSONResponse) и orjson (ORJSONResponse);
+- размер ответа без сжатия, gzip и brotli с уровнями из настроек,
+  и время сжатия.
+
+Запуск (из каталога app):
+    python -m benchmarks.payloads --repeat 20
+"""
+
+import argparse
+import asyncio
+import gzip
+import json
+import statistics
+import time
+from typing import Callable
+from benchmarks import use_bench_database
+
+# Данные seed - только в отдельной БД бенчмарков; до импорта config
+use_bench_database()
+
+import httpx  # noqa: E402
+from fastapi.responses import JSONResponse, ORJSONResponse  # noqa: E402
+from config import settings  # noqa: E402
+from benchmarks.analytics import _endpoints, _pick_targets  # noqa: E402
+from benchmarks.seed import seed_accounts_active  # noqa: E402
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def _median_ms(func: Callable[[], bytes], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return round(statistics.median(timings), 2)
+
+
+def measure_payload(content, repeat: int) -> dict:
+    """Сериализация и сжатие одного ответа"""
+    body = ORJSONResponse(content).body
+    result = {
+        "json_ms": _median_ms(lambda: JSONResponse(content).body, repeat),
+        "orjson_ms": _median_ms(lambda: ORJSONResponse(content).body, repeat),
+        "raw_bytes": len(body),
+        "gzip_bytes": len(gzip.compress(body, settings.compression_gzip_level)),
+        "gzip_ms": _median_ms(
+            lambda: gzip.compress(body, settings.compression_gzip_level), repeat
+        ),
+    }
+    if brotli is not None:
+        quality = settings.compression_brotli_quality
+        result["br_bytes"] = len(brotli.compress(body, quality=quality))
+        result["br_ms"] = _median_ms(
+            lambda: brotli.compress(body, quality=quality), repeat
+        )
+    return result
+
+
+async def run_benchmark(repeat: int) -> dict:
+    from main import app
+
+    results = {}
+    async with app.router.lifespan_context(app), seed_accounts_active():
+        targets = await _pick_targets()
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app),
+            base_url="http://bench",
+            timeout=None,
+            headers={"Accept-Encoding": "identity"},
+        ) as client:
+            for name, path, params in _endpoints(targets):
+                if "reports/" in path:
+                    # Отчёты docx/xlsx - не JSON
+                    continue
+                response = await client.get(path, params=params)
+                results[name] = measure_payload(response.json(), repeat)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Бенчмарк JSON-ответов")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--json", help="Сохранить результаты в файл")
+    args = parser.parse_args()
+
+    results = asyncio.run(run_benchmark(args.repeat))
+
+    print(
+        f"{'Эндпоинт':<24} {'json мс':>8} {'orjson мс':>10} {'байт':>10} "
+        f"{'gzip':>9} {'gzip мс':>8} {'br':>9} {'br мс':>7}"
+    )
+    for name, r in results.items():
+        print(
+            f"{name:<24} {r['json_ms']:>8} {r['orjson_ms']:>10} {r['raw_bytes']:>10} "
+            f"{r['gzip_bytes']:>9} {r['gzip_ms']:>8} "
+            f"{r.get('br_bytes', '-'):>9} {r.get('br_ms', '-'):>7}"
+        )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+"""
+Генератор синтетических данных для бенчмарков аналитики
+
+Создаёт авторов, аккаунты платформ, записи, ежедневные снимки профилей и
+историю метрик записей. Записи вставляются через COPY, снимки и история
+генерируются на стороне PostgreSQL (generate_series), поэтому масштаб
+500 авторов x 4 платформы x 5000 записей заполняется за минуты.
+
+Запуск (из каталога app, BENCH_DATABASE_URL - отдельная БД для бенчмарков,
+схема применяется миграциями aerich):
+    python -m benchmarks.seed --authors 500 --posts 5000
+    python -m benchmarks.seed --clear
+
+Все сгенерированные авторы имеют имя с префиксом SEED_AUTHOR_PREFIX и
+удаляются (каскадно) командой --clear. Аккаунты создаются неактивными
+(is_active=False), чтобы плановый и массовый сбор не отправляли их
+синтетические id в API; бенчмарки включают их на время прогона
+(seed_accounts_active).
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, List
+from benchmarks import migrate_bench_database, use_bench_database
+
+# Только отдельная БД бенчмарков - до импорта config
+use_bench_database()
+
+from tortoise import Tortoise, connections  # noqa: E402
+from config import TORTOISE_ORM  # noqa: E402
+from models import Author, SocialAccount  # noqa: E402
+
+SEED_AUTHOR_PREFIX = "[seed] "
+
+DEFAULT_PLATFORMS = ("tiktok", "instagram", "youtube", "telegram")
+
+VIDEO_COLUMNS = [
+    "social_account_id",
+    "platform_video_id",
+    "platform_author_id",
+    "description",
+    "created_at_platform",
+    "share_url",
+    "duration_ms",
+    "views_count",
+    "likes_count",
+    "comments_count",
+    "shares_count",
+    "saves_count",
+    "extra_data",
+    "last_updated",
+    "created_at",
+]
+
+# Ежедневные снимки профиля: подписчики растут линейно к текущему значению
+SNAPSHOTS_SQL = """
+INSERT INTO profile_snapshots (
+    social_account_id, snapshot_date, followers_count, following_count,
+    total_likes, total_posts, extra_data, created_at
+)
+SELECT
+    a.id,
+    $2::timestamptz - g * interval '1 day',
+    GREATEST((a.followers * (1 - g * 0.002))::int, 0),
+    100,
+    (a.followers * 20 * (1 - g * 0.002))::bigint,
+    GREATEST($4 - g * $4 / GREATEST($3, 1), 0),
+    '{}'::jsonb,
+    now()
+FROM unnest($1::int[], $5::int[]) AS a(id, followers)
+CROSS JOIN generate_series(0, $3 - 1) AS g
+"""
+
+# История метрик: k снимков на запись, просмотры набираются к текущему значению
+HISTORY_SQL = """
+INSERT INTO video_metrics_history (
+    video_id, snapshot_date, views_count, likes_count, comments_count,
+    shares_count, saves_count, created_at
+)
+SELECT
+    v.id,
+    LEAST(v.created_at_platform + g * interval '1 day', $2::timestamptz),
+    (v.views_count * g / $3)::bigint,
+    (v.likes_count * g / $3)::bigint,
+    (v.comments_count * g / $3)::int,
+    (v.shares_count * g / $3)::int,
+    (v.saves_count * g / $3)::int,
+    now()
+FROM videos v
+CROSS JOIN generate_series(1, $3) AS g
+WHERE v.social_account_id = ANY($1::int[])
+"""
+
+
+def _video_records(
+    account: SocialAccount,
+    followers: int,
+    posts: int,
+    days: int,
+    now: datetime,
+    rng: random.Random,
+) -> List[tuple]:
+    """Записи аккаунта с реалистичным (логнормальным) распределением метрик"""
+    records = []
+    for index in range(posts):
+        created_at = now - timedelta(seconds=rng.uniform(0, days * 86400))
+        views = int(followers * rng.lognormvariate(-1.5, 1.0))
+        likes = int(views * rng.uniform(0.02, 0.1))
+        records.append(
+            (
+                account.id,
+                f"seed-{account.platform}-{account.id}-{index}",
+                account.platform_user_id,
+                f"Запись {index}",
+                created_at,
+                f"https://example.com/{account.platform}/{account.id}/{index}",
+                rng.randint(5, 180) * 1000,
+                views,
+                likes,
+                int(likes * rng.uniform(0.01, 0.08)),
+                int(likes * rng.uniform(0.005, 0.05)),
+                int(likes * rng.uniform(0.01, 0.1)),
+                "{}",
+                now,
+                now,
+            )
+        )
+    return records
+
+
+async def seed_author(
+    number: int, platforms: List[str], args, now: datetime, rng: random.Random
+) -> None:
+    """Создать автора со всеми аккаунтами, записями, снимками и историей"""
+    author = await Author.create(name=f"{SEED_AUTHOR_PREFIX}{number}")
+    await SocialAccount.bulk_create(
+        [
+            SocialAccount(
+                author=author,
+                platform=platform,
+                platform_user_id=f"seed-{author.id}-{platform}",
+                username=f"seed_{author.id}_{platform}",
+                is_active=False,
+            )
+            for platform in platforms
+        ]
+    )
+    accounts = await SocialAccount.filter(author=author)
+    followers = {account.id: int(rng.lognormvariate(10, 1.5)) for account in accounts}
+
+    client = connections.get("default")
+    async with client.acquire_connection() as connection:
+        for account in accounts:
+            await connection.copy_records_to_table(
+                "videos",
+                records=_video_records(
+                    account, followers[account.id], args.posts, args.days, now, rng
+                ),
+                columns=VIDEO_COLUMNS,
+            )
+
+        account_ids = [account.id for account in accounts]
+        await connection.execute(
+            SNAPSHOTS_SQL,
+            account_ids,
+            now,
+            args.days,
+            args.posts,
+            [followers[account_id] for account_id in account_ids],
+        )
+        if args.history:
+            await connection.execute(HISTORY_SQL, account_ids, now, args.history)
+
+
+async def seed(args) -> None:
+    platforms = args.platforms
+    now = datetime.now(timezone.utc)
+    rng = random.Random(args.random_seed)
+    limiter = asyncio.Semaphore(args.concurrency)
+    done = 0
+    started = time.perf_counter()
+
+    async def run(number: int) -> None:
+        nonlocal done
+        async with limiter:
+            await seed_author(number, platforms, args, now, random.Random(rng.random()))
+        done += 1
+        if done % 10 == 0 or done == args.authors:
+            print(
+                f"{done}/{args.authors} авторов, {time.perf_counter() - started:.0f} с"
+            )
+
+    await asyncio.gather(*(run(number) for number in range(args.authors)))
+
+    # Актуальная статистика планировщика после массовой вставки
+    await connections.get("default").execute_script(
+        "ANALYZE videos; ANALYZE profile_snapshots; ANALYZE video_metrics_history;"
+    )
+
+
+@asynccontextmanager
+async def seed_accounts_active() -> AsyncIterator[None]:
+    """Включить аккаунты seed на время бенчмарка (аналитика учитывает только активные)"""
+    author_ids = await Author.filter(name__startswith=SEED_AUTHOR_PREFIX).values_list(
+        "id", flat=True
+    )
+    accounts = SocialAccount.filter(author_id__in=author_ids)
+    await accounts.update(is_active=True)
+    try:
+        yield
+    finally:
+        await accounts.update(is_active=False)
+
+
+async def clear() -> None:
+    deleted = await Author.filter(name__startswith=SEED_AUTHOR_PREFIX).delete()
+    print(f"Удалено авторов: {deleted}")
+
+
+async def main(args) -> None:
+    await Tortoise.init(config=TORTOISE_ORM)
+    try:
+        if args.clear:
+            await clear()
+        else:
+            await seed(args)
+    finally:
+        await Tortoise.close_connections()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Синтетические данные для бенчмарков")
+    parser.add_argument("--authors", type=int, default=50)
+    parser.add_argument("--platforms", nargs="+", default=list(DEFAULT_PLATFORMS))
+    parser.add_argument("--posts", type=int, default=500, help="Записей на аккаунт")
+    parser.add_argument("--days", type=int, default=180, help="Глубина данных, дней")
+    parser.add_argument(
+        "--history", type=int, default=4, help="Снимков метрик на запись (0 - без истории)"
+    )
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--random-seed", type=int, default=42)
+    parser.add_argument("--clear", action="store_true", help="Удалить сгенерированные данные")
+    args = parser.parse_args()
+    migrate_bench_database()
+    asyncio.run(main(args))
@@ -0,0 +1,161 @@
+"""
+Бенчмарк старта API: время импорта main и память процесса
+
+Каждый замер - отдельный процесс python (чистый кэш модулей), измеряются:
+- import main - время импорта приложения (то, что платит каждый воркер);
+- RSS после импорта;
+- тяжёлые модули (matplotlib, scipy, docx, ...), загруженные при старте -
+  их быть не должно, они импортируются при первом отчёте;
+- отдельно - время импорта генераторов отчётов (отложенная стоимость).
+
+Запуск (из каталога app):
+    python -m benchmarks.startup --save-baseline bench_startup.json
+    python -m benchmarks.startup --baseline bench_startup.json --top 20
+
+Регрессия (код выхода 1): рост медианы времени импорта больше чем на
+--tolerance или тяжёлый модуль, загруженный при старте.
+"""
+
+import argparse
+import json
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+HEAVY_MODULES = ("matplotlib", "numpy", "scipy", "docx", "openpyxl")
+
+
+def _rss_mb() -> float:
+    """Текущий RSS процесса (Linux)"""
+    with open("/proc/self/statm") as f:
+        pages = int(f.read().split()[1])
+    return round(pages * resource.getpagesize() / 1024 / 1024, 1)
+
+
+def run_one() -> dict:
+    """Замер в текущем (новом) процессе"""
+    started = time.perf_counter()
+    import main  # noqa: F401
+
+    import_seconds = time.perf_counter() - started
+    rss_mb = _rss_mb()
+    loaded = [name for name in HEAVY_MODULES if name in sys.modules]
+
+    started = time.perf_counter()
+    from reports import ExcelReportGenerator, WordReportGenerator  # noqa: F401
+    from reports_telegram import excel_generator  # noqa: F401
+
+    return {
+        "import_seconds": round(import_seconds, 4),
+        "rss_mb": rss_mb,
+        "heavy_modules": loaded,
+        "reports_import_seconds": round(time.perf_counter() - started, 4),
+        "rss_with_reports_mb": _rss_mb(),
+    }
+
+
+def _spawn(*args: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *args], capture_output=True, text=True, check=True
+    )
+
+
+def top_imports(limit: int) -> list:
+    """Самые долгие модули при импорте main (python -X importtime)"""
+    process = _spawn("-X", "importtime", "-c", "import main")
+    rows = []
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        try:
+            rows.append((int(cumulative), name.strip()))
+        except ValueError:
+            # Строка заголовка
+            continue
+    rows.sort(reverse=True)
+    return [(name, round(us / 1e6, 3)) for us, name in rows[:limit]]
+
+
+def run_benchmark(repeat: int) -> dict:
+    runs = [
+        json.loads(_spawn("-m", "benchmarks.startup", "--run-one").stdout.splitlines()[-1])
+        for _ in range(repeat)
+    ]
+    return {
+        "python": sys.version.split()[0],
+        "import_seconds": statistics.median(r["import_seconds"] for r in runs),
+        "import_seconds_min": min(r["import_seconds"] for r in runs),
+        "rss_mb": statistics.median(r["rss_mb"] for r in runs),
+        "heavy_modules": runs[-1]["heavy_modules"],
+        "reports_import_seconds": statistics.median(
+            r["reports_import_seconds"] for r in runs
+        ),
+        "rss_with_reports_mb": statistics.median(r["rss_with_reports_mb"] for r in runs),
+    }
+
+
+def compare(baseline: dict, current: dict, tolerance: float) -> list:
+    """Описания регрессий относительно базовой линии"""
+    regressions = []
+    limit = baseline["import_seconds"] * (1 + tolerance)
+    if current["import_seconds"] > limit:
+        regressions.append(
+            f"import main: {current['import_seconds']:.3f} с > "
+            f"{baseline['import_seconds']:.3f} с (+{tolerance:.0%})"
+        )
+    if current["heavy_modules"]:
+        regressions.append(
+            "Тяжёлые модули при старте: " + ", ".join(current["heavy_modules"])
+        )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Бенчмарк старта API")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="Самых долгих модулей")
+    parser.add_argument("--baseline", help="Сравнить с базовой линией")
+    parser.add_argument("--save-baseline", help="Сохранить результаты как базовую линию")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--run-one", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_one:
+        print(json.dumps(run_one()))
+        return
+
+    current = run_benchmark(args.repeat)
+    print(
+        f"import main: {current['import_seconds']:.3f} с "
+        f"(min {current['import_seconds_min']:.3f} с), RSS {current['rss_mb']} МБ"
+    )
+    print(
+        f"Генераторы отчётов (при первом отчёте): "
+        f"+{current['reports_import_seconds']:.3f} с, "
+        f"RSS {current['rss_with_reports_mb']} МБ"
+    )
+    print("Тяжёлые модули при старте: " + (", ".join(current["heavy_modules"]) or "нет"))
+    if args.top:
+        print(f"\n{'Модуль':<50} {'с':>8}")
+        for name, seconds in top_imports(args.top):
+            print(f"{name:<50} {seconds:>8.3f}")
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(current, f, indent=2, ensure_ascii=False)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, current, args.tolerance)
+        for regression in regressions:
+            print(f"РЕГРЕССИЯ: {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,332 @@
+"""
+Команды обслуживания
+
+    python cli.py collect --platform tiktok --all --since 7d --concurrency 8
+    python cli.py collect --account-id 12 --account-id 15 --enqueue
+    python cli.py reprocess [--account-id ID ...] [--platform tiktok] [--since 2025-01-01]
+    python cli.py media-gc [--min-age-hours 24] [--dry-run]
+    python cli.py prune-jobs [--older-than-days 30]
+    python cli.py prune-archive [--older-than-days 365] [--dry-run]
+    python cli.py analyze
+    python cli.py scheduler
+    python cli.py worker [--concurrency 4]
+"""
+
+import argparse
+import asyncio
+import re
+import signal
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from tortoise import Tortoise
+from config import TORTOISE_ORM, settings
+from events import collection_events
+from logs import setup_logging
+from models import SocialAccount
+
+
+def _parse_date(value: str) -> datetime:
+    """Дата/время ISO, без timezone считается UTC"""
+    date = datetime.fromisoformat(value)
+    return date if date.tzinfo else date.replace(tzinfo=timezone.utc)
+
+
+def _parse_since(value: str) -> datetime:
+    """Относительный период ("7d", "12h") от текущего момента или дата ISO"""
+    match = re.fullmatch(r"(\d+)([dh])", value)
+    if not match:
+        return _parse_date(value)
+    amount, unit = int(match.group(1)), match.group(2)
+    delta = timedelta(days=amount) if unit == "d" else timedelta(hours=amount)
+    return datetime.now(timezone.utc) - delta
+
+
+class _Progress:
+    """Строка прогресса в stderr (в терминале перерисовывается на месте)"""
+
+    WIDTH = 30
+
+    def __init__(self, total: int):
+        self.total = total
+        self.done = 0
+        self.failed = 0
+        self.started = time.monotonic()
+        self.interactive = sys.stderr.isatty()
+
+    def advance(self, failed: bool = False) -> None:
+        self.done += 1
+        self.failed += failed
+        filled = self.WIDTH * self.done // max(self.total, 1)
+        line = (
+            f"[{'#' * filled}{'.' * (self.WIDTH - filled)}] {self.done}/{self.total}"
+            f" ошибок: {self.failed}, {time.monotonic() - self.started:.0f} с"
+        )
+        if self.interactive:
+            sys.stderr.write(f"\r{line}")
+            if self.done == self.total:
+                sys.stderr.write("\n")
+        else:
+            sys.stderr.write(f"{line}\n")
+        sys.stderr.flush()
+
+
+async def _select_accounts(args, active_only: bool = False) -> list:
+    """Аккаунты по фильтрам командной строки"""
+    query = SocialAccount.all()
+    if args.account_id:
+        query = query.filter(id__in=args.account_id)
+    elif active_only:
+        # Явно указанные аккаунты собираются, даже если отключены
+        query = query.filter(is_active=True)
+    if args.platform:
+        query = query.filter(platform=args.platform)
+    return await query.order_by("id")
+
+
+async def collect(args) -> None:
+    """Собрать данные аккаунтов напрямую (без HTTP API) или поставить в очередь"""
+    from services.base import close_http_client
+    from services.jobs import enqueue_collection
+    from services.registry import collect_social_account
+
+    if not (args.all or args.account_id or args.platform):
+        raise SystemExit("Укажите --all, --platform или --account-id")
+
+    accounts = await _select_accounts(args, active_only=True)
+
+    if args.enqueue:
+        for account in accounts:
+            await enqueue_collection(
+                account, args.since, args.until, args.priority, args.max_credits
+            )
+        print(f"Поставлено в очередь: {len(accounts)}")
+        return
+
+    progress = _Progress(len(accounts))
+    limiter = asyncio.Semaphore(args.concurrency)
+
+    async def run(account: SocialAccount) -> str:
+        async with limiter:
+            try:
+                result = await collect_social_account(
+                    account,
+                    args.since,
+                    args.until,
+                    max_credits=args.max_credits,
+                    lock_wait_seconds=0,
+                )
+            except Exception as e:
+                progress.advance(failed=True)
+                return f"ошибка - {e}"
+            progress.advance()
+            return result["message"]
+
+    try:
+        messages = await asyncio.gather(*(run(account) for account in accounts))
+    finally:
+        await close_http_client()
+
+    for account, message in zip(accounts, messages):
+        print(f"{account.platform}/{account.platform_user_id}: {message}")
+
+
+async def reprocess(args) -> None:
+    """Пересобрать записи из архива ответов без обращения к API"""
+    from services.reprocess import reprocess_archive
+
+    accounts = await _select_accounts(args)
+    results = await reprocess_archive(
+        accounts, args.since, args.until, concurrency=args.concurrency
+    )
+
+    for account in accounts:
+        result = results[account.id]
+        if isinstance(result, Exception):
+            print(f"{account.platform}/{account.platform_user_id}: ошибка - {result}")
+        else:
+            print(f"{account.platform}/{account.platform_user_id}: {result} записей")
+
+
+async def media_gc(args) -> None:
+    """Удалить медиафайлы, на которые не ссылается ни одна запись"""
+    from services.maintenance import collect_media_garbage
+
+    result = await collect_media_garbage(args.min_age_hours, args.dry_run)
+    action = "К удалению" if args.dry_run else "Удалено"
+    print(
+        f"Проверено файлов: {result.files_checked}; {action}: {result.files_removed}"
+        f" ({result.bytes_removed / 1024 / 1024:.1f} МБ)"
+    )
+
+
+async def prune_jobs(args) -> None:
+    """Удалить старые выполненные и dead задачи очереди сборов"""
+    from services.maintenance import prune_jobs as prune
+
+    print(f"Удалено задач: {await prune(args.older_than_days)}")
+
+
+async def prune_archive(args) -> None:
+    """Удалить архив ответов API старше срока хранения"""
+    from services.maintenance import prune_archive as prune
+
+    result = await prune(args.older_than_days, args.dry_run)
+    action = "К удалению" if args.dry_run else "Удалено"
+    print(
+        f"{action} ответов: {result.responses_removed}; файлов: {result.files_removed}"
+        f" ({result.bytes_removed / 1024 / 1024:.1f} МБ)"
+    )
+
+
+async def analyze(args) -> None:
+    """Обновить статистику планировщика Postgres по основным таблицам"""
+    from services.maintenance import ANALYZE_TABLES, analyze_tables
+
+    await analyze_tables()
+    print(f"ANALYZE: {', '.join(ANALYZE_TABLES)}")
+
+
+async def scheduler(args) -> None:
+    """Плановый сбор отдельным процессом (до SIGTERM/SIGINT)"""
+    from services.base import close_http_client
+    from services.scheduler import CollectionScheduler
+
+    stopped = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(signum, stopped.set)
+
+    collection_scheduler = CollectionScheduler()
+    collection_scheduler.start()
+    try:
+        await stopped.wait()
+    finally:
+        await collection_scheduler.stop()
+        await close_http_client()
+
+
+async def worker(args) -> None:
+    """Воркер очереди сборов collection_jobs (до SIGTERM/SIGINT)"""
+    from services.base import close_http_client
+    from services.jobs import CollectionWorker
+
+    stopped = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(signum, stopped.set)
+
+    collection_worker = CollectionWorker(args.concurrency)
+    collection_worker.start()
+    try:
+        await stopped.wait()
+    finally:
+        await collection_worker.stop()
+        await close_http_client()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Команды обслуживания")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    collect_parser = commands.add_parser(
+        "collect", help="Собрать данные аккаунтов без HTTP API"
+    )
+    collect_parser.add_argument("--account-id", type=int, action="append")
+    collect_parser.add_argument("--platform")
+    collect_parser.add_argument(
+        "--all", action="store_true", help="Все активные аккаунты (с учётом --platform)"
+    )
+    collect_parser.add_argument(
+        "--since", type=_parse_since, help="Начало периода: 7d, 12h или дата ISO"
+    )
+    collect_parser.add_argument("--until", type=_parse_date, help="Конец периода")
+    collect_parser.add_argument("--concurrency", type=int, default=4)
+    collect_parser.add_argument(
+        "--max-credits", type=int, help="Лимит платных запросов на аккаунт"
+    )
+    collect_parser.add_argument(
+        "--enqueue", action="store_true", help="Поставить в очередь для cli.py worker"
+    )
+    collect_parser.add_argument("--priority", type=int, default=0)
+    collect_parser.set_defaults(handler=collect)
+
+    reprocess_parser = commands.add_parser(
+        "reprocess", help="Пересобрать записи из архива ответов API"
+    )
+    reprocess_parser.add_argument("--account-id", type=int, action="append")
+    reprocess_parser.add_argument("--platform")
+    reprocess_parser.add_argument(
+        "--since", type=_parse_date, help="Страницы, полученные не раньше"
+    )
+    reprocess_parser.add_argument(
+        "--until", type=_parse_date, help="Страницы, полученные не позже"
+    )
+    reprocess_parser.add_argument("--concurrency", type=int, default=4)
+    reprocess_parser.set_defaults(handler=reprocess)
+
+    media_gc_parser = commands.add_parser(
+        "media-gc", help="Удалить медиафайлы без ссылок из БД"
+    )
+    media_gc_parser.add_argument(
+        "--min-age-hours", type=float, default=24, help="Не трогать файлы моложе"
+    )
+    media_gc_parser.add_argument(
+        "--dry-run", action="store_true", help="Только посчитать, не удалять"
+    )
+    media_gc_parser.set_defaults(handler=media_gc)
+
+    prune_jobs_parser = commands.add_parser(
+        "prune-jobs", help="Удалить старые выполненные и dead задачи сбора"
+    )
+    prune_jobs_parser.add_argument("--older-than-days", type=int, default=30)
+    prune_jobs_parser.set_defaults(handler=prune_jobs)
+
+    prune_archive_parser = commands.add_parser(
+        "prune-archive", help="Удалить архив ответов API старше срока хранения"
+    )
+    prune_archive_parser.add_argument(
+        "--older-than-days",
+        type=int,
+        default=settings.archive_retention_days,
+        help="По умолчанию - ARCHIVE_RETENTION_DAYS",
+    )
+    prune_archive_parser.add_argument(
+        "--dry-run", action="store_true", help="Только посчитать, не удалять"
+    )
+    prune_archive_parser.set_defaults(handler=prune_archive)
+
+    analyze_parser = commands.add_parser(
+        "analyze", help="Обновить статистику планировщика Postgres"
+    )
+    analyze_parser.set_defaults(handler=analyze)
+
+    scheduler_parser = commands.add_parser(
+        "scheduler", help="Плановый сбор (вместо SCHEDULER_ENABLED в API)"
+    )
+    scheduler_parser.set_defaults(handler=scheduler)
+
+    worker_parser = commands.add_parser(
+        "worker", help="Воркер очереди сборов collection_jobs"
+    )
+    worker_parser.add_argument(
+        "--concurrency", type=int, help="Одновременных задач (по умолчанию WORKER_CONCURRENCY)"
+    )
+    worker_parser.set_defaults(handler=worker)
+
+    return parser
+
+
+async def main(args) -> None:
+    setup_logging()
+    await Tortoise.init(config=TORTOISE_ORM)
+    try:
+        await args.handler(args)
+    finally:
+        # Не пересланные ещё события хода сборов
+        await collection_events.close()
+        await Tortoise.close_connections()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(build_parser().parse_args()))
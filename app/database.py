@@ -0,0 +1,43 @@
+"""
+Маршрутизация запросов ORM между пулами соединений
+
+Сборщики и API работают через соединение "default". Аналитика и отчёты
+читают через "analytics" (свой пул, statement_timeout, возможно реплика):
+чтение моделей внутри analytics_db() направляется туда роутером Tortoise,
+запись всегда идёт в "default".
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+ANALYTICS_CONNECTION = "analytics"
+
+_use_analytics: ContextVar[bool] = ContextVar("use_analytics_db", default=False)
+
+
+@contextmanager
+def analytics_db() -> Iterator[None]:
+    """Чтение внутри блока (и созданных в нём задач) - через пул аналитики"""
+    token = _use_analytics.set(True)
+    try:
+        yield
+    finally:
+        _use_analytics.reset(token)
+
+
+async def use_analytics_db():
+    """Зависимость FastAPI для роутеров аналитики и отчётов"""
+    with analytics_db():
+        yield
+
+
+class AnalyticsRouter:
+    """Роутер Tortoise (TORTOISE_ORM["routers"])"""
+
+    def db_for_read(self, model) -> Optional[str]:
+        # None - соединение модели по умолчанию
+        return ANALYTICS_CONNECTION if _use_analytics.get() else None
+
+    def db_for_write(self, model) -> Optional[str]:
+        return None
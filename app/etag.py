@@ -0,0 +1,107 @@
+"""
+ETag и условные GET для эндпоинтов аналитики
+
+ETag строится из пути, параметров запроса и версии данных - одного
+дешёвого запроса к БД (max last_updated записей и max id снимков профиля
+в области запроса, а также изменения аккаунтов и авторов). Если клиент
+прислал совпадающий If-None-Match, расчёт аналитики не выполняется и
+возвращается 304.
+
+    @router.get("/{social_account_id}", dependencies=[Depends(conditional_get("account"))])
+"""
+
+import hashlib
+import time
+from typing import Optional
+from fastapi import Request, Response
+from tortoise import connections
+from database import ANALYTICS_CONNECTION
+
+# Область данных запроса -> условие на social_account_id
+_SCOPE_FILTERS = {
+    # Всё
+    None: "TRUE",
+    # social_account_id из пути
+    "account": "social_account_id = $1",
+    # Аккаунты автора author_id из пути
+    "author": "social_account_id IN (SELECT id FROM social_accounts WHERE author_id = $1)",
+    # Список social_account_ids из параметров запроса
+    "accounts": "social_account_id = ANY($1::int[])",
+}
+
+VERSION_SQL = """
+SELECT
+    (SELECT max(last_updated) FROM videos WHERE {filter}) AS videos,
+    (SELECT max(id) FROM profile_snapshots WHERE {filter}) AS snapshots,
+    (SELECT count(*) || ':' || max(updated_at) FROM social_accounts) AS accounts,
+    (SELECT count(*) || ':' || max(updated_at) FROM authors) AS authors
+"""
+
+# Периоды "7d"/"30d" считаются от текущего времени - такой ответ меняется
+# и без новых данных, ETag для него действует не дольше этого интервала
+RELATIVE_PERIOD_SECONDS = 300
+
+
+class NotModified(Exception):
+    """Данные не изменились с версии из If-None-Match"""
+
+    def __init__(self, etag: str):
+        self.etag = etag
+
+
+async def not_modified_handler(request: Request, exc: NotModified) -> Response:
+    return Response(
+        status_code=304, headers={"ETag": exc.etag, "Cache-Control": "no-cache"}
+    )
+
+
+def _scope_key(request: Request, scope: Optional[str]):
+    if scope == "account":
+        return int(request.path_params["social_account_id"])
+    if scope == "author":
+        return int(request.path_params["author_id"])
+    if scope == "accounts":
+        return [int(v) for v in request.query_params.getlist("social_account_ids")]
+    return None
+
+
+async def data_version(scope: Optional[str] = None, key=None) -> str:
+    """Версия данных области (меняется при любом сборе или правке аккаунтов)"""
+    sql = VERSION_SQL.format(filter=_SCOPE_FILTERS[scope])
+    rows = await connections.get(ANALYTICS_CONNECTION).execute_query_dict(
+        sql, [] if scope is None else [key]
+    )
+    row = rows[0]
+    return "|".join(str(row[name]) for name in ("videos", "snapshots", "accounts", "authors"))
+
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # Сравнение слабое: W/"x" и "x" совпадают
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag.removeprefix("W/") in tags
+
+
+def conditional_get(scope: Optional[str] = None, relative_period: bool = False):
+    """Зависимость FastAPI: ETag ответа и 304 при совпадении If-None-Match"""
+
+    async def dependency(request: Request, response: Response) -> None:
+        version = await data_version(scope, _scope_key(request, scope))
+        parts = [request.url.path, str(sorted(request.query_params.multi_items())), version]
+        if relative_period:
+            parts.append(str(int(time.time() // RELATIVE_PERIOD_SECONDS)))
+
+        digest = hashlib.blake2b("\n".join(parts).encode(), digest_size=16).hexdigest()
+        # Слабый ETag: тело одно, но может отдаваться сжатым по-разному
+        etag = f'W/"{digest}"'
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and _matches(if_none_match, etag):
+            raise NotModified(etag)
+
+        response.headers["ETag"] = etag
+        # Кэшировать можно, но перед использованием - проверить ETag
+        response.headers["Cache-Control"] = "no-cache"
+
+    return dependency
@@ -0,0 +1,165 @@
+"""
+Шина событий процесса: ход сборов для SSE (/api/collect/events)
+
+Сборщики публикуют события в шину своего процесса, подписчики (потоки SSE)
+получают их через собственные очереди. Медленный подписчик не тормозит
+сбор: при переполнении его очереди старые события отбрасываются.
+
+Сбор может идти в другом воркере gunicorn или в cli.py worker, поэтому
+события дополнительно пересылаются через Postgres NOTIFY (events_relay_enabled):
+процесс, у которого есть подписчики, слушает канал и раздаёт чужие события
+своим подписчикам. Пересылка идёт пачками не чаще раза в
+events_relay_interval_seconds, одним запросом: из подряд идущих событий
+"page" одного сбора уходит последнее (событие - снимок хода сбора,
+промежуточные ничего не добавляют).
+"""
+
+import asyncio
+import logging
+import os
+import uuid
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Set
+import asyncpg
+import orjson
+from tortoise import connections
+from config import connect_kwargs, settings
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "collection_events"
+
+# Лимит NOTIFY - 8000 байт; события сборов намного меньше
+MAX_NOTIFY_BYTES = 7900
+
+Event = Dict[str, Any]
+
+
+class EventBus:
+    def __init__(self, channel: str = CHANNEL):
+        self.channel = channel
+        # Отличает свои события, вернувшиеся через NOTIFY
+        self.origin = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        # Начало сообщения NOTIFY: {"origin": ..., "events": [...]}
+        self._prefix = b'{"origin":' + orjson.dumps(self.origin) + b',"events":['
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._listener: Optional[asyncpg.Connection] = None
+        self._listener_lock = asyncio.Lock()
+        # События для NOTIFY и индекс последнего "page" сбора среди них
+        self._pending: List[bytes] = []
+        self._pending_pages: Dict[Any, int] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+
+    def _deliver(self, event: Event) -> None:
+        for queue in self._subscribers:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+    async def publish(self, event: Event) -> None:
+        """Отправить событие подписчикам этого и (через NOTIFY) других процессов"""
+        self._deliver(event)
+        if not settings.events_relay_enabled:
+            return
+
+        encoded = orjson.dumps(event)
+        if len(self._prefix) + len(encoded) + 2 > MAX_NOTIFY_BYTES:
+            return
+        key = event.get("social_account_id")
+        if event.get("type") == "page" and key in self._pending_pages:
+            self._pending[self._pending_pages[key]] = encoded
+        else:
+            self._pending.append(encoded)
+            if event.get("type") == "page":
+                self._pending_pages[key] = len(self._pending) - 1
+            else:
+                self._pending_pages.pop(key, None)
+
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(settings.events_relay_interval_seconds)
+        self._flush_task = None
+        await self._flush()
+
+    def _payloads(self, events: List[bytes]) -> List[str]:
+        """Разложить события по сообщениям NOTIFY не длиннее MAX_NOTIFY_BYTES"""
+        batches, batch, size = [], [], len(self._prefix) + 2
+        for encoded in events:
+            if batch and size + len(encoded) + 1 > MAX_NOTIFY_BYTES:
+                batches.append(batch)
+                batch, size = [], len(self._prefix) + 2
+            batch.append(encoded)
+            size += len(encoded) + 1
+        if batch:
+            batches.append(batch)
+        return [(self._prefix + b",".join(batch) + b"]}").decode() for batch in batches]
+
+    async def _flush(self) -> None:
+        """Переслать накопленные события одним запросом"""
+        events, self._pending, self._pending_pages = self._pending, [], {}
+        if not events:
+            return
+        try:
+            await connections.get("default").execute_query(
+                "SELECT pg_notify($1, payload) FROM unnest($2::text[]) AS payload",
+                [self.channel, self._payloads(events)],
+            )
+        except Exception as e:
+            # Ход сбора - не повод прерывать сам сбор
+            logger.debug("Не удалось переслать события: %r", e)
+
+    def _on_notify(self, connection, pid, channel, payload: str) -> None:
+        message = orjson.loads(payload)
+        if message.get("origin") != self.origin:
+            for event in message["events"]:
+                self._deliver(event)
+
+    async def _ensure_listener(self) -> None:
+        if not settings.events_relay_enabled or self._listener is not None:
+            return
+        async with self._listener_lock:
+            if self._listener is not None:
+                return
+            # Отдельное соединение (LISTEN удерживает его всё время)
+            # с настройками пула "default"
+            try:
+                listener = await asyncpg.connect(
+                    **connect_kwargs("default", "alan_sb-events")
+                )
+                await listener.add_listener(self.channel, self._on_notify)
+                # Соединение оборвалось - следующая подписка откроет новое
+                listener.add_termination_listener(self._on_terminated)
+            except Exception:
+                logger.exception("Не удалось подписаться на %s", self.channel)
+                return
+            self._listener = listener
+
+    def _on_terminated(self, connection) -> None:
+        if self._listener is connection:
+            self._listener = None
+
+    async def close(self) -> None:
+        """Переслать накопленные события и закрыть соединение LISTEN (при остановке)"""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        await self._flush()
+        if self._listener is not None:
+            listener, self._listener = self._listener, None
+            await listener.close()
+
+    @asynccontextmanager
+    async def subscribe(self, maxsize: int = 1000) -> AsyncIterator[asyncio.Queue]:
+        """Очередь событий на время подписки"""
+        await self._ensure_listener()
+        queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self._subscribers.add(queue)
+        try:
+            yield queue
+        finally:
+            self._subscribers.discard(queue)
+
+
+collection_events = EventBus()
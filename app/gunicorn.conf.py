@@ -0,0 +1,43 @@
+"""
+Конфигурация gunicorn для production
+
+    gunicorn main:app -c gunicorn.conf.py
+
+Приложение загружается один раз в master (preload) и наследуется воркерами
+через fork. Схема БД создаётся заранее миграциями (aerich upgrade), плановый
+сбор запускается отдельным процессом (python cli.py scheduler), а не в
+каждом воркере.
+"""
+
+import os
+import shutil
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get("WEB_CONCURRENCY", "4"))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+
+# Воркер без heartbeat дольше timeout перезапускается
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "120"))
+# SIGTERM: воркеры дорабатывают текущие запросы (и lifespan shutdown)
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = 5
+
+# Логи приложения пишет logs.setup_logging, gunicorn - только свои
+accesslog = None
+errorlog = "-"
+
+
+def on_starting(server):
+    # Метрики прошлых запусков в multiprocess-режиме prometheus_client
+    directory = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if directory:
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory, exist_ok=True)
+
+
+def child_exit(server, worker):
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,118 @@
+"""
+Учёт SQL-запросов к БД и запросов к внешним API
+
+install_query_instrumentation() оборачивает методы выполнения запросов
+клиента asyncpg Tortoise, InstrumentedTransport - транспорт httpx.
+Внутри track_queries() считаются количество и суммарное время запросов
+текущего контекста (включая задачи, созданные внутри него). Вложенные
+track_queries() считают независимо: запрос учитывается во всех.
+"""
+
+import functools
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Iterator, Optional, Tuple
+import httpx
+from tortoise.backends.asyncpg.client import AsyncpgDBClient, TransactionWrapper
+from metrics import UPSTREAM_REQUEST_SECONDS, upstream_labels
+
+_EXECUTE_METHODS = (
+    "execute_insert",
+    "execute_many",
+    "execute_query",
+    "execute_query_dict",
+)
+
+
+@dataclass(slots=True)
+class QueryStats:
+    """Статистика запросов к БД и внешним API"""
+
+    count: int = 0
+    seconds: float = 0.0
+    upstream_count: int = 0
+    upstream_seconds: float = 0.0
+    # Количество выполнений каждого SQL (None - не собирается)
+    statements: Optional[Counter] = None
+
+
+_current_stats: ContextVar[Tuple[QueryStats, ...]] = ContextVar(
+    "query_stats", default=()
+)
+_installed = False
+
+
+def _instrument(method):
+    @functools.wraps(method)
+    async def wrapper(self, query, *args, **kwargs):
+        active = _current_stats.get()
+        if not active:
+            return await method(self, query, *args, **kwargs)
+
+        started = time.perf_counter()
+        try:
+            return await method(self, query, *args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - started
+            for stats in active:
+                stats.count += 1
+                stats.seconds += elapsed
+                if stats.statements is not None:
+                    stats.statements[query] += 1
+
+    return wrapper
+
+
+def install_query_instrumentation() -> None:
+    """Включить учёт запросов (повторный вызов ничего не делает)"""
+    global _installed
+    if _installed:
+        return
+
+    for client_class in (AsyncpgDBClient, TransactionWrapper):
+        for name in _EXECUTE_METHODS:
+            # Оборачиваем только методы, определённые в самом классе
+            if name in vars(client_class):
+                setattr(client_class, name, _instrument(vars(client_class)[name]))
+    _installed = True
+
+
+class InstrumentedTransport(httpx.AsyncBaseTransport):
+    """Транспорт httpx, учитывающий время запросов к внешним API (и в метриках)"""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self._transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        status = "error"
+        started = time.perf_counter()
+        try:
+            response = await self._transport.handle_async_request(request)
+            status = str(response.status_code)
+            return response
+        finally:
+            elapsed = time.perf_counter() - started
+            provider, endpoint = upstream_labels(request.url)
+            UPSTREAM_REQUEST_SECONDS.labels(provider, endpoint, status).observe(elapsed)
+
+            for stats in _current_stats.get():
+                stats.upstream_count += 1
+                stats.upstream_seconds += elapsed
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+@contextmanager
+def track_queries(statements: bool = False) -> Iterator[QueryStats]:
+    """Считать запросы внутри блока (statements=True - и по каждому SQL)"""
+    install_query_instrumentation()
+    stats = QueryStats(statements=Counter() if statements else None)
+    token = _current_stats.set(_current_stats.get() + (stats,))
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
@@ -0,0 +1,141 @@
+"""
+Логирование приложения
+
+- Записи ставятся в очередь (QueueHandler), а форматирование и запись в
+  stdout выполняет фоновый поток (QueueListener) - event loop не ждёт вывод.
+- LOG_FORMAT=json - одна JSON-строка на запись, text - читаемый формат.
+- correlation_id: id HTTP-запроса или задачи сбора, добавляется ко всем
+  записям, сделанным внутри bind_correlation_id (включая дочерние задачи).
+- Частые события (на каждую запись/файл) логируются с extra={"sample_rate": 0.01}
+  и пропускаются фильтром с соответствующей вероятностью до постановки в очередь.
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Iterator, Optional
+from config import settings
+
+_correlation_id: ContextVar[Optional[str]] = ContextVar("correlation_id", default=None)
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional[QueueHandler] = None
+
+# Стандартные атрибуты LogRecord - всё остальное считается полями из extra
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+def get_correlation_id() -> Optional[str]:
+    return _correlation_id.get()
+
+
+@contextmanager
+def bind_correlation_id(value: Optional[str] = None) -> Iterator[str]:
+    """Привязать correlation_id к текущему контексту (по умолчанию - новый)"""
+    value = value or uuid.uuid4().hex[:12]
+    token = _correlation_id.set(value)
+    try:
+        yield value
+    finally:
+        _correlation_id.reset(token)
+
+
+class ContextFilter(logging.Filter):
+    """Добавляет correlation_id и отбрасывает часть сэмплируемых записей"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        sample_rate = getattr(record, "sample_rate", None)
+        if sample_rate is not None and random.random() >= sample_rate:
+            return False
+        record.correlation_id = _correlation_id.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """Одна JSON-строка на запись, поля из extra - на верхнем уровне"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and value is not None:
+                payload[key] = value
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__(
+            "%(asctime)s %(levelname)s %(name)s [%(correlation_id)s] %(message)s"
+        )
+
+    def format(self, record: logging.LogRecord) -> str:
+        if getattr(record, "correlation_id", None) is None:
+            record.correlation_id = "-"
+        return super().format(record)
+
+
+def setup_logging() -> None:
+    """Настроить корневой логгер (повторный вызов ничего не делает)"""
+    global _listener, _queue_handler
+    if _listener is not None:
+        return
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(
+        JsonFormatter() if settings.log_format == "json" else TextFormatter()
+    )
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    _queue_handler = QueueHandler(log_queue)
+    _queue_handler.addFilter(ContextFilter())
+
+    root = logging.getLogger()
+    root.setLevel(settings.log_level.upper())
+    root.addHandler(_queue_handler)
+
+    # httpx пишет INFO на каждый запрос, Tortoise в DEBUG - каждый SQL
+    for name in ("httpx", "httpcore"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+    logging.getLogger("tortoise").setLevel(
+        max(root.level, logging.INFO)
+    )
+
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_stop_listener)
+
+
+def _stop_listener() -> None:
+    if _listener is not None:
+        _listener.stop()
+
+
+def _restart_after_fork() -> None:
+    """Поток записи не переживает fork (gunicorn --preload) - запускаем заново"""
+    global _listener
+    if _listener is None:
+        return
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    _queue_handler.queue = log_queue
+    _listener = QueueListener(
+        log_queue, *_listener.handlers, respect_handler_level=True
+    )
+    _listener.start()
+
+
+os.register_at_fork(after_in_child=_restart_after_fork)
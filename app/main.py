@@ -1,7 +1,9 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from tortoise.contrib.fastapi import register_tortoise
-from config import TORTOISE_ORM
+from tortoise.contrib.fastapi import RegisterTortoise
+from config import TORTOISE_ORM, settings
 from api.authors import router as authors_router
 from api.social_accounts import router as social_accounts_router
 from api.collect import router as collect_router
@@ -9,19 +11,53 @@ from api.analytics import router as analytics_router
 from api.telegram_analytics import router as telegram_analytics_router
 from api.telegram_reports import router as telegram_reports_router
 from api.reports import router as reports_router
+from services.base import close_http_client
+from services.scheduler import CollectionScheduler
+from middleware.admission import AdmissionMiddleware
+from middleware.compression import CompressionMiddleware
+from middleware.metrics import MetricsMiddleware
+from middleware.request_id import RequestIdMiddleware
+from middleware.profiling import ProfilingMiddleware
+from metrics import render_metrics
+from etag import NotModified, not_modified_handler
+from events import collection_events
+from logs import setup_logging
+
+setup_logging()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Подключение к БД, плановый сбор и общий пул HTTP-соединений"""
+    async with orm:
+        scheduler = CollectionScheduler() if settings.scheduler_enabled else None
+        if scheduler:
+            scheduler.start()
+        try:
+            yield
+        finally:
+            if scheduler:
+                await scheduler.stop()
+            await close_http_client()
+            await collection_events.close()
 
 
 app = FastAPI(
     title="TikTok Analytics API",
     description="Сервис сбора данных авторов из TikTok",
     version="1.0.0",
+    lifespan=lifespan,
+    # orjson сериализует вложенную аналитику в разы быстрее стандартного json
+    default_response_class=ORJSONResponse,
 )
-register_tortoise(
+# Обработчики ошибок ORM регистрируются сразу, подключение - в lifespan
+orm = RegisterTortoise(
     app,
     config=TORTOISE_ORM,
-    generate_schemas=True,  #
+    generate_schemas=settings.db_generate_schemas,  # Схема - миграциями aerich
     add_exception_handlers=True,
 )
+app.add_exception_handler(NotModified, not_modified_handler)
 # CORS
 app.add_middleware(
     CORSMiddleware,
@@ -30,6 +66,14 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Сжатие JSON-ответов (внутри профилирования - его время входит в total)
+app.add_middleware(CompressionMiddleware)
+# Server-Timing, учёт SQL и профили медленных запросов
+app.add_middleware(ProfilingMiddleware)
+# Очереди и лимиты сборов, отчётов и аналитики (503/429 попадают в метрики)
+app.add_middleware(AdmissionMiddleware)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(RequestIdMiddleware)
 
 
 # Подключаем роутеры
@@ -48,6 +92,13 @@ async def root():
     return {"message": "TikTok Analytics API", "version": "1.0.0", "docs": "/docs"}
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Метрики в формате Prometheus"""
+    body, content_type = render_metrics()
+    return Response(body, media_type=content_type)
+
+
 @app.get("/health")
 async def health():
     """Проверка здоровья сервиса"""
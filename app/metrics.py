@@ -0,0 +1,172 @@
+"""
+Метрики Prometheus (эндпоинт /metrics)
+
+При запуске в нескольких процессах (gunicorn) задайте
+PROMETHEUS_MULTIPROC_DIR - метрики всех воркеров будут собираться оттуда.
+"""
+
+import os
+from typing import Tuple
+from urllib.parse import urlsplit
+import httpx
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client.core import GaugeMetricFamily
+from config import settings
+
+# Сборщики
+
+UPSTREAM_REQUEST_SECONDS = Histogram(
+    "upstream_request_duration_seconds",
+    "Длительность запросов к внешним API",
+    ["provider", "endpoint", "status"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120),
+)
+COLLECTION_SECONDS = Histogram(
+    "collection_duration_seconds",
+    "Длительность сбора аккаунта",
+    ["platform", "status"],
+    buckets=(1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600),
+)
+COLLECTION_PAGES = Histogram(
+    "collection_pages",
+    "Страниц записей за сбор",
+    ["platform"],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200, 500),
+)
+COLLECTION_POSTS = Histogram(
+    "collection_posts",
+    "Записей за сбор",
+    ["platform"],
+    buckets=(0, 10, 50, 100, 250, 500, 1000, 2500, 5000, 10000),
+)
+COLLECTION_MEDIA = Histogram(
+    "collection_media_files",
+    "Скачанных медиафайлов за сбор",
+    ["platform"],
+    buckets=(0, 10, 50, 100, 250, 500, 1000, 2500, 5000, 10000),
+)
+COLLECTION_LOCK_WAIT_SECONDS = Histogram(
+    "collection_lock_wait_seconds",
+    "Ожидание блокировки сбора аккаунта",
+    ["platform", "outcome"],  # acquired - получена, skipped - сбор уже идёт
+    buckets=(0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 15, 60, 300),
+)
+COLLECTION_JOBS = Counter(
+    "collection_jobs",
+    "Завершённые попытки задач очереди сбора",
+    ["outcome"],  # done, retried, postponed, dead
+)
+MEDIA_DOWNLOAD_BYTES = Counter(
+    "media_download_bytes", "Объём скачанных медиафайлов"
+)
+MEDIA_DOWNLOAD_FAILURES = Counter(
+    "media_download_failures", "Неудачные скачивания медиа", ["reason"]
+)
+
+# API
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "Длительность запросов к API по эндпоинтам",
+    ["method", "route", "status"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+REPORT_RENDER_SECONDS = Histogram(
+    "report_render_duration_seconds",
+    "Длительность формирования файла отчёта",
+    ["format"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120),
+)
+
+ADMISSION_WAIT_SECONDS = Histogram(
+    "admission_wait_seconds",
+    "Ожидание места в очереди класса запросов",
+    ["workload"],
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30),
+)
+ADMISSION_DROPPED = Counter(
+    "admission_dropped",
+    "Отклонённые и отменённые запросы",
+    # queue_full, queue_timeout, client_limit, disconnected
+    ["workload", "reason"],
+)
+
+SINGLEFLIGHT_SHARED = Counter(
+    "singleflight_shared",
+    "Вызовов, получивших результат уже выполнявшейся одинаковой задачи",
+    ["name"],
+)
+
+
+def _host(url: str) -> str:
+    return urlsplit(url).netloc
+
+
+def upstream_labels(url: httpx.URL) -> Tuple[str, str]:
+    """Провайдер и эндпоинт запроса (медиа - одной меткой, без пути)"""
+    host = url.netloc.decode()
+    if host == _host(settings.scrapecreators_api_url):
+        return "scrapecreators", url.path
+    if host == _host(settings.tgstat_api_url):
+        return "tgstat", url.path
+    return "media", "download"
+
+
+class DBPoolCollector:
+    """Размер и занятость пулов соединений Tortoise на момент запроса /metrics"""
+
+    def collect(self):
+        from tortoise import connections
+
+        size = GaugeMetricFamily(
+            "db_pool_size", "Открытых соединений пула", labels=["connection"]
+        )
+        idle = GaugeMetricFamily(
+            "db_pool_idle", "Свободных соединений пула", labels=["connection"]
+        )
+        max_size = GaugeMetricFamily(
+            "db_pool_max_size", "Максимум соединений пула", labels=["connection"]
+        )
+        try:
+            clients = connections.all()
+        except Exception:
+            # ORM ещё не инициализирована
+            clients = []
+
+        for client in clients:
+            pool = getattr(client, "_pool", None)
+            if pool is None:
+                continue
+            name = client.connection_name
+            size.add_metric([name], pool.get_size())
+            idle.add_metric([name], pool.get_idle_size())
+            max_size.add_metric([name], pool.get_max_size())
+
+        yield size
+        yield idle
+        yield max_size
+
+
+_db_pool_collector = DBPoolCollector()
+REGISTRY.register(_db_pool_collector)
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Текст метрик в формате Prometheus"""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        # Пул соединений - только процесса, ответившего на запрос
+        registry.register(_db_pool_collector)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
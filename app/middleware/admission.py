@@ -0,0 +1,250 @@
+"""
+Контроль нагрузки: очереди ограниченной длины по классам запросов
+
+Запросы сбора, формирования отчётов и аналитики выполняются не больше
+N одновременно на процесс (ADMISSION_<КЛАСС>_CONCURRENCY), остальные ждут
+в очереди длиной ADMISSION_<КЛАСС>_QUEUE не дольше
+ADMISSION_QUEUE_TIMEOUT_SECONDS. Полная очередь или истёкшее ожидание -
+503 с Retry-After; клиент, у которого уже ADMISSION_PER_CLIENT_LIMIT
+запросов класса, - 429 с Retry-After. Остальные запросы (CRUD, метрики,
+SSE) не ограничиваются.
+
+Если клиент отключился, не дождавшись отчёта или аналитики, обработка
+запроса отменяется и место освобождается для следующего. Формирование
+файла в потоке (run_in_thread) не прерывается: место освобождается,
+только когда поток закончит.
+
+Клиент - адрес соединения; X-Real-IP (его выставляет frontend/nginx.conf)
+учитывается только от прокси из ADMISSION_TRUSTED_PROXIES.
+"""
+
+import asyncio
+import ipaddress
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import AsyncIterator, Callable, List, Optional, Tuple, TypeVar
+from fastapi.responses import ORJSONResponse
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from config import settings
+from metrics import ADMISSION_DROPPED, ADMISSION_WAIT_SECONDS
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class Rejected(Exception):
+    def __init__(self, status_code: int, reason: str, detail: str):
+        self.status_code = status_code
+        self.reason = reason
+        self.detail = detail
+
+
+class Workload:
+    """Класс запросов: ограничение одновременных, очередь и лимит на клиента"""
+
+    def __init__(
+        self,
+        name: str,
+        concurrency: int,
+        queue_size: int,
+        per_client: int,
+        cancel_on_disconnect: bool,
+    ):
+        self.name = name
+        self.queue_size = queue_size
+        self.per_client = per_client
+        self.cancel_on_disconnect = cancel_on_disconnect
+        self._slots = asyncio.Semaphore(concurrency)
+        self._waiting = 0
+        self._clients: Counter = Counter()
+
+    @asynccontextmanager
+    async def admit(self, client: str) -> AsyncIterator[None]:
+        """Дождаться места или Rejected"""
+        if self._clients[client] >= self.per_client:
+            raise Rejected(429, "client_limit", "Too many concurrent requests")
+        if self._slots.locked() and self._waiting >= self.queue_size:
+            raise Rejected(503, "queue_full", "Server is busy")
+
+        self._clients[client] += 1
+        try:
+            started = time.perf_counter()
+            self._waiting += 1
+            try:
+                await asyncio.wait_for(
+                    self._slots.acquire(), settings.admission_queue_timeout_seconds
+                )
+            except asyncio.TimeoutError:
+                raise Rejected(503, "queue_timeout", "Server is busy") from None
+            finally:
+                self._waiting -= 1
+            ADMISSION_WAIT_SECONDS.labels(self.name).observe(time.perf_counter() - started)
+
+            try:
+                yield
+            finally:
+                self._slots.release()
+        finally:
+            self._clients[client] -= 1
+            if not self._clients[client]:
+                del self._clients[client]
+
+
+@dataclass(slots=True)
+class _Route:
+    pattern: re.Pattern
+    methods: Optional[frozenset]
+    workload: Workload
+
+
+async def run_in_thread(func: Callable[..., T], *args) -> T:
+    """
+    asyncio.to_thread, который при отмене дожидается потока
+
+    Поток нельзя прервать: если отпустить отменённый обработчик сразу,
+    место в очереди освободится, а формирование продолжится, и потоков
+    станет больше ADMISSION_<КЛАСС>_CONCURRENCY.
+    """
+    future = asyncio.ensure_future(asyncio.to_thread(func, *args))
+    try:
+        return await asyncio.shield(future)
+    except asyncio.CancelledError:
+        await asyncio.wait([future])
+        if future.exception() is not None:
+            logger.warning("Ошибка в потоке отменённого запроса: %r", future.exception())
+        raise
+
+
+@lru_cache(maxsize=1)
+def _trusted_proxies(proxies: Tuple[str, ...]) -> tuple:
+    return tuple(ipaddress.ip_network(proxy, strict=False) for proxy in proxies)
+
+
+def _is_trusted_proxy(host: str) -> bool:
+    networks = _trusted_proxies(tuple(settings.admission_trusted_proxies))
+    if not networks:
+        return False
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return any(address in network for network in networks)
+
+
+def _client_key(scope: Scope) -> str:
+    """Адрес клиента (от доверенного прокси - из X-Real-IP)"""
+    client = scope.get("client")
+    host = client[0] if client else "unknown"
+    if _is_trusted_proxy(host):
+        real_ip = Headers(scope=scope).get("x-real-ip", "").strip()
+        if real_ip:
+            return real_ip
+    return host
+
+
+def default_routes() -> List[_Route]:
+    """Классы запросов по настройкам"""
+    collection = Workload(
+        "collection",
+        settings.admission_collection_concurrency,
+        settings.admission_collection_queue,
+        settings.admission_per_client_limit,
+        # Сбор доводится до конца: уже потраченные кредиты не пропадут
+        cancel_on_disconnect=False,
+    )
+    report = Workload(
+        "report",
+        settings.admission_report_concurrency,
+        settings.admission_report_queue,
+        settings.admission_per_client_limit,
+        cancel_on_disconnect=True,
+    )
+    analytics = Workload(
+        "analytics",
+        settings.admission_analytics_concurrency,
+        settings.admission_analytics_queue,
+        settings.admission_per_client_limit,
+        cancel_on_disconnect=True,
+    )
+    return [
+        _Route(
+            re.compile(r"^/api/collect/(tiktok|youtube|instagram|telegram)/"),
+            frozenset({"POST"}),
+            collection,
+        ),
+        _Route(re.compile(r"^/api/(reports|telegram-reports)/"), None, report),
+        _Route(re.compile(r"^/api/(analytics|telegram-analytics)/"), None, analytics),
+    ]
+
+
+class AdmissionMiddleware:
+    def __init__(self, app: ASGIApp, routes: Optional[List[_Route]] = None):
+        self.app = app
+        self.routes = default_routes() if routes is None else routes
+
+    def _workload(self, scope: Scope) -> Optional[Workload]:
+        for route in self.routes:
+            if route.methods is not None and scope["method"] not in route.methods:
+                continue
+            if route.pattern.match(scope["path"]):
+                return route.workload
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        workload = None
+        if scope["type"] == "http" and settings.admission_enabled:
+            workload = self._workload(scope)
+        if workload is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            async with workload.admit(_client_key(scope)):
+                if workload.cancel_on_disconnect:
+                    await self._run_cancellable(workload, scope, receive, send)
+                else:
+                    await self.app(scope, receive, send)
+        except Rejected as e:
+            ADMISSION_DROPPED.labels(workload.name, e.reason).inc()
+            response = ORJSONResponse(
+                {"detail": e.detail},
+                status_code=e.status_code,
+                headers={"Retry-After": str(settings.admission_retry_after_seconds)},
+            )
+            await response(scope, receive, send)
+
+    async def _run_cancellable(
+        self, workload: Workload, scope: Scope, receive: Receive, send: Send
+    ) -> None:
+        """Выполнить запрос, отменив его при http.disconnect"""
+        # Сообщения клиента читает только pump и передаёт приложению через очередь
+        messages: asyncio.Queue = asyncio.Queue()
+        app_task = asyncio.ensure_future(self.app(scope, messages.get, send))
+
+        async def pump() -> None:
+            while True:
+                message: Message = await receive()
+                messages.put_nowait(message)
+                if message["type"] == "http.disconnect":
+                    app_task.cancel()
+                    return
+
+        pump_task = asyncio.ensure_future(pump())
+        try:
+            await app_task
+        except asyncio.CancelledError:
+            if not pump_task.done() or pump_task.cancelled():
+                # Отменили сам обработчик (остановка сервера), а не клиент
+                raise
+            scope["client_disconnected"] = True
+            ADMISSION_DROPPED.labels(workload.name, "disconnected").inc()
+            logger.info("Клиент отключился, обработка %s отменена", scope["path"])
+        finally:
+            pump_task.cancel()
@@ -0,0 +1,42 @@
+"""
+Длительность запросов API по эндпоинтам для метрик Prometheus
+"""
+
+import time
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from metrics import HTTP_REQUEST_SECONDS
+
+
+class MetricsMiddleware:
+    """ASGI-middleware: http_request_duration_seconds по шаблону маршрута"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = "500"
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # Клиент ушёл, ответа не было (обозначение как в nginx)
+            if scope.get("client_disconnected"):
+                status = "499"
+            # Шаблон пути (/api/analytics/{social_account_id}), а не сам путь
+            route = scope.get("route")
+            HTTP_REQUEST_SECONDS.labels(
+                scope["method"],
+                getattr(route, "path", "unmatched"),
+                status,
+            ).observe(time.perf_counter() - started)
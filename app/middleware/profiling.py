@@ -0,0 +1,161 @@
+"""
+Профилирование запросов API
+
+Для каждого HTTP-запроса считаются общее время, время и количество
+SQL-запросов, время запросов к внешним API и процессорное время. Значения
+отдаются в заголовке Server-Timing (видно во вкладке Network браузера):
+
+    Server-Timing: total;dur=812.4, db;dur=401.3;desc="534 queries",
+                   upstream;dur=0.0;desc="0 requests", cpu;dur=410.2
+
+Если один и тот же SQL (с точностью до значений) выполнен за запрос не меньше
+profiling_n_plus_one_threshold раз, в лог пишется предупреждение N+1.
+
+Доля profiling_sample_rate запросов выполняется под cProfile; профиль
+сохраняется в profiling_dir, только если запрос оказался медленным.
+cProfile и процессорное время учитывают весь процесс, поэтому при
+параллельных запросах включают и чужую работу.
+"""
+
+import cProfile
+import logging
+import random
+import re
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from config import settings
+from instrumentation import QueryStats, track_queries
+
+logger = logging.getLogger(__name__)
+
+# Одновременно может работать только один cProfile
+_profiler_active = False
+
+# Потоки SSE открыты минутами - не профилируются
+_STREAMING_PATHS = {"/api/collect/events"}
+
+# Литералы в SQL (Tortoise подставляет значения фильтров в текст запроса)
+_SQL_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_SQL_LISTS = re.compile(r"\(\?(?:\s*,\s*\?)+\)")
+
+
+class ProfilingMiddleware:
+    """ASGI-middleware профилирования запросов"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or not settings.profiling_enabled
+            or scope["path"] in _STREAMING_PATHS
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        profiler = _start_profiler()
+        started = time.perf_counter()
+        cpu_started = time.process_time()
+
+        with track_queries(statements=True) as stats:
+
+            async def send_with_timing(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    headers = MutableHeaders(scope=message)
+                    headers.append(
+                        "Server-Timing",
+                        _server_timing(
+                            stats,
+                            time.perf_counter() - started,
+                            time.process_time() - cpu_started,
+                        ),
+                    )
+                    headers.append("Timing-Allow-Origin", "*")
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_timing)
+            finally:
+                elapsed = time.perf_counter() - started
+                _report_n_plus_one(scope, stats)
+                _finish_profiler(profiler, scope, elapsed)
+
+
+def _server_timing(stats: QueryStats, elapsed: float, cpu: float) -> str:
+    return ", ".join(
+        [
+            f"total;dur={elapsed * 1000:.1f}",
+            f'db;dur={stats.seconds * 1000:.1f};desc="{stats.count} queries"',
+            f'upstream;dur={stats.upstream_seconds * 1000:.1f};desc="{stats.upstream_count} requests"',
+            f"cpu;dur={cpu * 1000:.1f}",
+        ]
+    )
+
+
+def _report_n_plus_one(scope: Scope, stats: QueryStats) -> None:
+    """Предупредить о SQL, повторённых за запрос подозрительно много раз"""
+    threshold = settings.profiling_n_plus_one_threshold
+    if stats.count < threshold:
+        return
+
+    # Запросы, отличающиеся только значениями, считаются одним
+    patterns = Counter()
+    for statement, count in stats.statements.items():
+        pattern = _SQL_LISTS.sub("(...)", _SQL_LITERALS.sub("?", statement))
+        patterns[" ".join(pattern.split())] += count
+
+    for statement, count in patterns.most_common():
+        if count < threshold:
+            break
+        logger.warning(
+            "Возможный N+1: %s %s - %s раз: %s",
+            scope["method"],
+            scope["path"],
+            count,
+            statement[:200],
+        )
+
+
+def _start_profiler() -> Optional[cProfile.Profile]:
+    """Включить cProfile для доли запросов (если он ещё не занят)"""
+    global _profiler_active
+    if _profiler_active or random.random() >= settings.profiling_sample_rate:
+        return None
+
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Профилировщик уже включён кем-то ещё
+        return None
+    _profiler_active = True
+    return profiler
+
+
+def _finish_profiler(
+    profiler: Optional[cProfile.Profile], scope: Scope, elapsed: float
+) -> None:
+    """Выключить cProfile и сохранить профиль медленного запроса"""
+    global _profiler_active
+    if profiler is None:
+        return
+
+    profiler.disable()
+    _profiler_active = False
+    if elapsed * 1000 < settings.profiling_slow_request_ms:
+        return
+
+    profiles_dir = Path(settings.profiling_dir)
+    profiles_dir.mkdir(parents=True, exist_ok=True)
+    name = scope["path"].strip("/").replace("/", "_") or "root"
+    path = profiles_dir / (
+        f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{scope['method']}_{name}_{elapsed * 1000:.0f}ms.prof"
+    )
+    profiler.dump_stats(path)
+    logger.warning("Медленный запрос %s %s: %s", scope["method"], scope["path"], path)
@@ -0,0 +1,35 @@
+"""
+Correlation id HTTP-запроса: из заголовка X-Request-ID или новый
+
+Id привязывается ко всем записям лога запроса и возвращается в ответе.
+"""
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from logs import bind_correlation_id
+
+REQUEST_ID_HEADER = "X-Request-ID"
+
+
+class RequestIdMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # Длинные и произвольные значения извне не принимаем
+        request_id = Headers(scope=scope).get(REQUEST_ID_HEADER, "")[:64] or None
+
+        with bind_correlation_id(request_id) as correlation_id:
+
+            async def send_with_request_id(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    MutableHeaders(scope=message).append(
+                        REQUEST_ID_HEADER, correlation_id
+                    )
+                await send(message)
+
+            await self.app(scope, receive, send_with_request_id)
@@ -0,0 +1,120 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        CREATE TABLE IF NOT EXISTS "authors" (
+    "id" SERIAL NOT NULL PRIMARY KEY,
+    "name" TEXT NOT NULL,
+    "created_at" TIMESTAMPTZ NOT NULL  DEFAULT CURRENT_TIMESTAMP,
+    "updated_at" TIMESTAMPTZ NOT NULL  DEFAULT CURRENT_TIMESTAMP
+);
+COMMENT ON TABLE "authors" IS 'Автор холдинга';
+CREATE TABLE IF NOT EXISTS "social_accounts" (
+    "id" SERIAL NOT NULL PRIMARY KEY,
+    "platform" TEXT NOT NULL,
+    "platform_user_id" TEXT NOT NULL,
+    "username" TEXT,
+    "profile_url" TEXT,
+    "is_active" BOOL NOT NULL  DEFAULT True,
+    "created_at" TIMESTAMPTZ NOT NULL  DEFAULT CURRENT_TIMESTAMP,
+    "updated_at" TIMESTAMPTZ NOT NULL  DEFAULT CURRENT_TIMESTAMP,
+    "author_id" INT NOT NULL REFERENCES "authors" ("id") ON DELETE CASCADE,
+    CONSTRAINT "uid_social_acco_platfor_b8ca5f" UNIQUE ("platform", "platform_user_id")
+);
+COMMENT ON TABLE "social_accounts" IS 'Аккаунт автора в социальной сети';
+CREATE TABLE IF NOT EXISTS "collection_schedules" (
+    "id" SERIAL NOT NULL PRIMARY KEY,
+    "last_fresh_run_at" TIMESTAMPTZ,
+    "last_full_run_at" TIMESTAMPTZ,
+    "views_velocity" DOUBLE PRECISION NOT NULL  DEFAULT 0,
+    "last_credits_used" INT NOT NULL  DEFAULT 0,
+    "last_error" TEXT,
+    "updated_at" TIMESTAMPTZ NOT NULL  DEFAULT CURRENT_TIMESTAMP,
+    "social_account_id" INT NOT NULL UNIQUE REFERENCES "social_accounts" ("id") ON DELETE CASCADE
+);
+COMMENT ON TABLE "collection_schedules" IS 'Состояние планового обновления аккаунта';
+CREATE TABLE IF NOT EXISTS "credit_ledger" (
+    "id" SERIAL NOT NULL PRIMARY KEY,
+    "platform" TEXT NOT NULL,
+    "endpoint" TEXT NOT NULL,
+    "credits" INT NOT NULL  DEFAULT 1,
+    "credits_remaining" INT,
+    "created_at" TIMESTAMPTZ NOT NULL  DEFAULT CURRENT_TIMESTAMP,
+    "social_account_id" INT REFERENCES "social_accounts" ("id") ON DELETE CASCADE
+);
+CREATE INDEX IF NOT EXISTS "idx_credit_ledg_platfor_749291" ON "credit_ledger" ("platform", "created_at");
+COMMENT ON TABLE "credit_ledger" IS 'Расход кредитов ScrapeCreators: одна строка на запрос к API';
+CREATE TABLE IF NOT EXISTS "profile_snapshots" (
+    "id" SERIAL NOT NULL PRIMARY KEY,
+    "snapshot_date" TIMESTAMPTZ NOT NULL  DEFAULT CURRENT_TIMESTAMP,
+    "followers_count" INT NOT NULL  DEFAULT 0,
+    "following_count" INT   DEFAULT 0,
+    "total_likes" BIGINT   DEFAULT 0,
+    "total_posts" INT   DEFAULT 0,
+    "avatar_url" TEXT,
+    "extra_data" JSONB NOT NULL,
+    "created_at" TIMESTAMPTZ NOT NULL  DEFAULT CURRENT_TIMESTAMP,
+    "social_account_id" INT NOT NULL REFERENCES "social_accounts" ("id") ON DELETE CASCADE
+);
+CREATE INDEX IF NOT EXISTS "idx_profile_sna_social__233913" ON "profile_snapshots" ("social_account_id", "snapshot_date");
+COMMENT ON TABLE "profile_snapshots" IS 'Снимок профиля на определенную дату';
+CREATE TABLE IF NOT EXISTS "raw_responses" (
+    "id" SERIAL NOT NULL PRIMARY KEY,
+    "platform" TEXT NOT NULL,
+    "content_hash" VARCHAR(64) NOT NULL,
+    "items_count" INT NOT NULL  DEFAULT 0,
+    "size_bytes" INT NOT NULL  DEFAULT 0,
+    "fetched_at" TIMESTAMPTZ NOT NULL  DEFAULT CURRENT_TIMESTAMP,
+    "social_account_id" INT NOT NULL REFERENCES "social_accounts" ("id") ON DELETE CASCADE
+);
+CREATE INDEX IF NOT EXISTS "idx_raw_respons_social__b29b6c" ON "raw_responses" ("social_account_id", "fetched_at");
+COMMENT ON TABLE "raw_responses" IS 'Архивная страница ответа API платформы (файл в ARCHIVE_ROOT)';
+CREATE TABLE IF NOT EXISTS "videos" (
+    "id" SERIAL NOT NULL PRIMARY KEY,
+    "platform_video_id" VARCHAR(1024) NOT NULL UNIQUE,
+    "platform_author_id" TEXT NOT NULL,
+    "description" TEXT,
+    "created_at_platform" TIMESTAMPTZ NOT NULL,
+    "video_url" TEXT,
+    "share_url" TEXT,
+    "cover_url" TEXT,
+    "thumbnail_url" TEXT,
+    "duration_ms" INT,
+    "views_count" BIGINT NOT NULL  DEFAULT 0,
+    "likes_count" BIGINT NOT NULL  DEFAULT 0,
+    "comments_count" INT NOT NULL  DEFAULT 0,
+    "shares_count" INT NOT NULL  DEFAULT 0,
+    "saves_count" INT   DEFAULT 0,
+    "extra_data" JSONB NOT NULL,
+    "last_updated" TIMESTAMPTZ NOT NULL  DEFAULT CURRENT_TIMESTAMP,
+    "created_at" TIMESTAMPTZ NOT NULL  DEFAULT CURRENT_TIMESTAMP,
+    "social_account_id" INT NOT NULL REFERENCES "social_accounts" ("id") ON DELETE CASCADE
+);
+CREATE INDEX IF NOT EXISTS "idx_videos_social__3c1055" ON "videos" ("social_account_id", "created_at_platform");
+CREATE INDEX IF NOT EXISTS "idx_videos_platfor_ac5fa7" ON "videos" ("platform_video_id");
+COMMENT ON TABLE "videos" IS 'Видео/пост из социальной сети';
+CREATE TABLE IF NOT EXISTS "video_metrics_history" (
+    "id" SERIAL NOT NULL PRIMARY KEY,
+    "snapshot_date" TIMESTAMPTZ NOT NULL  DEFAULT CURRENT_TIMESTAMP,
+    "views_count" BIGINT NOT NULL  DEFAULT 0,
+    "likes_count" BIGINT NOT NULL  DEFAULT 0,
+    "comments_count" INT NOT NULL  DEFAULT 0,
+    "shares_count" INT NOT NULL  DEFAULT 0,
+    "saves_count" INT   DEFAULT 0,
+    "created_at" TIMESTAMPTZ NOT NULL  DEFAULT CURRENT_TIMESTAMP,
+    "video_id" INT NOT NULL REFERENCES "videos" ("id") ON DELETE CASCADE
+);
+CREATE INDEX IF NOT EXISTS "idx_video_metri_video_i_7eeb13" ON "video_metrics_history" ("video_id", "snapshot_date");
+COMMENT ON TABLE "video_metrics_history" IS 'История изменения метрик видео';
+CREATE TABLE IF NOT EXISTS "aerich" (
+    "id" SERIAL NOT NULL PRIMARY KEY,
+    "version" VARCHAR(255) NOT NULL,
+    "app" VARCHAR(100) NOT NULL,
+    "content" JSONB NOT NULL
+);"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        """
@@ -0,0 +1,31 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        CREATE TABLE IF NOT EXISTS "collection_jobs" (
+    "id" SERIAL NOT NULL PRIMARY KEY,
+    "start_date" TIMESTAMPTZ,
+    "end_date" TIMESTAMPTZ,
+    "max_credits" INT,
+    "status" VARCHAR(16) NOT NULL  DEFAULT 'queued',
+    "priority" INT NOT NULL  DEFAULT 0,
+    "available_at" TIMESTAMPTZ NOT NULL  DEFAULT CURRENT_TIMESTAMP,
+    "attempts" INT NOT NULL  DEFAULT 0,
+    "max_attempts" INT NOT NULL  DEFAULT 5,
+    "locked_by" VARCHAR(128),
+    "locked_until" TIMESTAMPTZ,
+    "last_error" TEXT,
+    "result" JSONB,
+    "created_at" TIMESTAMPTZ NOT NULL  DEFAULT CURRENT_TIMESTAMP,
+    "updated_at" TIMESTAMPTZ NOT NULL  DEFAULT CURRENT_TIMESTAMP,
+    "finished_at" TIMESTAMPTZ,
+    "social_account_id" INT NOT NULL REFERENCES "social_accounts" ("id") ON DELETE CASCADE
+);
+CREATE INDEX IF NOT EXISTS "idx_collection__status_c1f179" ON "collection_jobs" ("status", "priority", "available_at");
+COMMENT ON TABLE "collection_jobs" IS 'Задача сбора аккаунта в общей очереди (см. services/jobs.py, cli.py worker)';"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP TABLE IF EXISTS "collection_jobs";"""
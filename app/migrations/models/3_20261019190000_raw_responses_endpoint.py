@@ -0,0 +1,13 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE "raw_responses" ADD COLUMN IF NOT EXISTS "endpoint" TEXT;
+COMMENT ON TABLE "raw_responses" IS 'Архивный ответ API платформы (файл в ARCHIVE_ROOT)';"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE "raw_responses" DROP COLUMN IF EXISTS "endpoint";
+COMMENT ON TABLE "raw_responses" IS 'Архивная страница ответа API платформы (файл в ARCHIVE_ROOT)';"""
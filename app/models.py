@@ -2,6 +2,30 @@ from tortoise import fields
 from tortoise.models import Model
 
 
+class RawJSON(str):
+    """Готовый JSON (например, исходный JSON записи ответа API)"""
+
+
+class RawJSONField(fields.JSONField):
+    """
+    JSONField, который пишет RawJSON как есть
+
+    Стандартный JSONField разбирает строку в словари при создании модели и
+    сериализует обратно при записи; RawJSON уходит в JSONB без этого
+    (корректность JSON проверяет Postgres при приведении к jsonb).
+    """
+
+    def to_python_value(self, value):
+        if isinstance(value, RawJSON):
+            return value
+        return super().to_python_value(value)
+
+    def to_db_value(self, value, instance):
+        if isinstance(value, RawJSON):
+            return value
+        return super().to_db_value(value, instance)
+
+
 class Author(Model):
     """Автор холдинга"""
 
@@ -70,7 +94,7 @@ class ProfileSnapshot(Model):
     avatar_url = fields.TextField(null=True)
 
     # Дополнительные данные (JSON)
-    extra_data = fields.JSONField(default=dict)
+    extra_data = RawJSONField(default=dict)
 
     created_at = fields.DatetimeField(auto_now_add=True)
 
@@ -112,7 +136,7 @@ class Video(Model):
     saves_count = fields.IntField(default=0, null=True)
 
     # Дополнительные данные
-    extra_data = fields.JSONField(default=dict)
+    extra_data = RawJSONField(default=dict)
 
     # Служебные поля
     last_updated = fields.DatetimeField(auto_now=True)
@@ -123,6 +147,8 @@ class Video(Model):
         indexes = [
             ("social_account", "created_at_platform"),
             ("platform_video_id",),
+            # Версия данных аналитики (ETag) - max(last_updated)
+            ("last_updated",),
         ]
 
 
@@ -145,3 +171,104 @@ class VideoMetricsHistory(Model):
     class Meta:
         table = "video_metrics_history"
         indexes = [("video", "snapshot_date")]
+
+
+class CollectionSchedule(Model):
+    """Состояние планового обновления аккаунта"""
+
+    id = fields.IntField(pk=True)
+    social_account = fields.OneToOneField(
+        "models.SocialAccount", related_name="collection_schedule"
+    )
+
+    # Последние плановые сборы: свежих записей и полного периода
+    last_fresh_run_at = fields.DatetimeField(null=True)
+    last_full_run_at = fields.DatetimeField(null=True)
+
+    # Скорость набора просмотров свежими записями (просмотров в час)
+    views_velocity = fields.FloatField(default=0)
+
+    # Запросов к API платформы за последний плановый сбор (оценка стоимости)
+    last_credits_used = fields.IntField(default=0)
+
+    last_error = fields.TextField(null=True)
+    # После неудачного сбора - следующая попытка не раньше
+    retry_at = fields.DatetimeField(null=True)
+    updated_at = fields.DatetimeField(auto_now=True)
+
+    class Meta:
+        table = "collection_schedules"
+
+
+class CreditLedger(Model):
+    """Расход кредитов ScrapeCreators: одна строка на запрос к API"""
+
+    id = fields.IntField(pk=True)
+    platform = fields.TextField()
+    social_account = fields.ForeignKeyField(
+        "models.SocialAccount", related_name="credit_entries", null=True
+    )
+    endpoint = fields.TextField()  # Путь запроса, например /v3/tiktok/profile/videos
+    credits = fields.IntField(default=1)
+    credits_remaining = fields.IntField(null=True)  # Остаток по ответу API
+    created_at = fields.DatetimeField(auto_now_add=True)
+
+    class Meta:
+        table = "credit_ledger"
+        indexes = [("platform", "created_at")]
+
+
+class RawResponse(Model):
+    """Архивный ответ API платформы (файл в ARCHIVE_ROOT)"""
+
+    id = fields.IntField(pk=True)
+    social_account = fields.ForeignKeyField(
+        "models.SocialAccount", related_name="raw_responses"
+    )
+    platform = fields.TextField()
+    # Путь запроса; NULL - старый формат архива (JSON-массив записей страницы)
+    endpoint = fields.TextField(null=True)
+    content_hash = fields.CharField(max_length=64)  # sha256 содержимого
+    items_count = fields.IntField(default=0)  # Только в старом формате
+    size_bytes = fields.IntField(default=0)  # Размер сжатого файла
+    fetched_at = fields.DatetimeField(auto_now_add=True)
+
+    class Meta:
+        table = "raw_responses"
+        indexes = [("social_account", "fetched_at")]
+
+
+class CollectionJob(Model):
+    """Задача сбора аккаунта в общей очереди (см. services/jobs.py, cli.py worker)"""
+
+    STATUS_QUEUED = "queued"  # Ждёт воркера (в т.ч. повтор после ошибки)
+    STATUS_RUNNING = "running"  # Взята воркером до locked_until
+    STATUS_DONE = "done"
+    STATUS_DEAD = "dead"  # Исчерпаны попытки
+
+    id = fields.IntField(pk=True)
+    social_account = fields.ForeignKeyField(
+        "models.SocialAccount", related_name="collection_jobs"
+    )
+    start_date = fields.DatetimeField(null=True)
+    end_date = fields.DatetimeField(null=True)
+    max_credits = fields.IntField(null=True)
+
+    status = fields.CharField(max_length=16, default=STATUS_QUEUED)
+    priority = fields.IntField(default=0)  # Больше - раньше
+    available_at = fields.DatetimeField(auto_now_add=True)  # Не брать раньше
+
+    attempts = fields.IntField(default=0)
+    max_attempts = fields.IntField(default=5)
+    locked_by = fields.CharField(max_length=128, null=True)  # Id воркера
+    locked_until = fields.DatetimeField(null=True)  # После - задачу можно забрать
+
+    last_error = fields.TextField(null=True)
+    result = fields.JSONField(null=True)
+    created_at = fields.DatetimeField(auto_now_add=True)
+    updated_at = fields.DatetimeField(auto_now=True)
+    finished_at = fields.DatetimeField(null=True)
+
+    class Meta:
+        table = "collection_jobs"
+        indexes = [("status", "priority", "available_at")]
@@ -1,8 +1,20 @@
 """
 Модуль генерации отчетов в различных форматах
-"""
 
-from .word_generator import WordReportGenerator
-from .excel_generator import ExcelReportGenerator
+Генераторы импортируются при первом обращении: python-docx и matplotlib
+(Word) загружаются долго и не нужны для Excel и остального API.
+"""
 
 __all__ = ["WordReportGenerator", "ExcelReportGenerator"]
+
+
+def __getattr__(name):
+    if name == "WordReportGenerator":
+        from .word_generator import WordReportGenerator
+
+        return WordReportGenerator
+    if name == "ExcelReportGenerator":
+        from .excel_generator import ExcelReportGenerator
+
+        return ExcelReportGenerator
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -66,6 +66,17 @@ class ProfileSnapshotResponse(BaseModel):
         from_attributes = True
 
 
+class ProfileSeriesResponse(BaseModel):
+    """Ресемплированный ряд метрик профиля (колоночный формат)"""
+
+    social_account_id: int
+    interval: str
+    dates: list[datetime]
+    followers_count: list[int | None]
+    total_posts: list[int | None]
+    total_likes: list[int | None]
+
+
 # Video schemas
 class VideoResponse(BaseModel):
     id: int
@@ -105,6 +116,42 @@ class CollectDataResponse(BaseModel):
     credits_remaining: int | None = None
 
 
+class CollectJobRequest(BaseModel):
+    social_account_id: int
+    start_date: datetime | None = None
+    end_date: datetime | None = None
+    priority: int = 0
+    max_credits: int | None = None
+
+
+class CollectJobResponse(BaseModel):
+    id: int
+    social_account_id: int
+    start_date: datetime | None = None
+    end_date: datetime | None = None
+    status: str
+    priority: int
+    attempts: int
+    max_attempts: int
+    available_at: datetime
+    last_error: str | None = None
+    result: dict | None = None
+    created_at: datetime
+    finished_at: datetime | None = None
+
+    class Config:
+        from_attributes = True
+
+
+class CreditUsageResponse(BaseModel):
+    platform: str
+    spent_today: int
+    spent_month: int
+    daily_budget: int | None = None
+    monthly_budget: int | None = None
+    credits_remaining: int | None = None
+
+
 # Analytics schemas
 class SocialAccountAnalyticsResponse(BaseModel):
     social_account_id: int
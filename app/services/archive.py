@@ -0,0 +1,75 @@
+"""
+Архив ответов API платформ
+
+Каждый успешный ответ API, полученный сборщиком (профиль, страницы
+записей, дополнительные запросы вроде статистики постов TGStat),
+сохраняется в ARCHIVE_ROOT целиком - исходное тело ответа в gzip.
+Имя файла - sha256 содержимого, поэтому одинаковые ответы хранятся один
+раз. Индекс (аккаунт, путь запроса, время получения, хеш) - таблица
+raw_responses. Записи из ответов достаёт BaseCollector.archived_items.
+
+Строки без endpoint - старый формат архива: JSON-массив записей
+страницы после фильтра по периоду.
+
+Старые строки и файлы, на которые больше никто не ссылается, удаляет
+cli.py prune-archive (services/maintenance.py, ARCHIVE_RETENTION_DAYS).
+"""
+
+import asyncio
+import gzip
+import hashlib
+import os
+import uuid
+from pathlib import Path
+from typing import Tuple
+from config import settings
+from models import RawResponse, SocialAccount
+
+ARCHIVE_ROOT = Path(settings.archive_root)
+
+
+def archive_path(content_hash: str) -> Path:
+    """Путь файла архива по хешу содержимого"""
+    return ARCHIVE_ROOT / content_hash[:2] / content_hash[2:4] / f"{content_hash}.json.gz"
+
+
+def _write_content(content: bytes) -> Tuple[str, int]:
+    """Сжать и записать ответ, если такого ещё нет; вернуть хеш и размер"""
+    content_hash = hashlib.sha256(content).hexdigest()
+    path = archive_path(content_hash)
+
+    try:
+        # Файл уже есть: обновляем mtime, чтобы prune-archive не удалил
+        # его, пока новая строка raw_responses ещё не записана
+        os.utime(path)
+    except FileNotFoundError:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Запись через временный файл, чтобы не оставить обрезанный архив;
+        # имя уникально и для потоков одного процесса
+        tmp_path = path.with_suffix(f".{os.getpid()}.{uuid.uuid4().hex}.tmp")
+        try:
+            tmp_path.write_bytes(gzip.compress(content, compresslevel=6))
+            os.replace(tmp_path, path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+    return content_hash, path.stat().st_size
+
+
+def read_content(content_hash: str) -> bytes:
+    """Прочитать исходное содержимое из архива"""
+    return gzip.decompress(archive_path(content_hash).read_bytes())
+
+
+async def archive_response(
+    social_account: SocialAccount, endpoint: str, content: bytes
+) -> None:
+    """Сохранить тело ответа API аккаунта в архив"""
+    content_hash, size = await asyncio.to_thread(_write_content, content)
+    await RawResponse.create(
+        social_account_id=social_account.id,
+        platform=social_account.platform,
+        endpoint=endpoint,
+        content_hash=content_hash,
+        size_bytes=size,
+    )
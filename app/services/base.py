@@ -0,0 +1,731 @@
+"""
+Общий каркас сборщиков данных платформ
+
+Сборщик платформы реализует только специфичное:
+- fetch_profile - данные профиля
+- iter_pages - постраничная загрузка записей за период
+- normalize - преобразование записи API в NormalizedPost
+
+Ответы API декодируются в структуры msgspec с нужными полями
+(services.payloads), записи страниц - PageItem с исходным JSON записи.
+
+Всё остальное (даты по умолчанию, общий пул HTTP-соединений, конвейер
+страниц, архив страниц, скачивание медиа, снимок профиля, пакетный upsert
+записей и истории метрик) реализовано здесь один раз для всех платформ.
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+from contextlib import aclosing
+from dataclasses import dataclass, field, fields
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+import httpx
+import aiofiles
+import msgspec
+from config import settings
+from events import collection_events
+from instrumentation import InstrumentedTransport
+from metrics import (
+    COLLECTION_MEDIA,
+    COLLECTION_PAGES,
+    COLLECTION_POSTS,
+    COLLECTION_SECONDS,
+    MEDIA_DOWNLOAD_BYTES,
+    MEDIA_DOWNLOAD_FAILURES,
+)
+from models import RawJSON, SocialAccount, ProfileSnapshot, Video, VideoMetricsHistory
+from services.archive import archive_response
+from services.payloads import PageItem, decode, decode_items
+from services.credits import CreditBudgetExceeded, ensure_credits, record_credits
+from services.locks import CollectionLocked, account_lock
+from logs import bind_correlation_id
+from services.pipeline import prefetch
+from singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# Идущие сборы: (аккаунт, период, лимит кредитов) -> задача
+_collections = SingleFlight("collection")
+
+MEDIA_ROOT = Path(settings.media_root)
+
+# Период сбора по умолчанию
+DEFAULT_PERIOD_DAYS = 30
+
+
+@dataclass(slots=True)
+class MediaFile:
+    """Медиафайл, который нужно скачать в MEDIA_ROOT"""
+
+    url: str
+    path: str  # Путь относительно MEDIA_ROOT, например "tiktok/123/covers/1.jpg"
+    targets: Tuple[str, ...]  # Поля записи, в которые пишется локальный URL
+
+
+@dataclass(slots=True)
+class NormalizedPost:
+    """Запись (видео/пост) платформы в едином формате таблицы videos"""
+
+    platform_video_id: str
+    platform_author_id: str
+    created_at_platform: datetime
+    description: Optional[str] = None
+    video_url: Optional[str] = None
+    share_url: Optional[str] = None
+    cover_url: Optional[str] = None
+    thumbnail_url: Optional[str] = None
+    duration_ms: Optional[int] = None
+    views_count: int = 0
+    likes_count: int = 0
+    comments_count: int = 0
+    shares_count: int = 0
+    saves_count: Optional[int] = 0
+    # Словарь или готовый JSON (RawJSON, например PageItem.json)
+    extra_data: Dict[str, Any] | RawJSON = field(default_factory=dict)
+    media: List[MediaFile] = field(default_factory=list)
+
+    def __post_init__(self):
+        # null в ответе API не должен ронять upsert страницы (NOT NULL в videos)
+        for name in REQUIRED_METRIC_FIELDS:
+            if getattr(self, name) is None:
+                setattr(self, name, 0)
+
+
+@dataclass(slots=True)
+class NormalizedProfile:
+    """Снимок профиля платформы в едином формате таблицы profile_snapshots"""
+
+    followers_count: int = 0
+    following_count: Optional[int] = 0
+    total_likes: Optional[int] = 0
+    total_posts: Optional[int] = 0
+    avatar_url: Optional[str] = None
+    username: Optional[str] = None
+    profile_url: Optional[str] = None
+    # Словарь или готовый JSON (RawJSON)
+    extra_data: Dict[str, Any] | RawJSON = field(default_factory=dict)
+    media: List[MediaFile] = field(default_factory=list)
+
+    def __post_init__(self):
+        if self.followers_count is None:
+            self.followers_count = 0
+
+
+# Поля Video, которые обновляются при повторном сборе записи
+VIDEO_UPDATE_FIELDS = [
+    "social_account_id",
+    "platform_author_id",
+    "description",
+    "created_at_platform",
+    "video_url",
+    "share_url",
+    "cover_url",
+    "thumbnail_url",
+    "duration_ms",
+    "views_count",
+    "likes_count",
+    "comments_count",
+    "shares_count",
+    "saves_count",
+    "extra_data",
+    "last_updated",
+]
+
+METRIC_FIELDS = [
+    "views_count",
+    "likes_count",
+    "comments_count",
+    "shares_count",
+    "saves_count",
+]
+
+# Метрики с NOT NULL в videos (saves_count может быть неизвестен - NULL)
+REQUIRED_METRIC_FIELDS = ("views_count", "likes_count", "comments_count", "shares_count")
+
+_POST_COLUMNS = [f.name for f in fields(NormalizedPost) if f.name != "media"]
+
+
+def resolve_period(
+    start_date: Optional[datetime], end_date: Optional[datetime]
+) -> Tuple[datetime, datetime]:
+    """
+    Даты периода сбора в UTC
+
+    По умолчанию end_date - сейчас, start_date - за 30 дней до end_date.
+    Даты без timezone считаются UTC.
+    """
+    if end_date is None:
+        end_date = datetime.now(timezone.utc)
+    elif end_date.tzinfo is None:
+        end_date = end_date.replace(tzinfo=timezone.utc)
+
+    if start_date is None:
+        start_date = end_date - timedelta(days=DEFAULT_PERIOD_DAYS)
+    elif start_date.tzinfo is None:
+        start_date = start_date.replace(tzinfo=timezone.utc)
+
+    return start_date, end_date
+
+
+# Общий пул HTTP-соединений процесса (на каждый event loop - свой клиент)
+_http_client: Optional[httpx.AsyncClient] = None
+_http_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Общий httpx-клиент с пулом keep-alive соединений"""
+    global _http_client, _http_client_loop
+
+    loop = asyncio.get_running_loop()
+    if _http_client is None or _http_client.is_closed or _http_client_loop is not loop:
+        _http_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(settings.http_timeout, connect=10.0),
+            transport=InstrumentedTransport(
+                httpx.AsyncHTTPTransport(
+                    limits=httpx.Limits(
+                        max_connections=settings.http_max_connections,
+                        max_keepalive_connections=settings.http_max_connections,
+                    )
+                )
+            ),
+            follow_redirects=True,
+        )
+        _http_client_loop = loop
+    return _http_client
+
+
+async def close_http_client() -> None:
+    """Закрыть общий httpx-клиент (при остановке приложения)"""
+    global _http_client
+    if _http_client is not None and not _http_client.is_closed:
+        await _http_client.aclose()
+    _http_client = None
+
+
+# Ограничение одновременных скачиваний медиа в процессе
+_download_limiter = asyncio.Semaphore(settings.media_download_concurrency)
+
+
+async def download_file(url: str, save_path: Path, retries: int = 3) -> bool:
+    """Скачать файл по URL и сохранить локально"""
+    # Создаем директорию если не существует
+    save_path.parent.mkdir(parents=True, exist_ok=True)
+    client = get_http_client()
+
+    for attempt in range(retries):
+        try:
+            async with _download_limiter:
+                response = await client.get(url, timeout=30.0)
+                response.raise_for_status()
+
+            async with aiofiles.open(save_path, "wb") as f:
+                await f.write(response.content)
+
+            MEDIA_DOWNLOAD_BYTES.inc(len(response.content))
+            logger.debug(
+                "Скачан файл %s",
+                save_path,
+                extra={"sample_rate": 0.01, "bytes": len(response.content)},
+            )
+            return True
+        except (
+            httpx.TimeoutException,
+            httpx.ConnectError,
+            httpx.RemoteProtocolError,
+        ) as e:
+            logger.warning(
+                "Попытка %s/%s - ошибка скачивания %s: %r", attempt + 1, retries, url, e
+            )
+            if attempt == retries - 1:
+                MEDIA_DOWNLOAD_FAILURES.labels(type(e).__name__).inc()
+                return False
+        except Exception as e:
+            logger.warning("Ошибка скачивания %s: %r", url, e)
+            MEDIA_DOWNLOAD_FAILURES.labels(type(e).__name__).inc()
+            return False
+
+    return False
+
+
+def link_existing_media(items: list) -> List[Tuple[Any, str]]:
+    """
+    Записать в поля локальные URL уже скачанных медиа (без сети)
+
+    Возвращает (запись, поле) медиа, файлов которых нет.
+    """
+    missing = []
+    for item in items:
+        for media in item.media:
+            if (MEDIA_ROOT / media.path).exists():
+                for target in media.targets:
+                    setattr(item, target, f"/media/{media.path}")
+            else:
+                missing.extend((item, target) for target in media.targets)
+    return missing
+
+
+async def download_media(items: list) -> int:
+    """
+    Параллельно скачать медиа записей/профилей
+
+    При успешном скачивании в поля из MediaFile.targets записывается
+    локальный URL вида /media/<path>. Возвращает количество скачанных файлов.
+    """
+
+    async def fetch(item, media: MediaFile) -> bool:
+        if not await download_file(media.url, MEDIA_ROOT / media.path):
+            return False
+        for target in media.targets:
+            setattr(item, target, f"/media/{media.path}")
+        return True
+
+    downloaded = await asyncio.gather(
+        *(fetch(item, media) for item in items for media in item.media)
+    )
+    return sum(downloaded)
+
+
+class PostSink:
+    """
+    Пакетная запись нормализованных записей в БД
+
+    На страницу записей выполняется один upsert в videos (по
+    platform_video_id), один запрос id и одна вставка в video_metrics_history.
+
+    download=False - медиа не скачиваются, используются уже скачанные файлы
+    (поле медиа без файла сохраняет значение из БД);
+    history=False - история метрик не пишется (повторная обработка архива);
+    reassign=False - запись, уже принадлежащая другому аккаунту, не
+    перезаписывается и не переносится (пропускается с предупреждением).
+    """
+
+    def __init__(
+        self,
+        social_account: SocialAccount,
+        download: bool = True,
+        history: bool = True,
+        reassign: bool = False,
+    ):
+        self.social_account = social_account
+        self.download = download
+        self.history = history
+        self.reassign = reassign
+        self.posts_written = 0
+        self.media_downloaded = 0
+
+    async def write(self, posts: List[NormalizedPost]) -> int:
+        """Сохранить пачку записей, вернуть количество сохранённых"""
+        # Одна запись может встретиться на странице дважды - оставляем последнюю
+        unique = {post.platform_video_id: post for post in posts}
+        if not self.reassign:
+            foreign = await Video.filter(platform_video_id__in=list(unique)).exclude(
+                social_account_id=self.social_account.id
+            ).values_list("platform_video_id", flat=True)
+            for platform_video_id in foreign:
+                logger.warning(
+                    "Запись %s принадлежит другому аккаунту, пропущена",
+                    platform_video_id,
+                    extra={"social_account_id": self.social_account.id},
+                )
+                del unique[platform_video_id]
+        posts = list(unique.values())
+        if not posts:
+            return 0
+
+        if self.download:
+            self.media_downloaded += await download_media(posts)
+        else:
+            await self._keep_stored_media(link_existing_media(posts))
+
+        await Video.bulk_create(
+            [
+                Video(
+                    social_account_id=self.social_account.id,
+                    **{name: getattr(post, name) for name in _POST_COLUMNS},
+                )
+                for post in posts
+            ],
+            on_conflict=["platform_video_id"],
+            update_fields=VIDEO_UPDATE_FIELDS,
+        )
+
+        self.posts_written += len(posts)
+        if not self.history:
+            return len(posts)
+
+        # Сохраняем историю метрик
+        video_ids = dict(
+            await Video.filter(platform_video_id__in=list(unique)).values_list(
+                "platform_video_id", "id"
+            )
+        )
+        await VideoMetricsHistory.bulk_create(
+            [
+                VideoMetricsHistory(
+                    video_id=video_ids[post.platform_video_id],
+                    **{name: getattr(post, name) for name in METRIC_FIELDS},
+                )
+                for post in posts
+                if post.platform_video_id in video_ids
+            ]
+        )
+        return len(posts)
+
+    async def _keep_stored_media(self, missing: List[Tuple[NormalizedPost, str]]) -> None:
+        """Медиа без локального файла - оставить значение поля из БД"""
+        if not missing:
+            return
+        media_fields = sorted({target for _, target in missing})
+        stored = {
+            row["platform_video_id"]: row
+            for row in await Video.filter(
+                platform_video_id__in=list({post.platform_video_id for post, _ in missing})
+            ).values("platform_video_id", *media_fields)
+        }
+        for post, target in missing:
+            row = stored.get(post.platform_video_id)
+            if row is not None:
+                setattr(post, target, row[target])
+
+
+def _retry_delay(response: httpx.Response, attempt: int) -> float:
+    """Пауза перед повтором запроса после 429 (не больше минуты)"""
+    try:
+        delay = float(response.headers.get("Retry-After", ""))
+    except ValueError:
+        delay = 2.0**attempt
+    return min(max(delay, 0.0), 60.0)
+
+
+class BaseCollector:
+    """
+    Базовый сборщик данных аккаунта платформы
+
+    Подклассы задают `platforms` и реализуют fetch_profile, iter_pages
+    и normalize.
+    """
+
+    platforms: Tuple[str, ...] = ()
+
+    # Перезаписывать username/profile_url аккаунта данными платформы
+    # (иначе они заполняются, только если пустые)
+    sync_username = False
+
+    # Каждый запрос к API платформы расходует кредит ScrapeCreators
+    uses_credits = True
+
+    # Структура записи страницы (services.payloads)
+    item_type: type = None
+
+    # Ответы со страницами записей для archived_items:
+    # путь запроса -> (структура ответа, поле со списком записей)
+    page_payloads: Dict[str, Tuple[type, str]] = {}
+
+    # Запись, уже сохранённая у другого аккаунта, переносится к этому
+    # (иначе пропускается)
+    reassign_posts = False
+
+    def __init__(self, social_account: SocialAccount):
+        if social_account.platform not in self.platforms:
+            raise ValueError(
+                f"Social account platform must be one of: {', '.join(self.platforms)}"
+            )
+        self.social_account = social_account
+        self.client = get_http_client()
+        self.credits_remaining: Optional[int] = None
+        self.requests_made = 0
+        # Сколько кредитов может потратить этот сбор (None - без ограничения)
+        self.max_credits: Optional[int] = None
+        # Ожидание блокировки аккаунта (None - COLLECTION_LOCK_WAIT_SECONDS)
+        self.lock_wait_seconds: Optional[float] = None
+
+    @property
+    def media_dir(self) -> str:
+        """Каталог медиа аккаунта относительно MEDIA_ROOT"""
+        return f"{self.social_account.platform.split('_')[0]}/{self.social_account.platform_user_id}"
+
+    async def get_json(
+        self,
+        url: str,
+        params: Optional[dict] = None,
+        headers: Optional[dict] = None,
+        payload_type: Optional[type] = None,
+    ) -> Any:
+        """
+        GET-запрос к API платформы (с учётом бюджета кредитов)
+
+        payload_type - структура msgspec, в которую декодируется ответ
+        (только объявленные в ней поля); без неё - словарь.
+        """
+        platform = self.social_account.platform
+        if self.uses_credits:
+            if self.max_credits is not None and self.requests_made >= self.max_credits:
+                raise CreditBudgetExceeded(platform)
+            await ensure_credits(platform)
+
+        self.requests_made += 1
+        for attempt in range(settings.http_max_retries + 1):
+            response = await self.client.get(url, params=params, headers=headers)
+            if (
+                response.status_code != 429
+                or attempt == settings.http_max_retries
+            ):
+                break
+            # Ограничение частоты запросов: ждём Retry-After или backoff
+            await asyncio.sleep(_retry_delay(response, attempt))
+        response.raise_for_status()
+        if settings.archive_enabled:
+            # Тело ответа целиком - для повторной обработки без API
+            await archive_response(
+                self.social_account, response.url.path, response.content
+            )
+        if payload_type is None:
+            data = response.json()
+            credits_remaining = (
+                data.get("credits_remaining") if isinstance(data, dict) else None
+            )
+        else:
+            data = decode(response.content, payload_type)
+            credits_remaining = getattr(data, "credits_remaining", None)
+
+        if credits_remaining is not None:
+            self.credits_remaining = credits_remaining
+        if self.uses_credits:
+            await record_credits(
+                platform,
+                response.url.path,
+                credits_remaining=self.credits_remaining,
+                social_account_id=self.social_account.id,
+            )
+        return data
+
+    async def fetch_profile(self) -> Optional[NormalizedProfile]:
+        """Получить данные профиля (None - профиль не обновлять)"""
+        return None
+
+    def iter_pages(
+        self, start_date: datetime, end_date: datetime
+    ) -> AsyncIterator[List[PageItem]]:
+        """Постранично отдавать записи API, входящие в период"""
+        raise NotImplementedError
+
+    def decode_items(self, raws: List[msgspec.Raw]) -> List[PageItem]:
+        """Записи страницы из исходного JSON"""
+        return decode_items(raws, self.item_type)
+
+    def archived_items(self, endpoint: Optional[str], content: bytes) -> List[PageItem]:
+        """
+        Записи страницы из архивного ответа API (services.archive)
+
+        Ответ не со страницей записей (профиль) - пустой список;
+        endpoint=None - старый формат архива, JSON-массив записей.
+        """
+        if endpoint is None:
+            return self.decode_items(decode(content, List[msgspec.Raw]))
+        for path, (page_type, items_field) in self.page_payloads.items():
+            if endpoint.endswith(path):
+                page = decode(content, page_type)
+                return self.decode_items(getattr(page, items_field) or [])
+        return []
+
+    def normalize(self, item: PageItem) -> Optional[NormalizedPost]:
+        """Преобразовать запись API в NormalizedPost (None - пропустить)"""
+        raise NotImplementedError
+
+    async def collect(
+        self,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+    ) -> Dict[str, Any]:
+        """
+        Собрать профиль и записи аккаунта за период
+
+        Args:
+            start_date: Дата начала периода (по умолчанию - 30 дней назад)
+            end_date: Дата окончания периода (по умолчанию - сегодня)
+
+        Returns:
+            Статистика сбора
+        """
+        # Повторный запуск того же сбора (двойной клик, API и планировщик)
+        # дожидается уже идущего вместо параллельной записи тех же постов
+        key = (self.social_account.id, start_date, end_date, self.max_credits)
+        return await _collections.do(key, lambda: self._run(start_date, end_date))
+
+    async def _run(
+        self, start_date: Optional[datetime], end_date: Optional[datetime]
+    ) -> Dict[str, Any]:
+        # Все записи лога сбора (и его фоновых задач) помечаются id задачи
+        with bind_correlation_id(
+            f"{self.social_account.platform}-{self.social_account.id}-{uuid.uuid4().hex[:8]}"
+        ):
+            wait_seconds = (
+                settings.collection_lock_wait_seconds
+                if self.lock_wait_seconds is None
+                else self.lock_wait_seconds
+            )
+            try:
+                # Тот же аккаунт в другом воркере или на другом хосте
+                async with account_lock(self.social_account, wait_seconds):
+                    return await self._collect(start_date, end_date)
+            except CollectionLocked:
+                logger.info(
+                    "Сбор %s/%s уже выполняется, пропуск",
+                    self.social_account.platform,
+                    self.social_account.platform_user_id,
+                )
+                return {
+                    "success": False,
+                    "already_running": True,
+                    "budget_exhausted": False,
+                    "message": "Сбор этого аккаунта уже выполняется",
+                    "posts_collected": 0,
+                    "profile_updated": False,
+                    "credits_remaining": None,
+                    "requests_made": 0,
+                }
+
+    async def _collect(
+        self, start_date: Optional[datetime], end_date: Optional[datetime]
+    ) -> Dict[str, Any]:
+        start_date, end_date = resolve_period(start_date, end_date)
+        platform = self.social_account.platform
+        profile = None
+        sink = PostSink(self.social_account, reassign=self.reassign_posts)
+        pages_count = 0
+        status = "error"
+        started = time.perf_counter()
+        # Самая ранняя собранная запись - по ней оценивается доля периода
+        oldest: Optional[datetime] = None
+
+        def progress_event(kind: str, **extra) -> Dict[str, Any]:
+            elapsed = time.perf_counter() - started
+            event = {
+                "type": kind,
+                "social_account_id": self.social_account.id,
+                "platform": platform,
+                "username": self.social_account.username,
+                "start_date": start_date.isoformat(),
+                "end_date": end_date.isoformat(),
+                "pages": pages_count,
+                "posts": sink.posts_written,
+                "media": sink.media_downloaded,
+                "credits": self.requests_made if self.uses_credits else 0,
+                "elapsed": round(elapsed, 1),
+                "posts_per_second": round(sink.posts_written / elapsed, 1) if elapsed else 0,
+                "progress": None,
+                "eta_seconds": None,
+            }
+            if oldest is not None:
+                span = (end_date - start_date).total_seconds()
+                done = (end_date - max(oldest, start_date)).total_seconds()
+                fraction = min(max(done / span, 0.0), 1.0) if span > 0 else 1.0
+                event["progress"] = round(fraction, 3)
+                if fraction > 0:
+                    event["eta_seconds"] = round(elapsed * (1 - fraction) / fraction)
+            event.update(extra)
+            return event
+
+        await collection_events.publish(progress_event("started"))
+
+        try:
+            # 1. Снимок профиля
+            profile = await self.fetch_profile()
+            if profile:
+                await self.save_profile(profile)
+
+            # 2. Записи: следующая страница загружается в фоне,
+            # пока текущая нормализуется и записывается в БД
+            pages = prefetch(self.iter_pages(start_date, end_date))
+            async with aclosing(pages):
+                async for items in pages:
+                    pages_count += 1
+                    posts = [post for post in map(self.normalize, items) if post is not None]
+                    await sink.write(posts)
+                    if posts:
+                        page_oldest = min(post.created_at_platform for post in posts)
+                        oldest = page_oldest if oldest is None else min(oldest, page_oldest)
+                    await collection_events.publish(progress_event("page"))
+        except CreditBudgetExceeded:
+            # Уже собранные записи сохранены, сбор прерывается до следующего бюджета
+            budget_exhausted = True
+            status = "budget_exhausted"
+        else:
+            budget_exhausted = False
+            status = "success"
+        finally:
+            elapsed = time.perf_counter() - started
+            logger.info(
+                "Сбор %s/%s: %s, %s страниц, %s записей за %.1f с",
+                platform,
+                self.social_account.platform_user_id,
+                status,
+                pages_count,
+                sink.posts_written,
+                elapsed,
+                extra={
+                    "platform": platform,
+                    "social_account_id": self.social_account.id,
+                    "status": status,
+                    "pages": pages_count,
+                    "posts": sink.posts_written,
+                    "media": sink.media_downloaded,
+                    "requests": self.requests_made,
+                },
+            )
+            COLLECTION_SECONDS.labels(platform, status).observe(elapsed)
+            COLLECTION_PAGES.labels(platform).observe(pages_count)
+            COLLECTION_POSTS.labels(platform).observe(sink.posts_written)
+            COLLECTION_MEDIA.labels(platform).observe(sink.media_downloaded)
+            await collection_events.publish(
+                progress_event(
+                    "finished",
+                    status=status,
+                    progress=1.0 if status == "success" else None,
+                    eta_seconds=0,
+                )
+            )
+
+        message = f"Собрано {sink.posts_written} записей за период с {start_date.strftime('%Y-%m-%d')} по {end_date.strftime('%Y-%m-%d')}"
+        if budget_exhausted:
+            message = f"Бюджет кредитов исчерпан. {message}"
+
+        return {
+            "success": not budget_exhausted,
+            "budget_exhausted": budget_exhausted,
+            "message": message,
+            "posts_collected": sink.posts_written,
+            "profile_updated": profile is not None,
+            "credits_remaining": self.credits_remaining,
+            "requests_made": self.requests_made,
+        }
+
+    async def save_profile(self, profile: NormalizedProfile) -> ProfileSnapshot:
+        """Скачать аватар, обновить username аккаунта и сохранить снимок профиля"""
+        await download_media([profile])
+
+        account = self.social_account
+        changed = False
+        if profile.username and (self.sync_username or not account.username):
+            account.username = profile.username
+            changed = True
+        if profile.profile_url and (self.sync_username or not account.profile_url):
+            account.profile_url = profile.profile_url
+            changed = True
+        if changed:
+            await account.save()
+
+        return await ProfileSnapshot.create(
+            social_account=account,
+            snapshot_date=datetime.now(timezone.utc),
+            followers_count=profile.followers_count,
+            following_count=profile.following_count,
+            total_likes=profile.total_likes,
+            total_posts=profile.total_posts,
+            avatar_url=profile.avatar_url,
+            extra_data=profile.extra_data,
+        )
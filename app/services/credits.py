@@ -0,0 +1,132 @@
+"""
+Учёт и бюджеты кредитов ScrapeCreators
+
+Каждый успешный запрос к ScrapeCreators записывается в credit_ledger
+(1 запрос = 1 кредит, вместе с остатком credits_remaining из ответа).
+Перед запросом проверяются дневной и месячный бюджеты платформы
+(settings.credit_daily_budgets / credit_monthly_budgets, сутки и месяц по UTC).
+"""
+
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from tortoise import connections
+from config import settings
+from models import CreditLedger
+
+# Расход платформы за текущие сутки и месяц одним запросом
+USAGE_SQL = """
+SELECT
+    COALESCE(SUM(credits) FILTER (WHERE created_at >= $2), 0) AS spent_today,
+    COALESCE(SUM(credits), 0) AS spent_month
+FROM credit_ledger
+WHERE platform = $1 AND created_at >= $3
+"""
+
+
+class CreditBudgetExceeded(Exception):
+    """Бюджет кредитов платформы исчерпан"""
+
+    def __init__(self, platform: str, available: int = 0):
+        self.platform = platform
+        self.available = available
+        super().__init__(f"Credit budget for {platform} is exhausted")
+
+
+def _period_starts(now: Optional[datetime] = None) -> Tuple[datetime, datetime]:
+    """Начало текущих суток и месяца (UTC)"""
+    now = now or datetime.now(timezone.utc)
+    day_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    return day_start, day_start.replace(day=1)
+
+
+async def get_usage(platform: str) -> Tuple[int, int]:
+    """Потрачено кредитов платформы за текущие сутки и месяц"""
+    day_start, month_start = _period_starts()
+    rows = await connections.get("default").execute_query_dict(
+        USAGE_SQL, [platform, day_start, month_start]
+    )
+    return int(rows[0]["spent_today"]), int(rows[0]["spent_month"])
+
+
+async def credits_available(platform: str) -> Optional[int]:
+    """
+    Сколько кредитов платформа ещё может потратить
+
+    None - бюджеты для платформы не заданы.
+    """
+    daily = settings.credit_daily_budgets.get(platform)
+    monthly = settings.credit_monthly_budgets.get(platform)
+    if daily is None and monthly is None:
+        return None
+
+    spent_today, spent_month = await get_usage(platform)
+    limits = []
+    if daily is not None:
+        limits.append(daily - spent_today)
+    if monthly is not None:
+        limits.append(monthly - spent_month)
+    return max(min(limits), 0)
+
+
+async def ensure_credits(platform: str, credits: int = 1) -> None:
+    """Проверить, что бюджет платформы позволяет потратить credits"""
+    available = await credits_available(platform)
+    if available is not None and available < credits:
+        raise CreditBudgetExceeded(platform, available)
+
+
+async def record_credits(
+    platform: str,
+    endpoint: str,
+    credits: int = 1,
+    credits_remaining: Optional[int] = None,
+    social_account_id: Optional[int] = None,
+) -> None:
+    """Записать расход кредитов в журнал"""
+    await CreditLedger.create(
+        platform=platform,
+        endpoint=endpoint,
+        credits=credits,
+        credits_remaining=credits_remaining,
+        social_account_id=social_account_id,
+    )
+
+
+async def get_usage_summary() -> List[Dict]:
+    """Расход, бюджеты и последний известный остаток по платформам"""
+    day_start, month_start = _period_starts()
+    rows = await connections.get("default").execute_query_dict(
+        """
+        SELECT
+            platform,
+            COALESCE(SUM(credits) FILTER (WHERE created_at >= $1), 0) AS spent_today,
+            COALESCE(SUM(credits), 0) AS spent_month,
+            (ARRAY_AGG(credits_remaining ORDER BY id DESC)
+                FILTER (WHERE credits_remaining IS NOT NULL))[1] AS credits_remaining
+        FROM credit_ledger
+        WHERE created_at >= $2
+        GROUP BY platform
+        """,
+        [day_start, month_start],
+    )
+    usage = {row["platform"]: row for row in rows}
+    platforms = sorted(
+        set(usage)
+        | set(settings.credit_daily_budgets)
+        | set(settings.credit_monthly_budgets)
+    )
+
+    summary = []
+    for platform in platforms:
+        row = usage.get(platform, {})
+        summary.append(
+            {
+                "platform": platform,
+                "spent_today": int(row.get("spent_today", 0)),
+                "spent_month": int(row.get("spent_month", 0)),
+                "daily_budget": settings.credit_daily_budgets.get(platform),
+                "monthly_budget": settings.credit_monthly_budgets.get(platform),
+                "credits_remaining": row.get("credits_remaining"),
+            }
+        )
+    return summary
@@ -0,0 +1,288 @@
+"""
+Очередь задач сбора в Postgres (таблица collection_jobs)
+
+Задачи забирают воркеры (cli.py worker) на любом числе процессов и хостов:
+UPDATE ... WHERE id = (SELECT ... FOR UPDATE SKIP LOCKED) - одну задачу
+получает ровно один воркер, не блокируя остальных.
+
+- priority: задачи с большим приоритетом забираются раньше;
+- видимость: взятая задача принадлежит воркеру до locked_until, воркер
+  продлевает срок, пока работает; если воркер пропал, задачу заберёт другой;
+- повторы: ошибка - повтор через jobs_retry_base_seconds * 2^(попытка-1);
+- dead: после max_attempts неудачных попыток задача больше не выполняется.
+"""
+
+import asyncio
+import logging
+import os
+import socket
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+from tortoise import connections
+from config import settings
+from metrics import COLLECTION_JOBS
+from models import CollectionJob, SocialAccount
+from services.registry import collect_social_account
+
+logger = logging.getLogger(__name__)
+
+# Через сколько вернуть задачу, если аккаунт уже собирается в другом месте
+LOCKED_RETRY_SECONDS = 30
+
+CLAIM_SQL = """
+UPDATE collection_jobs
+SET status = 'running',
+    attempts = attempts + 1,
+    locked_by = $1,
+    locked_until = now() + make_interval(secs => $2),
+    updated_at = now()
+WHERE id = (
+    SELECT id FROM collection_jobs
+    WHERE (status = 'queued' AND available_at <= now())
+       OR (status = 'running' AND locked_until < now() AND attempts < max_attempts)
+    ORDER BY priority DESC, available_at, id
+    FOR UPDATE SKIP LOCKED
+    LIMIT 1
+)
+RETURNING id
+"""
+
+# Воркер пропал на последней попытке - повторять больше нечего
+REAP_SQL = """
+UPDATE collection_jobs
+SET status = 'dead',
+    last_error = COALESCE(last_error, 'Истёк срок видимости задачи'),
+    locked_by = NULL,
+    locked_until = NULL,
+    finished_at = now(),
+    updated_at = now()
+WHERE status = 'running' AND locked_until < now() AND attempts >= max_attempts
+"""
+
+HEARTBEAT_SQL = """
+UPDATE collection_jobs
+SET locked_until = now() + make_interval(secs => $3), updated_at = now()
+WHERE id = $1 AND locked_by = $2 AND status = 'running'
+RETURNING id
+"""
+
+
+async def enqueue_collection(
+    social_account: SocialAccount,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    priority: int = 0,
+    max_credits: Optional[int] = None,
+) -> CollectionJob:
+    """
+    Поставить сбор аккаунта в очередь
+
+    Такая же ещё не выполненная задача не дублируется: возвращается она
+    (с повышенным приоритетом, если новый выше).
+    """
+    existing = await CollectionJob.filter(
+        social_account_id=social_account.id,
+        start_date=start_date,
+        end_date=end_date,
+        max_credits=max_credits,
+        status__in=[CollectionJob.STATUS_QUEUED, CollectionJob.STATUS_RUNNING],
+    ).first()
+    if existing is not None:
+        if priority > existing.priority:
+            existing.priority = priority
+            await existing.save(update_fields=["priority", "updated_at"])
+        return existing
+
+    return await CollectionJob.create(
+        social_account_id=social_account.id,
+        start_date=start_date,
+        end_date=end_date,
+        max_credits=max_credits,
+        priority=priority,
+        max_attempts=settings.jobs_max_attempts,
+    )
+
+
+async def claim_job(worker_id: str) -> Optional[CollectionJob]:
+    """Забрать следующую задачу (None - очередь пуста)"""
+    client = connections.get("default")
+    await client.execute_query(REAP_SQL)
+    rows = await client.execute_query_dict(
+        CLAIM_SQL, [worker_id, float(settings.jobs_visibility_timeout_seconds)]
+    )
+    if not rows:
+        return None
+    return await CollectionJob.get(id=rows[0]["id"]).prefetch_related("social_account")
+
+
+async def heartbeat(job: CollectionJob, worker_id: str) -> bool:
+    """Продлить владение задачей (False - задача уже не принадлежит воркеру)"""
+    rows = await connections.get("default").execute_query_dict(
+        HEARTBEAT_SQL,
+        [job.id, worker_id, float(settings.jobs_visibility_timeout_seconds)],
+    )
+    return bool(rows)
+
+
+async def _finish(job: CollectionJob, worker_id: str, **values: Any) -> bool:
+    """Обновить задачу, если она всё ещё принадлежит воркеру"""
+    updated = await CollectionJob.filter(
+        id=job.id, locked_by=worker_id, status=CollectionJob.STATUS_RUNNING
+    ).update(
+        locked_by=None,
+        locked_until=None,
+        updated_at=datetime.now(timezone.utc),
+        **values,
+    )
+    if not updated:
+        logger.warning("Задача %s уже не принадлежит воркеру %s", job.id, worker_id)
+    return bool(updated)
+
+
+async def complete_job(job: CollectionJob, worker_id: str, result: Dict[str, Any]) -> None:
+    """Сбор выполнен (в т.ч. остановлен бюджетом кредитов)"""
+    if await _finish(
+        job,
+        worker_id,
+        status=CollectionJob.STATUS_DONE,
+        result=result,
+        last_error=None,
+        finished_at=datetime.now(timezone.utc),
+    ):
+        COLLECTION_JOBS.labels("done").inc()
+
+
+async def postpone_job(job: CollectionJob, worker_id: str, delay_seconds: float) -> None:
+    """Вернуть в очередь без траты попытки (аккаунт собирается в другом месте)"""
+    if await _finish(
+        job,
+        worker_id,
+        status=CollectionJob.STATUS_QUEUED,
+        attempts=job.attempts - 1,
+        available_at=datetime.now(timezone.utc) + timedelta(seconds=delay_seconds),
+    ):
+        COLLECTION_JOBS.labels("postponed").inc()
+
+
+async def fail_job(job: CollectionJob, worker_id: str, error: str) -> None:
+    """Ошибка сбора: повтор с экспоненциальной задержкой или dead"""
+    if job.attempts >= job.max_attempts:
+        if await _finish(
+            job,
+            worker_id,
+            status=CollectionJob.STATUS_DEAD,
+            last_error=error,
+            finished_at=datetime.now(timezone.utc),
+        ):
+            COLLECTION_JOBS.labels("dead").inc()
+            logger.error(
+                "Задача %s исчерпала %s попыток: %s", job.id, job.max_attempts, error
+            )
+        return
+
+    delay = min(
+        settings.jobs_retry_base_seconds * 2 ** (job.attempts - 1),
+        settings.jobs_retry_max_seconds,
+    )
+    if await _finish(
+        job,
+        worker_id,
+        status=CollectionJob.STATUS_QUEUED,
+        last_error=error,
+        available_at=datetime.now(timezone.utc) + timedelta(seconds=delay),
+    ):
+        COLLECTION_JOBS.labels("retried").inc()
+
+
+class CollectionWorker:
+    """Воркер очереди сборов (cli.py worker): concurrency задач одновременно"""
+
+    def __init__(self, concurrency: Optional[int] = None):
+        self.concurrency = concurrency or settings.worker_concurrency
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._tasks: List[asyncio.Task] = []
+        self._stopping = asyncio.Event()
+
+    def start(self) -> None:
+        """Запустить циклы получения задач"""
+        if not self._tasks:
+            self._tasks = [
+                asyncio.create_task(self._loop(f"{self.worker_id}:{slot}"))
+                for slot in range(self.concurrency)
+            ]
+
+    async def stop(self) -> None:
+        """
+        Дождаться текущих задач и остановиться
+
+        Сбор, прерванный по отмене, остаётся running и после locked_until
+        будет забран снова.
+        """
+        self._stopping.set()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _loop(self, worker_id: str) -> None:
+        while not self._stopping.is_set():
+            try:
+                job = await claim_job(worker_id)
+            except Exception:
+                logger.exception("Ошибка получения задачи из очереди")
+                job = None
+
+            if job is None:
+                try:
+                    await asyncio.wait_for(
+                        self._stopping.wait(), settings.jobs_poll_interval_seconds
+                    )
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await self.process(job, worker_id)
+
+    async def _heartbeat(self, job: CollectionJob, worker_id: str) -> None:
+        interval = settings.jobs_visibility_timeout_seconds / 3
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                if not await heartbeat(job, worker_id):
+                    return
+            except Exception:
+                logger.exception("Не удалось продлить задачу %s", job.id)
+
+    async def process(self, job: CollectionJob, worker_id: str) -> None:
+        """Выполнить взятую задачу и записать исход"""
+        account = job.social_account
+        logger.info(
+            "Задача %s: сбор %s/%s, попытка %s из %s",
+            job.id,
+            account.platform,
+            account.platform_user_id,
+            job.attempts,
+            job.max_attempts,
+            extra={"social_account_id": account.id, "job_id": job.id},
+        )
+        keepalive = asyncio.create_task(self._heartbeat(job, worker_id))
+        try:
+            # Блокировку аккаунта не ждём: задача вернётся в очередь
+            result = await collect_social_account(
+                account,
+                job.start_date,
+                job.end_date,
+                max_credits=job.max_credits,
+                lock_wait_seconds=0,
+            )
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.exception("Задача %s завершилась ошибкой", job.id)
+            await fail_job(job, worker_id, f"{type(e).__name__}: {e}")
+            return
+        finally:
+            keepalive.cancel()
+
+        if result.get("already_running"):
+            await postpone_job(job, worker_id, LOCKED_RETRY_SECONDS)
+        else:
+            await complete_job(job, worker_id, result)
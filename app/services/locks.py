@@ -0,0 +1,72 @@
+"""
+Блокировка сбора аккаунта между процессами и хостами
+
+pg_try_advisory_lock Postgres на соединении, которое удерживается всё время
+сбора: второй воркер (или хост) не начнёт сбор того же аккаунта, пока
+первый не закончит. Если процесс упал, Postgres снимает блокировку сам
+вместе с соединением.
+
+Соединение блокировки - отдельное, не из пула "default" (с теми же
+настройками, config.connect_kwargs): иначе при сборах числом с пул все
+соединения держали бы блокировки, а запросам сборов не осталось бы ни
+одного. Каждый идущий сбор - одно дополнительное соединение к Postgres.
+"""
+
+import asyncio
+import time
+import zlib
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+import asyncpg
+from config import connect_kwargs
+from metrics import COLLECTION_LOCK_WAIT_SECONDS
+from models import SocialAccount
+
+# Первая половина ключа advisory lock - пространство блокировок сборов
+LOCK_NAMESPACE = zlib.crc32(b"collection") & 0x7FFFFFFF
+
+# Период повторных попыток при ожидании
+POLL_INTERVAL = 1.0
+
+
+class CollectionLocked(Exception):
+    """Аккаунт уже собирается другим процессом"""
+
+    def __init__(self, social_account_id: int):
+        self.social_account_id = social_account_id
+        super().__init__(f"Collection of social account {social_account_id} is already running")
+
+
+@asynccontextmanager
+async def account_lock(
+    social_account: SocialAccount, wait_seconds: float = 0.0
+) -> AsyncIterator[None]:
+    """
+    Эксклюзивная блокировка сбора аккаунта
+
+    wait_seconds - сколько ждать освобождения (0 - не ждать);
+    не дождались - CollectionLocked.
+    """
+    platform = social_account.platform
+    started = time.perf_counter()
+    deadline = started + wait_seconds
+
+    connection = await asyncpg.connect(**connect_kwargs("default", "alan_sb-lock"))
+    try:
+        while not await connection.fetchval(
+            "SELECT pg_try_advisory_lock($1, $2)", LOCK_NAMESPACE, social_account.id
+        ):
+            if time.perf_counter() >= deadline:
+                COLLECTION_LOCK_WAIT_SECONDS.labels(platform, "skipped").observe(
+                    time.perf_counter() - started
+                )
+                raise CollectionLocked(social_account.id)
+            await asyncio.sleep(min(POLL_INTERVAL, max(0.0, deadline - time.perf_counter())))
+
+        COLLECTION_LOCK_WAIT_SECONDS.labels(platform, "acquired").observe(
+            time.perf_counter() - started
+        )
+        yield
+    finally:
+        # Закрытие соединения снимает и блокировку
+        await connection.close()
@@ -0,0 +1,169 @@
+"""
+Обслуживание данных: удаление неиспользуемых медиа, очистка очереди
+сборов и архива ответов API, обновление статистики планировщика
+Postgres (cli.py)
+"""
+
+import asyncio
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import List, Set
+from tortoise import connections
+from models import CollectionJob, RawResponse
+from services.archive import archive_path
+from services.base import MEDIA_ROOT
+
+# Поля с локальными URL медиа (/media/<путь относительно MEDIA_ROOT>)
+MEDIA_REFERENCES_SQL = """
+SELECT substr(url, 8) AS path FROM (
+    SELECT cover_url AS url FROM videos
+    UNION SELECT thumbnail_url FROM videos
+    UNION SELECT video_url FROM videos
+    UNION SELECT avatar_url FROM profile_snapshots
+) refs
+WHERE url LIKE '/media/%'
+"""
+
+# Файлы архива, на которые ссылаются только строки старше границы
+ARCHIVE_EXPIRED_HASHES_SQL = """
+SELECT DISTINCT content_hash FROM raw_responses old
+WHERE fetched_at < $1
+AND NOT EXISTS (
+    SELECT 1 FROM raw_responses r
+    WHERE r.content_hash = old.content_hash AND r.fetched_at >= $1
+)
+"""
+
+# Таблицы, статистику которых стоит обновлять после массовых сборов
+ANALYZE_TABLES = (
+    "videos",
+    "video_metrics_history",
+    "profile_snapshots",
+    "social_accounts",
+    "collection_jobs",
+)
+
+
+@dataclass(slots=True)
+class MediaGCResult:
+    files_checked: int = 0
+    files_removed: int = 0
+    bytes_removed: int = 0
+
+
+@dataclass(slots=True)
+class ArchivePruneResult:
+    responses_removed: int = 0
+    files_removed: int = 0
+    bytes_removed: int = 0
+
+
+async def referenced_media() -> Set[str]:
+    """Пути медиа, на которые ссылаются записи и снимки профиля"""
+    rows = await connections.get("default").execute_query_dict(MEDIA_REFERENCES_SQL)
+    return {row["path"] for row in rows}
+
+
+def _sweep_media(
+    root: Path, referenced: Set[str], min_age_seconds: float, dry_run: bool
+) -> MediaGCResult:
+    result = MediaGCResult()
+    border = time.time() - min_age_seconds
+    for directory, _, files in os.walk(root):
+        for name in files:
+            path = Path(directory, name)
+            result.files_checked += 1
+            if path.relative_to(root).as_posix() in referenced:
+                continue
+            stat = path.stat()
+            # Свежий файл мог быть скачан идущим сбором, который ещё не записал его в БД
+            if stat.st_mtime > border:
+                continue
+            result.files_removed += 1
+            result.bytes_removed += stat.st_size
+            if not dry_run:
+                path.unlink(missing_ok=True)
+    return result
+
+
+async def collect_media_garbage(
+    min_age_hours: float = 24, dry_run: bool = False
+) -> MediaGCResult:
+    """
+    Удалить файлы MEDIA_ROOT, на которые не ссылается ни одна запись
+
+    Файлы младше min_age_hours не трогаются; dry_run - только посчитать.
+    """
+    referenced = await referenced_media()
+    return await asyncio.to_thread(
+        _sweep_media, MEDIA_ROOT, referenced, min_age_hours * 3600, dry_run
+    )
+
+
+async def prune_jobs(older_than_days: int) -> int:
+    """Удалить выполненные и dead задачи сбора старше older_than_days"""
+    border = datetime.now(timezone.utc) - timedelta(days=older_than_days)
+    return await CollectionJob.filter(
+        status__in=[CollectionJob.STATUS_DONE, CollectionJob.STATUS_DEAD],
+        finished_at__lt=border,
+    ).delete()
+
+
+def _remove_archive_files(
+    hashes: List[str], border: float, dry_run: bool
+) -> ArchivePruneResult:
+    result = ArchivePruneResult()
+    for content_hash in hashes:
+        path = archive_path(content_hash)
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        # Файл переиспользован недавним сбором (archive_response обновляет
+        # mtime) - его строка могла появиться уже после выборки хешей
+        if stat.st_mtime >= border:
+            continue
+        result.files_removed += 1
+        result.bytes_removed += stat.st_size
+        if not dry_run:
+            path.unlink(missing_ok=True)
+    return result
+
+
+async def prune_archive(
+    older_than_days: int, dry_run: bool = False
+) -> ArchivePruneResult:
+    """
+    Удалить строки raw_responses старше older_than_days и файлы архива,
+    на которые больше не ссылается ни одна строка
+
+    Пересобрать записи (cli.py reprocess) за удалённый период уже нельзя.
+    dry_run - только посчитать.
+    """
+    border = datetime.now(timezone.utc) - timedelta(days=older_than_days)
+    # Хеши выбираются до удаления строк: после него не отличить файлы
+    # удалённых строк от файлов, которые ещё нужны более новым
+    rows = await connections.get("default").execute_query_dict(
+        ARCHIVE_EXPIRED_HASHES_SQL, [border]
+    )
+    expired = RawResponse.filter(fetched_at__lt=border)
+    responses_removed = await (expired.count() if dry_run else expired.delete())
+
+    result = await asyncio.to_thread(
+        _remove_archive_files,
+        [row["content_hash"] for row in rows],
+        border.timestamp(),
+        dry_run,
+    )
+    result.responses_removed = responses_removed
+    return result
+
+
+async def analyze_tables() -> None:
+    """Обновить статистику планировщика (после массовых сборов и загрузок)"""
+    client = connections.get("default")
+    for table in ANALYZE_TABLES:
+        await client.execute_script(f'ANALYZE "{table}"')
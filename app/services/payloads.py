@@ -0,0 +1,92 @@
+"""
+Типизированное декодирование ответов API платформ (msgspec)
+
+Ответы декодируются сразу в структуры msgspec.Struct, в которых объявлены
+только поля, читаемые сборщиком: остальные поля JSON пропускаются без
+создания словарей и строк. Записи страницы декодируются как msgspec.Raw
+(исходные байты JSON записи) и затем каждая - в структуру записи
+платформы; байты записи сохраняются для архива страниц и extra_data
+(RawJSON - без разбора и повторной сериализации при записи в БД).
+
+Числовые поля объявлены Optional: явный null из API декодируется в None
+(int = 0 отбросил бы запись целиком), а NormalizedPost/NormalizedProfile
+приводят None в метриках к 0.
+
+    class Page(Envelope):
+        aweme_list: List[msgspec.Raw] = []
+
+    data = await self.get_json(url, payload_type=Page)
+    items = decode_items(data.aweme_list, Aweme)
+"""
+
+import logging
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Generic, Iterable, List, Optional, Type, TypeVar
+import msgspec
+from models import RawJSON
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class Envelope(msgspec.Struct):
+    """Общие поля ответов ScrapeCreators"""
+
+    success: bool = False
+    credits_remaining: Optional[int] = None
+
+
+@dataclass(slots=True)
+class PageItem(Generic[T]):
+    """Запись страницы: исходный JSON и декодированные поля"""
+
+    raw: msgspec.Raw
+    data: T
+
+    @property
+    def json(self) -> RawJSON:
+        """Исходный JSON записи (для extra_data - без повторной сериализации)"""
+        return RawJSON(bytes(self.raw).decode())
+
+
+@lru_cache(maxsize=None)
+def _decoder(payload_type: Any) -> msgspec.json.Decoder:
+    # strict=False: числа, пришедшие строками ("123"), приводятся к int/float
+    return msgspec.json.Decoder(payload_type, strict=False)
+
+
+def decode(content: bytes, payload_type: Type[T]) -> T:
+    """Декодировать JSON в структуру payload_type"""
+    return _decoder(payload_type).decode(content)
+
+
+def decode_items(raws: Iterable[msgspec.Raw], item_type: Type[T]) -> List[PageItem[T]]:
+    """
+    Декодировать записи страницы
+
+    Запись с неожиданной структурой (поле другого типа) пропускается
+    с предупреждением, остальные записи страницы обрабатываются.
+    """
+    items = []
+    for raw in raws:
+        try:
+            items.append(PageItem(raw, decode(raw, item_type)))
+        except msgspec.ValidationError as e:
+            logger.warning("Запись %s пропущена: %s", item_type.__name__, e)
+    return items
+
+
+def encode_page(items: Iterable[PageItem]) -> bytes:
+    """JSON-массив записей страницы из исходных байтов (без повторной сериализации)"""
+    return b"[" + b",".join(bytes(item.raw) for item in items) + b"]"
+
+
+def with_field(raw: msgspec.Raw, name: str, value: msgspec.Raw) -> msgspec.Raw:
+    """Добавить поле в JSON-объект записи (обогащение данными другого запроса)"""
+    body = bytes(raw).rstrip()
+    separator = b"," if body.rstrip(b"}").rstrip() != b"{" else b""
+    return msgspec.Raw(
+        body[:-1] + separator + msgspec.json.encode(name) + b":" + bytes(value) + b"}"
+    )
@@ -0,0 +1,61 @@
+"""
+Конвейерная обработка страниц API: загрузка следующей страницы идёт
+параллельно с обработкой (нормализацией и записью в БД) текущей
+"""
+
+import asyncio
+from typing import AsyncIterator, TypeVar
+
+T = TypeVar("T")
+
+# Сколько загруженных страниц может ждать обработки
+DEFAULT_PREFETCH_PAGES = 2
+
+_END = object()
+
+
+async def prefetch(
+    pages: AsyncIterator[T], maxsize: int = DEFAULT_PREFETCH_PAGES
+) -> AsyncIterator[T]:
+    """
+    Читать страницы из `pages` в фоновой задаче через ограниченную очередь
+
+    Пока потребитель обрабатывает страницу, producer уже запрашивает
+    следующую (не более `maxsize` страниц наперёд). Ошибка producer'а
+    пробрасывается потребителю. Используйте вместе с contextlib.aclosing,
+    чтобы при досрочном выходе из цикла фоновая загрузка сразу остановилась.
+    Сам `pages` закрывается (aclose) при любом выходе, в том числе при отмене.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+
+    async def produce() -> None:
+        try:
+            async for page in pages:
+                await queue.put((page, None))
+            await queue.put((_END, None))
+        except Exception as e:
+            await queue.put((_END, e))
+
+    producer = asyncio.create_task(produce())
+    try:
+        while True:
+            page, error = await queue.get()
+            if page is _END:
+                if error is not None:
+                    raise error
+                return
+            yield page
+    finally:
+        try:
+            if not producer.done():
+                producer.cancel()
+                try:
+                    await producer
+                except asyncio.CancelledError:
+                    pass
+        finally:
+            # Закрываем источник здесь, а не в producer: отменённая до первого
+            # шага задача не входит в свой try, и генератор остался бы открытым
+            aclose = getattr(pages, "aclose", None)
+            if aclose is not None:
+                await aclose()
@@ -0,0 +1,51 @@
+"""
+Реестр сборщиков: выбор сборщика по платформе аккаунта
+"""
+
+from datetime import datetime
+from typing import Dict, Optional, Type
+from models import SocialAccount
+from services.base import BaseCollector
+from services.instagram_service import InstagramCollector
+from services.telegram_service import TelegramCollector
+from services.tiktok_service import TikTokCollector
+from services.youtube_service import YouTubeCollector
+
+COLLECTORS: Dict[str, Type[BaseCollector]] = {
+    platform: collector
+    for collector in (
+        TikTokCollector,
+        YouTubeCollector,
+        InstagramCollector,
+        TelegramCollector,
+    )
+    for platform in collector.platforms
+}
+
+
+def get_collector(social_account: SocialAccount) -> BaseCollector:
+    """Создать сборщик для аккаунта"""
+    collector_class = COLLECTORS.get(social_account.platform)
+    if collector_class is None:
+        raise ValueError(f"Platform {social_account.platform} is not supported")
+    return collector_class(social_account)
+
+
+async def collect_social_account(
+    social_account: SocialAccount,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    max_credits: Optional[int] = None,
+    lock_wait_seconds: Optional[float] = None,
+) -> dict:
+    """
+    Собрать данные аккаунта любой поддерживаемой платформы
+
+    max_credits ограничивает число платных запросов сбора (планирование
+    бюджета для массовых и плановых сборов). lock_wait_seconds - сколько
+    ждать, если аккаунт уже собирается другим процессом (None - из настроек).
+    """
+    collector = get_collector(social_account)
+    collector.max_credits = max_credits
+    collector.lock_wait_seconds = lock_wait_seconds
+    return await collector.collect(start_date, end_date)
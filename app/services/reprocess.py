@@ -0,0 +1,73 @@
+"""
+Повторная обработка архива страниц без обращения к API
+
+Ответы API аккаунта читаются из архива от новых к старым, записи страниц
+(BaseCollector.archived_items) прогоняются через текущий normalize
+сборщика и записываются тем же пакетным upsert, что и при сборе. Каждая
+запись берётся из самого свежего ответа, где она встречается; история
+метрик не дописывается, медиа не скачиваются.
+"""
+
+import asyncio
+from datetime import datetime
+from typing import List, Optional
+from models import RawResponse, SocialAccount
+from services.archive import read_content
+from services.base import PostSink
+from services.registry import get_collector
+
+
+async def reprocess_account(
+    social_account: SocialAccount,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+) -> int:
+    """Пересобрать записи аккаунта из архива, вернуть количество записей"""
+    collector = get_collector(social_account)
+    sink = PostSink(
+        social_account,
+        download=False,
+        history=False,
+        reassign=collector.reassign_posts,
+    )
+
+    query = RawResponse.filter(social_account_id=social_account.id)
+    if since:
+        query = query.filter(fetched_at__gte=since)
+    if until:
+        query = query.filter(fetched_at__lte=until)
+    responses = await query.order_by("-fetched_at", "-id").values_list(
+        "content_hash", "endpoint"
+    )
+
+    seen = set()
+    for content_hash, endpoint in dict.fromkeys(responses):
+        content = await asyncio.to_thread(read_content, content_hash)
+        items = collector.archived_items(endpoint, content)
+        posts = []
+        for post in map(collector.normalize, items):
+            if post is not None and post.platform_video_id not in seen:
+                seen.add(post.platform_video_id)
+                posts.append(post)
+        await sink.write(posts)
+
+    return sink.posts_written
+
+
+async def reprocess_archive(
+    social_accounts: List[SocialAccount],
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    concurrency: int = 4,
+) -> dict:
+    """Параллельно пересобрать записи нескольких аккаунтов из архива"""
+    limiter = asyncio.Semaphore(concurrency)
+
+    async def run(account: SocialAccount) -> int:
+        async with limiter:
+            return await reprocess_account(account, since, until)
+
+    results = await asyncio.gather(
+        *(run(account) for account in social_accounts), return_exceptions=True
+    )
+    return dict(zip((account.id for account in social_accounts), results))
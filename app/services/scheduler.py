@@ -0,0 +1,297 @@
+"""
+Плановый сбор данных активных аккаунтов
+
+Раз в scheduler_tick_seconds планировщик выбирает аккаунты, которым пора
+обновиться:
+- полный сбор (за scheduler_full_period_days) - раз в scheduler_full_interval_hours;
+- сбор свежих записей (за scheduler_fresh_days) - раз в
+  scheduler_fresh_interval_minutes.
+
+Первыми запускаются аккаунты, свежие записи которых быстрее всего набирают
+просмотры (по приросту в video_metrics_history). Старты разносятся случайной
+задержкой, а кредиты ScrapeCreators расходуются в пределах часового бюджета
+планировщика и дневного/месячного бюджета платформы (services.credits).
+
+Сбор ограничен оценкой своей стоимости (кредиты прошлого сбора) и
+остатком бюджета платформы. Сбор, упёршийся в оценку, считается
+выполненным (записи от новых к старым уже сохранены): повтор начал бы
+снова с первой страницы, поэтому вдвое большую оценку получает следующий
+плановый сбор.
+
+Время последнего сбора обновляется только после выполненного сбора;
+неудачный повторяется через scheduler_retry_minutes (retry_at в
+collection_schedules - переживает перезапуск).
+"""
+
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Deque, Dict, List, Optional, Tuple
+from tortoise import connections
+from config import settings
+from models import CollectionSchedule, SocialAccount
+from services.credits import credits_available
+from services.registry import COLLECTORS, collect_social_account
+
+logger = logging.getLogger(__name__)
+
+RUN_FULL = "full"
+RUN_FRESH = "fresh"
+
+# Оценка стоимости сбора, пока аккаунт ни разу не собирался планировщиком
+DEFAULT_RUN_CREDITS = 5
+
+BUDGET_WINDOW_SECONDS = 3600
+
+# Скорость набора просмотров свежими записями аккаунтов (просмотров в час)
+VELOCITY_SQL = """
+SELECT v.social_account_id, COALESCE(SUM(h.views_delta / GREATEST(h.hours, 1)), 0) AS velocity
+FROM videos v
+JOIN LATERAL (
+    SELECT MAX(m.views_count) - MIN(m.views_count) AS views_delta,
+           EXTRACT(EPOCH FROM MAX(m.snapshot_date) - MIN(m.snapshot_date)) / 3600 AS hours
+    FROM video_metrics_history m
+    WHERE m.video_id = v.id AND m.snapshot_date >= $2
+) h ON TRUE
+WHERE v.social_account_id = ANY($3::int[]) AND v.created_at_platform >= $1
+GROUP BY v.social_account_id
+"""
+
+
+async def fetch_views_velocity(
+    account_ids: List[int], now: datetime
+) -> Dict[int, float]:
+    """Скорость набора просмотров свежими записями по аккаунтам"""
+    if not account_ids:
+        return {}
+
+    rows = await connections.get("default").execute_query_dict(
+        VELOCITY_SQL,
+        [
+            now - timedelta(days=settings.scheduler_fresh_days),
+            now - timedelta(days=1),
+            account_ids,
+        ],
+    )
+    return {row["social_account_id"]: float(row["velocity"]) for row in rows}
+
+
+def get_due_run(schedule: CollectionSchedule, now: datetime) -> Optional[str]:
+    """Какой сбор пора запустить для аккаунта (None - пока никакой)"""
+    if schedule.retry_at is not None and schedule.retry_at > now:
+        return None
+
+    full_interval = timedelta(hours=settings.scheduler_full_interval_hours)
+    if schedule.last_full_run_at is None or now - schedule.last_full_run_at >= full_interval:
+        return RUN_FULL
+
+    fresh_interval = timedelta(minutes=settings.scheduler_fresh_interval_minutes)
+    if schedule.last_fresh_run_at is None or now - schedule.last_fresh_run_at >= fresh_interval:
+        return RUN_FRESH
+
+    return None
+
+
+class CollectionScheduler:
+    """Фоновый планировщик сборов (lifespan приложения или cli.py scheduler)"""
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self._running: Dict[int, asyncio.Task] = {}
+        self._limiter = asyncio.Semaphore(settings.scheduler_max_concurrency)
+        # Расход кредитов за последний час: [время, кредиты]
+        self._spent: Deque[List[float]] = deque()
+
+    def start(self) -> None:
+        """Запустить цикл планировщика"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        """Остановить планировщик и прервать запущенные сборы"""
+        tasks = list(self._running.values())
+        if self._task is not None:
+            tasks.append(self._task)
+            self._task = None
+
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await self.tick()
+            except Exception:
+                logger.exception("Ошибка планирования сборов")
+            await asyncio.sleep(settings.scheduler_tick_seconds)
+
+    def credits_left(self) -> float:
+        """Остаток часового бюджета кредитов"""
+        border = time.monotonic() - BUDGET_WINDOW_SECONDS
+        while self._spent and self._spent[0][0] < border:
+            self._spent.popleft()
+        return settings.scheduler_hourly_credit_budget - sum(
+            credits for _, credits in self._spent
+        )
+
+    async def tick(self) -> int:
+        """Запустить сборы, которым подошёл срок; вернуть количество запущенных"""
+        now = datetime.now(timezone.utc)
+
+        accounts = await SocialAccount.filter(
+            is_active=True, platform__in=list(COLLECTORS)
+        )
+        account_ids = [account.id for account in accounts]
+        schedules = await self._get_schedules(account_ids)
+        velocities = await fetch_views_velocity(account_ids, now)
+
+        due: List[Tuple[SocialAccount, CollectionSchedule, str]] = []
+        for account in accounts:
+            if account.id in self._running:
+                continue
+            schedule = schedules[account.id]
+            schedule.views_velocity = velocities.get(account.id, 0.0)
+            run = get_due_run(schedule, now)
+            if run:
+                due.append((account, schedule, run))
+
+        # Быстрее набирающие просмотры аккаунты - первыми
+        due.sort(key=lambda item: item[1].views_velocity, reverse=True)
+
+        budget = self.credits_left()
+        platform_budgets: Dict[str, Optional[int]] = {}
+        started = 0
+        for account, schedule, run in due:
+            credits = 0
+            max_credits = None
+            if COLLECTORS[account.platform].uses_credits:
+                credits = schedule.last_credits_used or DEFAULT_RUN_CREDITS
+                if credits > budget:
+                    continue
+
+                # Дневной/месячный бюджет платформы
+                if account.platform not in platform_budgets:
+                    platform_budgets[account.platform] = await credits_available(
+                        account.platform
+                    )
+                # Сбор тратит не больше оценки, зарезервированной в бюджетах
+                max_credits = credits
+                remaining = platform_budgets[account.platform]
+                if remaining is not None:
+                    if credits > remaining:
+                        continue
+                    platform_budgets[account.platform] = remaining - credits
+                budget -= credits
+
+            # Резервируем оценку стоимости до окончания сбора
+            reservation = [time.monotonic(), credits]
+            self._spent.append(reservation)
+
+            delay = random.uniform(0, settings.scheduler_jitter_seconds)
+            self._running[account.id] = asyncio.create_task(
+                self._run(account, schedule, run, delay, reservation, max_credits)
+            )
+            started += 1
+
+        return started
+
+    async def _get_schedules(
+        self, account_ids: List[int]
+    ) -> Dict[int, CollectionSchedule]:
+        """Состояния расписания аккаунтов (создаются при первом обращении)"""
+        schedules = {
+            schedule.social_account_id: schedule
+            for schedule in await CollectionSchedule.filter(
+                social_account_id__in=account_ids
+            )
+        }
+        missing = [
+            CollectionSchedule(social_account_id=account_id)
+            for account_id in account_ids
+            if account_id not in schedules
+        ]
+        if missing:
+            await CollectionSchedule.bulk_create(missing)
+            for schedule in await CollectionSchedule.filter(
+                social_account_id__in=[s.social_account_id for s in missing]
+            ):
+                schedules[schedule.social_account_id] = schedule
+        return schedules
+
+    async def _run(
+        self,
+        account: SocialAccount,
+        schedule: CollectionSchedule,
+        run: str,
+        delay: float,
+        reservation: List[float],
+        max_credits: Optional[int],
+    ) -> None:
+        """Сбор аккаунта после случайной задержки"""
+        try:
+            await asyncio.sleep(delay)
+            async with self._limiter:
+                now = datetime.now(timezone.utc)
+                days = (
+                    settings.scheduler_full_period_days
+                    if run == RUN_FULL
+                    else settings.scheduler_fresh_days
+                )
+
+                succeeded = False
+                try:
+                    result = await collect_social_account(
+                        account,
+                        now - timedelta(days=days),
+                        now,
+                        max_credits,
+                        lock_wait_seconds=0,
+                    )
+                    if result.get("already_running"):
+                        # Аккаунт собирает другой процесс - повторим позже
+                        reservation[1] = 0
+                        return
+                    succeeded = bool(result.get("success"))
+                    schedule.last_error = None if succeeded else result.get("message")
+                    if COLLECTORS[account.platform].uses_credits:
+                        used = result.get("requests_made", 0)
+                        estimate, reservation[1] = reservation[1], used
+                        if result.get("budget_exhausted") and used >= estimate:
+                            # Упёрлись в свою оценку: сбор выполнен частично, но
+                            # не повторяется - вдвое больше получит следующий
+                            succeeded = True
+                            used = min(used * 2, settings.scheduler_hourly_credit_budget)
+                        schedule.last_credits_used = used
+                    logger.info(
+                        "Плановый сбор %s/%s (%s): %s",
+                        account.platform,
+                        account.platform_user_id,
+                        run,
+                        result.get("message"),
+                    )
+                except Exception as e:
+                    schedule.last_error = str(e)
+                    logger.exception(
+                        "Ошибка планового сбора %s/%s (%s)",
+                        account.platform,
+                        account.platform_user_id,
+                        run,
+                    )
+
+                if succeeded:
+                    # Полный сбор покрывает и свежие записи
+                    schedule.last_fresh_run_at = now
+                    if run == RUN_FULL:
+                        schedule.last_full_run_at = now
+                    schedule.retry_at = None
+                else:
+                    schedule.retry_at = datetime.now(timezone.utc) + timedelta(
+                        minutes=settings.scheduler_retry_minutes
+                    )
+                await schedule.save()
+        finally:
+            self._running.pop(account.id, None)
@@ -2,420 +2,500 @@
 Сервис для сбора данных с Telegram через TGStat API
 """
 
-import httpx
-import aiofiles
-from pathlib import Path
+import asyncio
+import logging
 from datetime import datetime, timezone
-from typing import Optional
-from models import SocialAccount, ProfileSnapshot, Video
+from typing import Any, AsyncIterator, Dict, List, Optional, Union
+import msgspec
+from models import SocialAccount
 from config import settings
+from services.base import BaseCollector, MediaFile, NormalizedPost, NormalizedProfile
+from services.payloads import PageItem, decode, decode_items, with_field
 
-TGSTAT_API_TOKEN = settings.tgstat_api_token
-TGSTAT_BASE_URL = "https://api.tgstat.ru"
-MEDIA_ROOT = Path("/app/media")
+logger = logging.getLogger(__name__)
 
+# Размер страницы /channels/posts и батча /posts/stat-multi
+POSTS_PAGE_SIZE = 50
+
+# Максимальный offset /channels/posts (API отдаёт не более 1000 постов на запрос)
+POSTS_MAX_OFFSET = 1000
 
-async def collect_telegram_channel_data(
-    social_account: SocialAccount,
-    start_date: Optional[datetime] = None,
-    end_date: Optional[datetime] = None,
-) -> dict:
-    """
-    Собрать данные канала Telegram за указанный период
+# Ограничение одновременных запросов к TGStat (общее для всех сборов процесса)
+TGSTAT_LIMITER = asyncio.Semaphore(settings.tgstat_max_concurrency)
 
-    Args:
-        social_account: Аккаунт Telegram канала
-        start_date: Дата начала периода (по умолчанию - 30 дней назад)
-        end_date: Дата окончания периода (по умолчанию - сегодня)
+# Страниц в каждой очереди конвейера и одновременно обогащаемых страниц сбора
+PIPELINE_PAGES = 4
 
-    Returns:
-        dict с информацией о собранных данных
-    """
-    if social_account.platform != "telegram":
-        raise ValueError("Social account must be Telegram platform")
 
-    if not TGSTAT_API_TOKEN:
-        raise ValueError(
-            "TGStat API token is not configured. Please set TGSTAT_API_TOKEN in .env file"
-        )
+class PostStats(msgspec.Struct):
+    """Детальная статистика поста (/posts/stat-multi)"""
 
-    channel_id = social_account.platform_user_id
-
-    # Устанавливаем дефолтные даты если не указаны
-    if end_date is None:
-        end_date = datetime.now(timezone.utc)
-    else:
-        # Если дата передана без timezone, делаем её UTC-aware
-        if end_date.tzinfo is None:
-            end_date = end_date.replace(tzinfo=timezone.utc)
-
-    if start_date is None:
-        from datetime import timedelta
-
-        start_date = end_date - timedelta(days=30)
-    else:
-        # Если дата передана без timezone, делаем её UTC-aware
-        if start_date.tzinfo is None:
-            start_date = start_date.replace(tzinfo=timezone.utc)
-
-    posts_collected = 0
-    profile_updated = False
-
-    async with httpx.AsyncClient(timeout=60.0) as client:
-        # 1. Получаем информацию о канале
-        channel_stats = await _get_channel_stats(client, channel_id)
-
-        # Сохраняем snapshot профиля
-        if channel_stats:
-            await _save_channel_snapshot(social_account, channel_stats)
-            profile_updated = True
-
-            # Обновляем username если не задан
-            if not social_account.username and channel_stats.get("username"):
-                social_account.username = channel_stats["username"]
-                await social_account.save()
-
-        # 2. Собираем посты за период
-        posts_data = await _collect_posts_by_date(
-            client, channel_id, start_date, end_date
-        )
+    postId: Optional[int] = None
+    viewsCount: Optional[int] = None
+    reactionsCount: Optional[int] = 0
+    commentsCount: Optional[int] = 0
+    sharesCount: Optional[int] = 0
 
-        # 3. Получаем детальную статистику для постов (если нужно)
-        # Разбиваем на батчи по 50 постов
-        for i in range(0, len(posts_data), 50):
-            batch = posts_data[i : i + 50]
-            post_ids = [post.get("id") for post in batch if post.get("id")]
 
-            if post_ids:
-                detailed_stats = await _get_posts_detailed_stats(
-                    client, channel_id, post_ids
-                )
+class Media(msgspec.Struct):
+    media_type: Optional[str] = None
+    mime_type: Optional[str] = None
+    size: Optional[int] = None
+    file_url: Optional[str] = None
+    file_thumbnail_url: Optional[str] = None
 
-                # Обогащаем данные постов детальной статистикой
-                for post in batch:
-                    post_id = post.get("id")
-                    if post_id and post_id in detailed_stats:
-                        post["detailed_stats"] = detailed_stats[post_id]
 
-        # 4. Сохраняем посты
-        for post_data in posts_data:
-            await _save_telegram_post(social_account, post_data)
-            posts_collected += 1
+class Post(msgspec.Struct):
+    """Поля поста, которые читает сборщик"""
 
-    return {
-        "success": True,
-        "message": f"Собрано {posts_collected} записей за период с {start_date.strftime('%Y-%m-%d')} по {end_date.strftime('%Y-%m-%d')}",
-        "posts_collected": posts_collected,
-        "profile_updated": profile_updated,
-        "channel_stats": channel_stats,
-    }
+    id: Optional[int] = None
+    date: Optional[int] = None  # Пост без даты пропускается
+    text: Optional[str] = ""
+    link: Optional[str] = ""
+    channel_id: Union[int, str, None] = None
+    views: Optional[int] = 0
+    is_deleted: Any = 0
+    forwarded_from: Any = None
+    # У поста без медиа - null или пустой массив
+    media: Union[Media, List[Any], None] = None
+    detailed_stats: Optional[PostStats] = None
 
 
-async def _download_file(url: str, save_path: Path, retries: int = 3) -> bool:
-    """Скачать файл по URL и сохранить локально"""
-    # Создаем директорию если не существует
-    save_path.parent.mkdir(parents=True, exist_ok=True)
+class PostsList(msgspec.Struct):
+    count: Optional[int] = None
+    items: Optional[List[msgspec.Raw]] = None
 
-    for attempt in range(retries):
-        try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.get(url, follow_redirects=True)
-                response.raise_for_status()
-
-                async with aiofiles.open(save_path, "wb") as f:
-                    await f.write(response.content)
-
-                return True
-        except (
-            httpx.TimeoutException,
-            httpx.ConnectError,
-            httpx.RemoteProtocolError,
-        ) as e:
-            print(f"Попытка {attempt + 1}/{retries} - Ошибка скачивания {url}: {e}")
-            if attempt == retries - 1:
-                return False
-        except Exception as e:
-            print(f"Ошибка скачивания {url}: {e}")
-            return False
-
-    return False
-
-
-async def _get_channel_stats(client: httpx.AsyncClient, channel_id: str) -> dict:
-    """Получить статистику канала"""
-    response = await client.get(
-        f"{TGSTAT_BASE_URL}/channels/stat",
-        params={"token": TGSTAT_API_TOKEN, "channelId": channel_id},
-    )
-    response.raise_for_status()
-    data = response.json()
-
-    if data.get("status") == "ok":
-        return data.get("response", {})
-
-    error_msg = data.get("error", "Unknown error")
-    raise ValueError(f"TGStat API error: {error_msg}")
-
-
-async def _collect_posts_by_date(
-    client: httpx.AsyncClient,
-    channel_id: str,
-    start_date: datetime,
-    end_date: datetime,
-) -> list:
-    """Собрать посты канала за указанный период"""
-    all_posts = []
-    offset = 0
-    limit = 50
-
-    # Конвертируем даты в timestamp
-    start_timestamp = int(start_date.timestamp())
-    end_timestamp = int(end_date.timestamp())
-
-    while True:
-        params = {
-            "token": TGSTAT_API_TOKEN,
-            "channelId": channel_id,
-            "limit": limit,
-            "offset": offset,
-            "startTime": start_timestamp,
-            "endTime": end_timestamp,
-            "hideForwards": 0,  # Не скрываем репосты
-            "hideDeleted": 1,  # Скрываем удаленные
-            "extended": 1,  # Получаем расширенную информацию
-        }
-
-        response = await client.get(
-            f"{TGSTAT_BASE_URL}/channels/posts",
-            params=params,
-        )
-        response.raise_for_status()
-        data = response.json()
 
-        if data.get("status") != "ok":
-            error_msg = data.get("error", "Unknown error")
-            raise ValueError(f"TGStat API error: {error_msg}")
+class PostsResponse(msgspec.Struct):
+    status: Optional[str] = None
+    error: str = "Unknown error"
+    response: PostsList = msgspec.field(default_factory=PostsList)
 
-        response_data = data.get("response", {})
-        items = response_data.get("items", [])
 
-        if not items:
-            break
+class StatsResponse(msgspec.Struct):
+    status: Optional[str] = None
+    response: Optional[List[msgspec.Raw]] = None
 
-        # Проверяем дату последнего поста в батче
-        last_post_date = items[-1].get("date", 0)
 
-        all_posts.extend(items)
+def _apply_stats(
+    posts: List[PageItem[Post]], detailed_stats: Dict[int, PageItem[PostStats]]
+) -> None:
+    """Добавить в посты детальную статистику (поле detailed_stats)"""
+    for post in posts:
+        stats = detailed_stats.get(post.data.id)
+        if stats is not None:
+            post.data.detailed_stats = stats.data
+            # В исходный JSON тоже - статистика попадёт в extra_data
+            post.raw = with_field(post.raw, "detailed_stats", stats.raw)
 
-        # Если достигли начальной даты или нет больше постов
-        if last_post_date < start_timestamp:
-            # Фильтруем посты которые вне диапазона
-            all_posts = [
-                p
-                for p in all_posts
-                if start_timestamp <= p.get("date", 0) <= end_timestamp
-            ]
-            break
 
-        count = response_data.get("count", 0)
-        if count < limit:
-            break
+class TelegramCollector(BaseCollector):
+    """Сборщик постов канала Telegram через TGStat"""
 
-        offset += limit
+    platforms = ("telegram",)
+    uses_credits = False  # TGStat ограничивает запросы тарифом, а не кредитами
+    item_type = Post
 
-        # Защита от бесконечного цикла (максимум 1000 постов согласно API)
-        if offset >= 1000:
-            break
+    def __init__(self, social_account: SocialAccount):
+        super().__init__(social_account)
+        if not settings.tgstat_api_token:
+            raise ValueError(
+                "TGStat API token is not configured. Please set TGSTAT_API_TOKEN in .env file"
+            )
+        self.channel_id = social_account.platform_user_id
+        self.channel_stats: Optional[dict] = None
+        # Статистика постов из архива (archived_items), по id поста
+        self._archived_stats: Dict[int, PageItem[PostStats]] = {}
 
-    return all_posts
+    async def _tgstat_get(
+        self, path: str, params: dict, payload_type: Optional[type] = None
+    ) -> Any:
+        """GET-запрос к TGStat API с учётом общего ограничения параллельности"""
+        async with TGSTAT_LIMITER:
+            return await self.get_json(
+                f"{settings.tgstat_api_url}{path}",
+                params={"token": settings.tgstat_api_token, **params},
+                payload_type=payload_type,
+            )
+
+    async def fetch_profile(self) -> Optional[NormalizedProfile]:
+        """Получить статистику канала"""
+        # Статистика канала целиком возвращается в результате сбора - словарь
+        data = await self._tgstat_get("/channels/stat", {"channelId": self.channel_id})
 
+        if data.get("status") != "ok":
+            error_msg = data.get("error", "Unknown error")
+            raise ValueError(f"TGStat API error: {error_msg}")
 
-async def _get_posts_detailed_stats(
-    client: httpx.AsyncClient, channel_id: str, post_ids: list
-) -> dict:
-    """Получить детальную статистику для нескольких постов"""
-    try:
-        params = {
-            "token": TGSTAT_API_TOKEN,
-            "channelId": channel_id,
-            "postsIds": ",".join(map(str, post_ids)),
-        }
-
-        response = await client.get(
-            f"{TGSTAT_BASE_URL}/posts/stat-multi",
-            params=params,
+        channel_stats = self.channel_stats = data.get("response", {})
+        if not channel_stats:
+            return None
+
+        profile = NormalizedProfile(
+            followers_count=channel_stats.get("participants_count", 0),
+            following_count=0,  # Telegram не показывает подписки
+            total_likes=0,  # В Telegram нет лайков, есть реакции
+            total_posts=channel_stats.get("posts_count", 0),
+            username=channel_stats.get("username"),
+            extra_data={
+                "title": channel_stats.get("title"),
+                "username": channel_stats.get("username"),
+                "peer_type": channel_stats.get("peer_type"),
+                "avg_post_reach": channel_stats.get("avg_post_reach", 0),
+                "adv_post_reach_12h": channel_stats.get("adv_post_reach_12h", 0),
+                "adv_post_reach_24h": channel_stats.get("adv_post_reach_24h", 0),
+                "adv_post_reach_48h": channel_stats.get("adv_post_reach_48h", 0),
+                "err_percent": channel_stats.get("err_percent", 0),
+                "err24_percent": channel_stats.get("err24_percent", 0),
+                "er_percent": channel_stats.get("er_percent", 0),
+                "daily_reach": channel_stats.get("daily_reach", 0),
+                "ci_index": channel_stats.get("ci_index", 0),
+                "mentions_count": channel_stats.get("mentions_count", 0),
+                "forwards_count": channel_stats.get("forwards_count", 0),
+                "mentioning_channels_count": channel_stats.get(
+                    "mentioning_channels_count", 0
+                ),
+                "category": channel_stats.get("category"),
+                "country": channel_stats.get("country"),
+                "language": channel_stats.get("language"),
+            },
+        )
+
+        # Аватар канала
+        avatar_remote_url = channel_stats.get("image640", "")
+        if avatar_remote_url:
+            logger.debug("Найден аватар канала %s: %s", self.channel_id, avatar_remote_url)
+            timestamp = int(datetime.now(timezone.utc).timestamp())
+            profile.media.append(
+                MediaFile(
+                    _normalize_url(avatar_remote_url),
+                    f"{self.media_dir}/avatars/{timestamp}.jpg",
+                    ("avatar_url",),
+                )
+            )
+
+        return profile
+
+    async def iter_pages(
+        self, start_date: datetime, end_date: datetime
+    ) -> AsyncIterator[List[PageItem[Post]]]:
+        """
+        Отдавать страницы постов, обогащённые детальной статистикой
+
+        Пагинация по временным окнам (producer) складывает страницы в очередь,
+        а обработчик сразу запускает для каждой страницы запрос
+        /posts/stat-multi. Запросы статистики выполняются параллельно,
+        в пределах TGSTAT_LIMITER; страницы отдаются по мере готовности.
+
+        Очереди и число обогащаемых страниц ограничены PIPELINE_PAGES:
+        медленная запись в БД останавливает и пагинацию. Ошибка любой
+        стадии отменяет остальные и пробрасывается потребителю.
+        """
+        enriched_pages: asyncio.Queue = asyncio.Queue(PIPELINE_PAGES)
+        pipeline = asyncio.create_task(
+            self._produce_enriched_pages(start_date, end_date, enriched_pages)
         )
-        response.raise_for_status()
-        data = response.json()
-        print(data)
-        if data.get("status") == "ok":
-            # Преобразуем список в словарь по postId
-            stats_list = data.get("response", [])
-            return {stat["postId"]: stat for stat in stats_list}
-    except Exception as e:
-        print(f"Error getting detailed stats: {e}")
-
-    return {}
-
-
-async def _save_channel_snapshot(
-    social_account: SocialAccount, channel_stats: dict
-) -> ProfileSnapshot:
-    """Сохранить снимок профиля канала"""
-
-    # Скачиваем аватар канала
-    avatar_url = None
-    avatar_remote_url = channel_stats.get("image640", "")
-    if avatar_remote_url:
-        print(f"[Telegram] Найден аватар канала: {avatar_remote_url}")
-
-        # Нормализуем URL
-        if not avatar_remote_url.startswith("http"):
-            avatar_remote_url = f"https:{avatar_remote_url}"
-
-        # Сохраняем аватар локально
-        channel_id = social_account.platform_user_id
-        avatar_dir = MEDIA_ROOT / "telegram" / channel_id / "avatars"
-        timestamp = int(datetime.now(timezone.utc).timestamp())
-        avatar_filename = f"{timestamp}.jpg"
-        avatar_path = avatar_dir / avatar_filename
-
-        print(f"[Telegram] Скачивание аватара в {avatar_path}...")
-        if await _download_file(avatar_remote_url, avatar_path):
-            avatar_url = f"/media/telegram/{channel_id}/avatars/{avatar_filename}"
-            print(f"[Telegram] ✅ Аватар сохранён: {avatar_url}")
+        getter: Optional[asyncio.Future] = None
+
+        try:
+            while True:
+                getter = asyncio.ensure_future(enriched_pages.get())
+                await asyncio.wait({getter, pipeline}, return_when=asyncio.FIRST_COMPLETED)
+                if not getter.done():
+                    break
+                yield getter.result()
+
+            # Конвейер завершился - отдаём оставшиеся страницы
+            while not enriched_pages.empty():
+                yield enriched_pages.get_nowait()
+            try:
+                pipeline.result()
+            except BaseExceptionGroup as group:
+                # Наружу - исходная ошибка, а не группа TaskGroup
+                error = group
+                while isinstance(error, BaseExceptionGroup):
+                    error = error.exceptions[0]
+                raise error from group
+        finally:
+            if getter is not None and not getter.done():
+                getter.cancel()
+            if not pipeline.done():
+                pipeline.cancel()
+                await asyncio.wait([pipeline])
+
+    async def _produce_enriched_pages(
+        self, start_date: datetime, end_date: datetime, enriched_pages: asyncio.Queue
+    ) -> None:
+        """Пагинация и обогащение страниц статистикой в одной TaskGroup"""
+        raw_pages: asyncio.Queue = asyncio.Queue(PIPELINE_PAGES)
+        limiter = asyncio.Semaphore(PIPELINE_PAGES)
+        seen_ids = set()
+
+        async def enrich(batch: list) -> None:
+            try:
+                await self._enrich_posts_batch(batch)
+                await enriched_pages.put(batch)
+            finally:
+                limiter.release()
+
+        async with asyncio.TaskGroup() as group:
+            group.create_task(self._produce_posts_by_date(start_date, end_date, raw_pages))
+            while (page := await raw_pages.get()) is not None:
+                # Окна могут пересекаться на границе - отбрасываем дубликаты
+                batch = [p for p in page if p.data.id not in seen_ids]
+                seen_ids.update(p.data.id for p in batch)
+                if batch:
+                    await limiter.acquire()
+                    group.create_task(enrich(batch))
+
+    async def _produce_posts_by_date(
+        self, start_date: datetime, end_date: datetime, queue: asyncio.Queue
+    ) -> None:
+        """Собрать посты канала за период и передать страницы в очередь"""
+        await self._produce_posts_in_window(
+            int(start_date.timestamp()), int(end_date.timestamp()), queue
+        )
+        # Сигнал окончания для обработчика (при ошибке его отменит TaskGroup)
+        await queue.put(None)
+
+    async def _produce_posts_in_window(
+        self, start_timestamp: int, end_timestamp: int, queue: asyncio.Queue
+    ) -> None:
+        """
+        Постранично собрать посты окна [start_timestamp, end_timestamp]
+
+        API не отдаёт больше POSTS_MAX_OFFSET постов на один диапазон. Если окно
+        упёрлось в этот предел, оставшаяся (более старая) часть окна делится
+        пополам и обе половины собираются параллельно - так же рекурсивно.
+        Ошибка в одной половине отменяет остальные (TaskGroup).
+        """
+        offset = 0
+        limit = POSTS_PAGE_SIZE
+        oldest_timestamp = None
+
+        while True:
+            params = {
+                "channelId": self.channel_id,
+                "limit": limit,
+                "offset": offset,
+                "startTime": start_timestamp,
+                "endTime": end_timestamp,
+                "hideForwards": 0,  # Не скрываем репосты
+                "hideDeleted": 1,  # Скрываем удаленные
+                "extended": 1,  # Получаем расширенную информацию
+            }
+
+            data = await self._tgstat_get("/channels/posts", params, PostsResponse)
+
+            if data.status != "ok":
+                raise ValueError(f"TGStat API error: {data.error}")
+
+            response_data = data.response
+            items = decode_items(response_data.items or [], Post)
+
+            if not items:
+                return
+
+            dated = [p for p in items if p.data.date is not None]
+            if len(dated) < len(items):
+                logger.warning(
+                    "Канал %s: пропущено постов без даты: %s",
+                    self.channel_id,
+                    len(items) - len(dated),
+                )
+
+            # Оставляем только посты из диапазона
+            batch = [
+                p for p in dated if start_timestamp <= p.data.date <= end_timestamp
+            ]
+            if batch:
+                await queue.put(batch)
+                oldest_timestamp = min(p.data.date for p in batch)
+
+            # Если достигли начальной даты или нет больше постов
+            if dated and dated[-1].data.date < start_timestamp:
+                return
+
+            # Без count (null или нет поля) - по числу записей страницы
+            count = len(items) if response_data.count is None else response_data.count
+            if count < limit:
+                return
+
+            offset += limit
+            if offset >= POSTS_MAX_OFFSET:
+                break
+
+        # Окно упёрлось в предел offset - досбираем более старую часть.
+        # Посты с oldest_timestamp могли попасть только частично, поэтому
+        # граница включается повторно (дубликаты отбрасывает обработчик).
+        if oldest_timestamp is None or oldest_timestamp >= end_timestamp:
+            # Больше POSTS_MAX_OFFSET постов за одну секунду - такое окно не разделить
+            logger.warning(
+                "Канал %s: более %s постов за секунду %s, часть постов пропущена",
+                self.channel_id,
+                POSTS_MAX_OFFSET,
+                end_timestamp,
+            )
+            remaining_end = end_timestamp - 1
         else:
-            print("[Telegram] ❌ Ошибка скачивания аватара")
-
-    snapshot = await ProfileSnapshot.create(
-        social_account=social_account,
-        snapshot_date=datetime.now(timezone.utc),
-        followers_count=channel_stats.get("participants_count", 0),
-        following_count=0,  # Telegram не показывает подписки
-        total_likes=0,  # В Telegram нет лайков, есть реакции
-        total_posts=channel_stats.get("posts_count", 0),
-        avatar_url=avatar_url,
-        extra_data={
-            "title": channel_stats.get("title"),
-            "username": channel_stats.get("username"),
-            "peer_type": channel_stats.get("peer_type"),
-            "avg_post_reach": channel_stats.get("avg_post_reach", 0),
-            "adv_post_reach_12h": channel_stats.get("adv_post_reach_12h", 0),
-            "adv_post_reach_24h": channel_stats.get("adv_post_reach_24h", 0),
-            "adv_post_reach_48h": channel_stats.get("adv_post_reach_48h", 0),
-            "err_percent": channel_stats.get("err_percent", 0),
-            "err24_percent": channel_stats.get("err24_percent", 0),
-            "er_percent": channel_stats.get("er_percent", 0),
-            "daily_reach": channel_stats.get("daily_reach", 0),
-            "ci_index": channel_stats.get("ci_index", 0),
-            "mentions_count": channel_stats.get("mentions_count", 0),
-            "forwards_count": channel_stats.get("forwards_count", 0),
-            "mentioning_channels_count": channel_stats.get(
-                "mentioning_channels_count", 0
-            ),
-            "category": channel_stats.get("category"),
-            "country": channel_stats.get("country"),
-            "language": channel_stats.get("language"),
-        },
-    )
+            remaining_end = oldest_timestamp
+
+        if remaining_end < start_timestamp:
+            return
+
+        middle = (start_timestamp + remaining_end) // 2
+        windows = [(middle + 1, remaining_end), (start_timestamp, middle)]
+        async with asyncio.TaskGroup() as group:
+            for lo, hi in windows:
+                if lo <= hi:
+                    group.create_task(self._produce_posts_in_window(lo, hi, queue))
+
+    async def _enrich_posts_batch(self, batch: List[PageItem[Post]]) -> None:
+        """Добавить в посты батча детальную статистику (поле detailed_stats)"""
+        post_ids = [post.data.id for post in batch if post.data.id]
+        if not post_ids:
+            return
+
+        _apply_stats(batch, await self._get_posts_detailed_stats(post_ids))
+
+    def archived_items(
+        self, endpoint: Optional[str], content: bytes
+    ) -> List[PageItem[Post]]:
+        """
+        Посты из архивного ответа /channels/posts со статистикой /posts/stat-multi
+
+        Ответы перебираются от новых к старым (services.reprocess), а
+        статистика страницы запрашивается после неё - поэтому статистика
+        постов уже известна, когда встречается их страница.
+        """
+        if endpoint is not None and endpoint.endswith("/posts/stat-multi"):
+            data = decode(content, StatsResponse)
+            for stat in decode_items(data.response or [], PostStats):
+                # Первая встреченная - самая свежая
+                self._archived_stats.setdefault(stat.data.postId, stat)
+            return []
+        if endpoint is not None and endpoint.endswith("/channels/posts"):
+            data = decode(content, PostsResponse)
+            items = decode_items(data.response.items or [], Post)
+            _apply_stats(items, self._archived_stats)
+            return items
+        return super().archived_items(endpoint, content)
+
+    async def _get_posts_detailed_stats(
+        self, post_ids: list
+    ) -> Dict[int, PageItem[PostStats]]:
+        """Получить детальную статистику для нескольких постов"""
+        try:
+            params = {
+                "channelId": self.channel_id,
+                "postsIds": ",".join(map(str, post_ids)),
+            }
+
+            data = await self._tgstat_get("/posts/stat-multi", params, StatsResponse)
+            logger.debug(
+                "Статистика %s постов канала %s: %s",
+                len(post_ids),
+                self.channel_id,
+                data.status,
+                extra={"sample_rate": 0.1},
+            )
+            if data.status == "ok":
+                # Преобразуем список в словарь по postId
+                stats_list = decode_items(data.response or [], PostStats)
+                return {stat.data.postId: stat for stat in stats_list}
+        except Exception as e:
+            logger.warning(
+                "Не удалось получить статистику постов канала %s: %r", self.channel_id, e
+            )
+
+        return {}
+
+    def normalize(self, item: PageItem[Post]) -> Optional[NormalizedPost]:
+        """Преобразовать пост Telegram в NormalizedPost"""
+        post_data = item.data
+        if not post_data.id:
+            return None
+        post_id = str(post_data.id)
+
+        # Парсим дату публикации (timestamp)
+        post_date = post_data.date
+        created_at_platform = (
+            datetime.fromtimestamp(post_date, tz=timezone.utc)
+            if post_date
+            else datetime.now(timezone.utc)
+        )
 
-    return snapshot
+        # Получаем статистику из детальных данных если есть
+        detailed_stats = post_data.detailed_stats or PostStats()
 
+        # Получаем медиа информацию
+        media = post_data.media if isinstance(post_data.media, Media) else None
 
-async def _save_telegram_post(social_account: SocialAccount, post_data: dict) -> Video:
-    """Сохранить или обновить пост Telegram"""
-    post_id = str(post_data.get("id"))
+        post = NormalizedPost(
+            platform_video_id=post_id,
+            platform_author_id=str(
+                self.channel_id if post_data.channel_id is None else post_data.channel_id
+            ),
+            created_at_platform=created_at_platform,
+            description=post_data.text,
+            video_url=None,  # Telegram API не предоставляет прямые ссылки на медиа
+            share_url=post_data.link,
+            duration_ms=None,
+            views_count=(
+                post_data.views
+                if detailed_stats.viewsCount is None
+                else detailed_stats.viewsCount
+            ),
+            likes_count=detailed_stats.reactionsCount,  # В Telegram - реакции
+            comments_count=detailed_stats.commentsCount,
+            shares_count=detailed_stats.sharesCount,
+            saves_count=0,  # Telegram API не предоставляет сохранения
+            extra_data={
+                "is_deleted": post_data.is_deleted,
+                "forwarded_from": post_data.forwarded_from,
+                "media_type": media.media_type if media else None,
+                "mime_type": media.mime_type if media else None,
+                "media_size": media.size if media else None,
+            },
+        )
 
-    # Парсим дату публикации (timestamp)
-    post_date = post_data.get("date")
-    created_at_platform = (
-        datetime.fromtimestamp(post_date, tz=timezone.utc)
-        if post_date
-        else datetime.now(timezone.utc)
-    )
+        # Изображение поста (file_url или file_thumbnail_url)
+        image_url = media and (media.file_url or media.file_thumbnail_url)
+        if image_url:
+            # То же изображение используется и как thumbnail
+            post.media.append(
+                MediaFile(
+                    _normalize_url(image_url),
+                    f"{self.media_dir}/posts/{post_id}.jpg",
+                    ("cover_url", "thumbnail_url"),
+                )
+            )
 
-    # Получаем статистику из детальных данных если есть
-    detailed_stats = post_data.get("detailed_stats", {})
+        return post
 
-    # Получаем URL поста
-    post_url = post_data.get("link", "")
 
-    # Получаем текст поста
-    text = post_data.get("text", "")
+def _normalize_url(url: str) -> str:
+    """TGStat отдаёт ссылки на медиа без схемы (//...)"""
+    return url if url.startswith("http") else f"https:{url}"
 
-    # Получаем медиа информацию
-    media = post_data.get("media", {})
-    media_type = media.get("media_type") if media else None
 
-    # Скачиваем обложку/фото поста если есть медиа
-    cover_url = None
-    thumbnail_url = None
+async def collect_telegram_channel_data(
+    social_account: SocialAccount,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+) -> dict:
+    """
+    Собрать данные канала Telegram за указанный период
 
-    if media:
-        # Получаем URL изображения из медиа (file_url или file_thumbnail_url)
-        image_url = media.get("file_url") or media.get("file_thumbnail_url")
-        if image_url:
-            print(f"[Telegram] Найдено изображение для поста {post_id}: {image_url}")
-
-            # Нормализуем URL
-            if not image_url.startswith("http"):
-                image_url = f"https:{image_url}"
-
-            # Сохраняем изображение локально
-            channel_id = social_account.platform_user_id
-            media_dir = MEDIA_ROOT / "telegram" / channel_id / "posts"
-            media_filename = f"{post_id}.jpg"
-            media_path = media_dir / media_filename
-
-            print(f"[Telegram] Скачивание изображения поста в {media_path}...")
-            if await _download_file(image_url, media_path):
-                cover_url = f"/media/telegram/{channel_id}/posts/{media_filename}"
-                thumbnail_url = cover_url  # Используем то же изображение для thumbnail
-                print(f"[Telegram] ✅ Изображение поста сохранено: {cover_url}")
-            else:
-                print("[Telegram] ❌ Ошибка скачивания изображения поста")
-
-    # Проверяем существование поста
-    existing_post = await Video.filter(
-        social_account=social_account, platform_video_id=post_id
-    ).first()
-
-    video_data_dict = {
-        "social_account": social_account,
-        "platform_video_id": post_id,
-        "platform_author_id": str(
-            post_data.get("channel_id", social_account.platform_user_id)
-        ),
-        "description": text,
-        "created_at_platform": created_at_platform,
-        "video_url": None,  # Telegram API не предоставляет прямые ссылки на медиа
-        "share_url": post_url,
-        "cover_url": cover_url,
-        "thumbnail_url": thumbnail_url,
-        "duration_ms": None,
-        "views_count": detailed_stats.get("viewsCount", post_data.get("views", 0)),
-        "likes_count": detailed_stats.get("reactionsCount", 0),  # В Telegram - реакции
-        "comments_count": detailed_stats.get("commentsCount", 0),
-        "shares_count": detailed_stats.get("sharesCount", 0),
-        "saves_count": 0,  # Telegram API не предоставляет сохранения
-        "last_updated": datetime.now(timezone.utc),
-        "extra_data": {
-            "is_deleted": post_data.get("is_deleted", 0),
-            "forwarded_from": post_data.get("forwarded_from"),
-            "media_type": media_type,
-            "mime_type": media.get("mime_type") if media else None,
-            "media_size": media.get("size") if media else None,
-        },
-    }
-
-    if existing_post:
-        # Обновляем существующий пост
-        for key, value in video_data_dict.items():
-            if key != "social_account":
-                setattr(existing_post, key, value)
-        await existing_post.save()
-        return existing_post
-    else:
-        # Создаем новый пост
-        video = await Video.create(**video_data_dict)
-        return video
+    Args:
+        social_account: Аккаунт Telegram канала
+        start_date: Дата начала периода (по умолчанию - 30 дней назад)
+        end_date: Дата окончания периода (по умолчанию - сегодня)
+
+    Returns:
+        dict с информацией о собранных данных
+    """
+    collector = TelegramCollector(social_account)
+    result = await collector.collect(start_date, end_date)
+    result["channel_stats"] = collector.channel_stats
+    return result
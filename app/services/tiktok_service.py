@@ -1,24 +1,83 @@
-from datetime import datetime, timedelta, timezone
-from typing import Dict, Any, Optional
-from pathlib import Path
-import httpx
-import aiofiles
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional, Union
+import msgspec
 from config import settings
-from models import SocialAccount, ProfileSnapshot, Video, VideoMetricsHistory
+from models import RawJSON, SocialAccount
+from services.base import BaseCollector, MediaFile, NormalizedPost, NormalizedProfile
+from services.payloads import Envelope, PageItem, decode, decode_items
 
 
-class TikTokService:
-    """Сервис для работы с TikTok API через ScrapeCreators"""
+class UrlList(msgspec.Struct):
+    url_list: Optional[List[str]] = None
+
+
+class Author(msgspec.Struct):
+    uid: Union[str, int, None] = ""
+    unique_id: Optional[str] = None
+    follower_count: Optional[int] = 0
+    following_count: Optional[int] = 0
+    total_favorited: Optional[int] = 0
+    aweme_count: Optional[int] = 0
+    avatar_larger: Optional[UrlList] = None
+
+
+class VideoInfo(msgspec.Struct):
+    duration: Optional[int] = None
+    play_addr: Optional[UrlList] = None
+    cover: Optional[UrlList] = None
+    origin_cover: Optional[UrlList] = None
+
+
+class Statistics(msgspec.Struct):
+    play_count: Optional[int] = 0
+    digg_count: Optional[int] = 0
+    comment_count: Optional[int] = 0
+    share_count: Optional[int] = 0
+    collect_count: Optional[int] = 0
+
+
+class Aweme(msgspec.Struct):
+    """Поля видео, которые читает сборщик"""
+
+    aweme_id: Optional[str] = None
+    create_time: Optional[int] = None
+    desc: Optional[str] = None
+    share_url: Optional[str] = None
+    author: Author = msgspec.field(default_factory=Author)
+    video: VideoInfo = msgspec.field(default_factory=VideoInfo)
+    statistics: Statistics = msgspec.field(default_factory=Statistics)
+
 
-    def __init__(self):
-        self.api_key = settings.scrapecreators_api_key
-        self.base_url = settings.scrapecreators_api_url
-        self.headers = {"x-api-key": self.api_key}
-        self.media_root = Path("/app/media")
+class AuthorJson(msgspec.Struct):
+    """Исходный JSON автора (extra_data снимка профиля)"""
+
+    author: msgspec.Raw = msgspec.Raw(b"{}")
+
+
+class VideosPage(Envelope):
+    aweme_list: Optional[List[msgspec.Raw]] = None
+    has_more: Any = 0
+    max_cursor: Union[int, str, None] = None
+
+
+class TikTokCollector(BaseCollector):
+    """Сборщик записей TikTok профиля через ScrapeCreators"""
+
+    platforms = ("tiktok",)
+    sync_username = True
+    item_type = Aweme
+    page_payloads = {"/v3/tiktok/profile/videos": (VideosPage, "aweme_list")}
+    # Видео TikTok переходит к аккаунту, который его собрал последним
+    reassign_posts = True
+
+    def __init__(self, social_account: SocialAccount):
+        super().__init__(social_account)
+        self.headers = {"x-api-key": settings.scrapecreators_api_key}
+        self._first_page: Optional[VideosPage] = None
 
     async def get_profile_videos(
         self, user_id: str, max_cursor: int | None = None
-    ) -> Dict[str, Any]:
+    ) -> VideosPage:
         """
         Получить видео профиля TikTok
 
@@ -29,123 +88,116 @@ class TikTokService:
         Returns:
             Ответ API с видео
         """
-        url = f"{self.base_url}/v3/tiktok/profile/videos"
         params = {"user_id": user_id, "sort_by": "latest"}
-
         if max_cursor:
             params["max_cursor"] = max_cursor
 
-        async with httpx.AsyncClient(timeout=120.0) as client:
-            response = await client.get(url, headers=self.headers, params=params)
-            response.raise_for_status()
-            return response.json()
+        return await self.get_json(
+            f"{settings.scrapecreators_api_url}/v3/tiktok/profile/videos",
+            params=params,
+            headers=self.headers,
+            payload_type=VideosPage,
+        )
 
-    async def collect_videos(
-        self,
-        social_account: SocialAccount,
-        start_date: Optional[datetime] = None,
-        end_date: Optional[datetime] = None,
-    ) -> Dict[str, Any]:
-        """
-        Собрать записи TikTok профиля за указанный период
+    async def fetch_profile(self) -> Optional[NormalizedProfile]:
+        """Данные профиля берутся из первого видео первой страницы"""
+        self._first_page = await self.get_profile_videos(
+            user_id=self.social_account.platform_user_id
+        )
+        aweme_list = decode_items((self._first_page.aweme_list or [])[:1], Aweme)
+        if not self._first_page.success or not aweme_list:
+            return None
 
-        Args:
-            social_account: Аккаунт социальной сети
-            start_date: Дата начала периода (по умолчанию - 30 дней назад)
-            end_date: Дата окончания периода (по умолчанию - сегодня)
+        author_data = aweme_list[0].data.author
+        author_json = decode(aweme_list[0].raw, AuthorJson).author
 
-        Returns:
-            Статистика сбора
+        profile = NormalizedProfile(
+            followers_count=author_data.follower_count,
+            following_count=author_data.following_count,
+            total_likes=author_data.total_favorited,
+            total_posts=author_data.aweme_count,
+            extra_data=RawJSON(bytes(author_json).decode()),
+        )
+
+        # Обновляем username и profile_url в social_account
+        if author_data.unique_id:
+            profile.username = author_data.unique_id
+            profile.profile_url = f"https://www.tiktok.com/@{author_data.unique_id}"
+
+        # Аватар
+        url_list = author_data.avatar_larger and author_data.avatar_larger.url_list
+        if url_list:
+            timestamp = int(datetime.now(timezone.utc).timestamp())
+            profile.media.append(
+                MediaFile(
+                    url_list[0],
+                    f"{self.media_dir}/avatars/{timestamp}.jpg",
+                    ("avatar_url",),
+                )
+            )
+
+        return profile
+
+    async def iter_pages(
+        self, start_date: datetime, end_date: datetime
+    ) -> AsyncIterator[List[PageItem[Aweme]]]:
+        """
+        Постранично получать видео профиля (от новых к старым)
+
+        Пагинация останавливается, когда на странице нет записей новее
+        start_date (закреплённые старые видео в начале ленты не прерывают сбор)
         """
-        print(end_date)
-        # Устанавливаем дефолтные даты если не указаны
-        if end_date is None:
-            end_date = datetime.now(timezone.utc)
-        else:
-            # Если дата передана без timezone, делаем её UTC-aware
-            if end_date.tzinfo is None:
-                end_date = end_date.replace(tzinfo=timezone.utc)
-
-        if start_date is None:
-            start_date = end_date - timedelta(days=30)
-        else:
-            # Если дата передана без timezone, делаем её UTC-aware
-            if start_date.tzinfo is None:
-                start_date = start_date.replace(tzinfo=timezone.utc)
-
-        collected_posts = 0
         max_cursor = None
-        credits_remaining = None
-        profile_updated = False
 
         while True:
-            # Получаем данные из API
-            data = await self.get_profile_videos(
-                user_id=social_account.platform_user_id, max_cursor=max_cursor
-            )
-
-            if not data.get("success"):
-                break
+            # Первая страница уже получена вместе с профилем
+            if max_cursor is None and self._first_page is not None:
+                data, self._first_page = self._first_page, None
+            else:
+                data = await self.get_profile_videos(
+                    user_id=self.social_account.platform_user_id,
+                    max_cursor=max_cursor,
+                )
 
-            credits_remaining = data.get("credits_remaining")
-            aweme_list = data.get("aweme_list", [])
+            if not data.success:
+                return
 
+            aweme_list = decode_items(data.aweme_list or [], Aweme)
             if not aweme_list:
-                break
-
-            # Обновляем данные профиля (из первого видео)
-            if not profile_updated and aweme_list:
-                await self._save_profile_snapshot(social_account, aweme_list[0])
-                profile_updated = True
-
-            # Сохраняем записи
-            posts_in_batch = 0
-            for aweme in aweme_list:
-                # Получаем дату создания записи
-                create_time = aweme.get("create_time")
-                if create_time:
-                    post_date = datetime.fromtimestamp(create_time, tz=timezone.utc)
-
-                    # Проверяем, входит ли запись в диапазон дат
-                    if post_date < start_date:
-                        # Достигли начальной даты - прекращаем сбор
-                        break
-
-                    if post_date <= end_date:
-                        await self._save_video(social_account, aweme)
-                        collected_posts += 1
-                        posts_in_batch += 1
-
-            # Если в батче не было постов в диапазоне, останавливаемся
-            if posts_in_batch == 0 and aweme_list:
-                # Проверяем последний пост
-                last_post = aweme_list[-1]
-                last_create_time = last_post.get("create_time")
-                if last_create_time:
-                    last_post_date = datetime.fromtimestamp(
-                        last_create_time, tz=timezone.utc
-                    )
-                    if last_post_date < start_date:
-                        break
+                return
+
+            # Записи, входящие в диапазон дат
+            post_dates = [self._get_post_date(aweme.data) for aweme in aweme_list]
+            yield [
+                aweme
+                for aweme, post_date in zip(aweme_list, post_dates)
+                if post_date and start_date <= post_date <= end_date
+            ]
+
+            # Если в странице не было записей после начальной даты и последняя
+            # запись старше её - дальше только более старые записи
+            if all(d is None or d < start_date for d in post_dates):
+                last_post_date = post_dates[-1]
+                if last_post_date and last_post_date < start_date:
+                    return
 
             # Проверяем, есть ли еще данные
-            has_more = data.get("has_more", 0)
-            if not has_more:
-                break
+            if not data.has_more:
+                return
 
-            max_cursor = data.get("max_cursor")
+            max_cursor = data.max_cursor
             if not max_cursor:
-                break
+                return
 
-        return {
-            "success": True,
-            "message": f"Собрано {collected_posts} записей за период с {start_date.strftime('%Y-%m-%d')} по {end_date.strftime('%Y-%m-%d')}",
-            "posts_collected": collected_posts,
-            "profile_updated": profile_updated,
-            "credits_remaining": credits_remaining,
-        }
+    @staticmethod
+    def _get_post_date(aweme: Aweme) -> datetime | None:
+        """Дата публикации записи (UTC) или None"""
+        if not aweme.create_time:
+            return None
+        return datetime.fromtimestamp(aweme.create_time, tz=timezone.utc)
 
-    def _select_best_image_url(self, url_list: list) -> str | None:
+    @staticmethod
+    def _select_best_image_url(url_list: list) -> str | None:
         """Выбрать лучший URL изображения (предпочитаем .jpeg/.jpg вместо .heic)"""
         if not url_list:
             return None
@@ -158,192 +210,75 @@ class TikTokService:
         # Если не нашли, берем первый
         return url_list[0]
 
-    async def _download_file(self, url: str, save_path: Path, retries: int = 3) -> bool:
-        """Скачать файл по URL и сохранить локально"""
-        # Создаем директорию если не существует
-        save_path.parent.mkdir(parents=True, exist_ok=True)
-
-        for attempt in range(retries):
-            try:
-                async with httpx.AsyncClient(timeout=30.0) as client:
-                    response = await client.get(url, follow_redirects=True)
-                    response.raise_for_status()
-
-                    async with aiofiles.open(save_path, "wb") as f:
-                        await f.write(response.content)
-
-                    return True
-            except (
-                httpx.TimeoutException,
-                httpx.ConnectError,
-                httpx.RemoteProtocolError,
-            ) as e:
-                print(f"Попытка {attempt + 1}/{retries} - Ошибка скачивания {url}: {e}")
-                if attempt == retries - 1:
-                    return False
-            except Exception as e:
-                print(f"Ошибка скачивания {url}: {e}")
-                return False
-
-        return False
-
-    async def _save_profile_snapshot(
-        self, social_account: SocialAccount, aweme: Dict[str, Any]
-    ):
-        """Сохранить снимок профиля"""
-        author_data = aweme.get("author", {})
-
-        # Извлекаем и скачиваем аватар
-        avatar_url = None
-        avatar_larger = author_data.get("avatar_larger", {})
-        if avatar_larger and "url_list" in avatar_larger:
-            url_list = avatar_larger["url_list"]
-            if url_list:
-                remote_url = url_list[0]
-                # Сохраняем аватар
-                user_dir = (
-                    self.media_root
-                    / "tiktok"
-                    / social_account.platform_user_id
-                    / "avatars"
-                )
-                timestamp = int(datetime.now(timezone.utc).timestamp())
-                avatar_filename = f"{timestamp}.jpg"
-                avatar_path = user_dir / avatar_filename
-
-                if await self._download_file(remote_url, avatar_path):
-                    avatar_url = f"/media/tiktok/{social_account.platform_user_id}/avatars/{avatar_filename}"
-
-        # Обновляем username и profile_url в social_account
-        if author_data.get("unique_id"):
-            social_account.username = author_data["unique_id"]
-            social_account.profile_url = (
-                f"https://www.tiktok.com/@{author_data['unique_id']}"
-            )
-            await social_account.save()
-
-        # Создаем snapshot
-        await ProfileSnapshot.create(
-            social_account=social_account,
-            followers_count=author_data.get("follower_count", 0),
-            following_count=author_data.get("following_count", 0),
-            total_likes=author_data.get("total_favorited", 0),
-            total_posts=author_data.get("aweme_count", 0),
-            avatar_url=avatar_url,
-            extra_data=author_data,
-        )
-
-    async def _save_video(self, social_account: SocialAccount, aweme: Dict[str, Any]):
-        """Сохранить или обновить видео"""
-        video_id = aweme.get("aweme_id")
+    def normalize(self, item: PageItem[Aweme]) -> Optional[NormalizedPost]:
+        """Преобразовать aweme в NormalizedPost"""
+        aweme = item.data
+        video_id = aweme.aweme_id
         if not video_id:
-            return
-
-        author_data = aweme.get("author", {})
-        video_data = aweme.get("video", {})
-        statistics = aweme.get("statistics", {})
-
-        # Получаем и скачиваем обложку
-        cover_url = None
-        cover = video_data.get("cover", {})
-        if cover and "url_list" in cover:
-            url_list = cover["url_list"]
-            if url_list:
-                remote_url = self._select_best_image_url(url_list)
-                if remote_url:
-                    user_dir = (
-                        self.media_root
-                        / "tiktok"
-                        / social_account.platform_user_id
-                        / "covers"
-                    )
-                    cover_filename = f"{video_id}.jpg"
-                    cover_path = user_dir / cover_filename
-
-                    if await self._download_file(remote_url, cover_path):
-                        cover_url = f"/media/tiktok/{social_account.platform_user_id}/covers/{cover_filename}"
-
-        # Получаем и скачиваем превью (origin_cover)
-        thumbnail_url = None
-        origin_cover = video_data.get("origin_cover", {})
-        if origin_cover and "url_list" in origin_cover:
-            url_list = origin_cover["url_list"]
-            if url_list:
-                remote_url = self._select_best_image_url(url_list)
-                if remote_url:
-                    user_dir = (
-                        self.media_root
-                        / "tiktok"
-                        / social_account.platform_user_id
-                        / "thumbnails"
-                    )
-                    thumbnail_filename = f"{video_id}.jpg"
-                    thumbnail_path = user_dir / thumbnail_filename
+            return None
 
-                    if await self._download_file(remote_url, thumbnail_path):
-                        thumbnail_url = f"/media/tiktok/{social_account.platform_user_id}/thumbnails/{thumbnail_filename}"
+        video_data = aweme.video
+        statistics = aweme.statistics
 
         # Получаем URL видео
         video_url = None
-        play_addr = video_data.get("play_addr", {})
-        if play_addr and "url_list" in play_addr:
-            url_list = play_addr["url_list"]
-            if url_list:
-                video_url = url_list[0]
-
-        # Получаем дату создания
-        create_time = aweme.get("create_time")
-        if create_time:
-            created_at_platform = datetime.fromtimestamp(create_time, tz=timezone.utc)
-        else:
-            created_at_platform = datetime.now(timezone.utc)
-
-        # Используем get_or_create для избежания конфликтов
-        video, created = await Video.get_or_create(
+        play_addr = video_data.play_addr
+        if play_addr and play_addr.url_list:
+            video_url = play_addr.url_list[0]
+
+        post = NormalizedPost(
             platform_video_id=video_id,
-            defaults={
-                "social_account_id": social_account.id,
-                "platform_author_id": str(author_data.get("uid", "")),
-                "description": aweme.get("desc"),
-                "created_at_platform": created_at_platform,
-                "video_url": video_url,
-                "share_url": aweme.get("share_url"),
-                "cover_url": cover_url,
-                "thumbnail_url": thumbnail_url,
-                "duration_ms": video_data.get("duration"),
-                "views_count": statistics.get("play_count", 0),
-                "likes_count": statistics.get("digg_count", 0),
-                "comments_count": statistics.get("comment_count", 0),
-                "shares_count": statistics.get("share_count", 0),
-                "saves_count": statistics.get("collect_count", 0),
-                "extra_data": aweme,
-            },
+            platform_author_id=str(aweme.author.uid),
+            created_at_platform=self._get_post_date(aweme)
+            or datetime.now(timezone.utc),
+            description=aweme.desc,
+            video_url=video_url,
+            share_url=aweme.share_url,
+            duration_ms=video_data.duration,
+            views_count=statistics.play_count,
+            likes_count=statistics.digg_count,
+            comments_count=statistics.comment_count,
+            shares_count=statistics.share_count,
+            saves_count=statistics.collect_count,
+            # Запись целиком - исходным JSON, без разбора в словари
+            extra_data=item.json,
         )
 
-        # Если видео уже существовало, обновляем его
-        if not created:
-            video.social_account_id = social_account.id
-            video.platform_author_id = str(author_data.get("uid", ""))
-            video.description = aweme.get("desc")
-            video.video_url = video_url
-            video.share_url = aweme.get("share_url")
-            video.cover_url = cover_url
-            video.thumbnail_url = thumbnail_url
-            video.duration_ms = video_data.get("duration")
-            video.views_count = statistics.get("play_count", 0)
-            video.likes_count = statistics.get("digg_count", 0)
-            video.comments_count = statistics.get("comment_count", 0)
-            video.shares_count = statistics.get("share_count", 0)
-            video.saves_count = statistics.get("collect_count", 0)
-            video.extra_data = aweme
-            await video.save()
-
-        # Сохраняем историю метрик
-        await VideoMetricsHistory.create(
-            video=video,
-            views_count=statistics.get("play_count", 0),
-            likes_count=statistics.get("digg_count", 0),
-            comments_count=statistics.get("comment_count", 0),
-            shares_count=statistics.get("share_count", 0),
-            saves_count=statistics.get("collect_count", 0),
-        )
+        # Обложка (cover) и превью (origin_cover) скачиваются локально
+        for key, folder, target in (
+            ("cover", "covers", "cover_url"),
+            ("origin_cover", "thumbnails", "thumbnail_url"),
+        ):
+            images = getattr(video_data, key)
+            remote_url = self._select_best_image_url(images and images.url_list)
+            if remote_url:
+                post.media.append(
+                    MediaFile(
+                        remote_url, f"{self.media_dir}/{folder}/{video_id}.jpg", (target,)
+                    )
+                )
+
+        return post
+
+
+class TikTokService:
+    """Сервис для работы с TikTok API через ScrapeCreators"""
+
+    async def collect_videos(
+        self,
+        social_account: SocialAccount,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+    ) -> Dict[str, Any]:
+        """
+        Собрать записи TikTok профиля за указанный период
+
+        Args:
+            social_account: Аккаунт социальной сети
+            start_date: Дата начала периода (по умолчанию - 30 дней назад)
+            end_date: Дата окончания периода (по умолчанию - сегодня)
+
+        Returns:
+            Статистика сбора
+        """
+        return await TikTokCollector(social_account).collect(start_date, end_date)
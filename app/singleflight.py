@@ -0,0 +1,40 @@
+"""
+Single-flight: одинаковые одновременные вызовы выполняются один раз
+
+Первый вызов с ключом запускает задачу, остальные вызовы с тем же ключом
+(пока она выполняется) ждут её и получают тот же результат или ошибку.
+Отмена ожидающего не отменяет общую задачу. Ключ - нормализованные
+параметры вызова; результат общий, его нельзя изменять.
+
+Действует в пределах процесса (одного воркера).
+"""
+
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar
+from metrics import SINGLEFLIGHT_SHARED
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+
+    def _forget(self, key: Hashable, task: asyncio.Future) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Ошибку получат ожидающие; если их не осталось - не логировать
+        # "Task exception was never retrieved"
+        if not task.cancelled():
+            task.exception()
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            SINGLEFLIGHT_SHARED.labels(self.name).inc()
+        return await asyncio.shield(task)
@@ -11,10 +11,22 @@ const apiClient = axios.create({
   }
 })
 
+// Сервер перегружен (503) или слишком много запросов (429) - повтор после Retry-After
+const MAX_BUSY_RETRIES = 3
+
 // Interceptors для обработки ошибок
 apiClient.interceptors.response.use(
   response => response,
-  error => {
+  async error => {
+    const { config, response } = error
+    if (config && response && [429, 503].includes(response.status)) {
+      config.busyRetries = (config.busyRetries || 0) + 1
+      if (config.busyRetries <= MAX_BUSY_RETRIES) {
+        const delay = Number(response.headers['retry-after'] || 5) * 1000
+        await new Promise(resolve => setTimeout(resolve, delay))
+        return apiClient(config)
+      }
+    }
     console.error('API Error:', error)
     return Promise.reject(error)
   }
@@ -107,6 +119,14 @@ export default {
     })
     return response.data
   },
+
+  // Поток хода сборов (Server-Sent Events): события started, page, finished
+  openCollectionEvents(socialAccountIds = []) {
+    const params = new URLSearchParams()
+    socialAccountIds.forEach(id => params.append('social_account_ids', id))
+    const query = params.toString()
+    return new EventSource(`/api/collect/events${query ? `?${query}` : ''}`)
+  },
   
   async getVideos(socialAccountId, params = {}) {
     const response = await apiClient.get(`/collect/videos/${socialAccountId}`, { params })
@@ -120,6 +140,14 @@ export default {
     return response.data
   },
 
+  async getProfileSeries(socialAccountIds, interval = 'day', dateFrom = null, dateTo = null) {
+    const params = { social_account_ids: socialAccountIds, interval }
+    if (dateFrom) params.date_from = dateFrom
+    if (dateTo) params.date_to = dateTo
+    const response = await apiClient.get('/collect/profile-series', { params })
+    return response.data
+  },
+
   // Analytics
   async getAnalytics(socialAccountId, params = {}) {
     const response = await apiClient.get(`/analytics/${socialAccountId}`, { params })
@@ -1,5 +1,6 @@
 import { defineStore } from 'pinia'
 import { ref, computed } from 'vue'
+import api from '@/api'
 
 export const useCollectionProgressStore = defineStore('collectionProgress', () => {
   const isCollecting = ref(false)
@@ -8,6 +9,39 @@ export const useCollectionProgressStore = defineStore('collectionProgress', () =
   const failed = ref(0)
   const currentAccount = ref(null)
   const errors = ref([])
+  // Ход идущих сборов из SSE: id аккаунта -> последнее событие
+  const live = ref({})
+  const currentAccountId = ref(null)
+  let eventSource = null
+
+  const currentLive = computed(() => live.value[currentAccountId.value] || null)
+
+  // Суммарная скорость сохранения записей по идущим сборам
+  const postsPerSecond = computed(() =>
+    Object.values(live.value)
+      .filter(event => event.type !== 'finished')
+      .reduce((sum, event) => sum + event.posts_per_second, 0)
+  )
+
+  const handleEvent = (message) => {
+    const event = JSON.parse(message.data)
+    live.value = { ...live.value, [event.social_account_id]: event }
+  }
+
+  const connectEvents = () => {
+    if (eventSource) return
+    eventSource = api.openCollectionEvents()
+    for (const type of ['started', 'page', 'finished']) {
+      eventSource.addEventListener(type, handleEvent)
+    }
+  }
+
+  const disconnectEvents = () => {
+    if (eventSource) {
+      eventSource.close()
+      eventSource = null
+    }
+  }
 
   const progress = computed(() => {
     if (total.value === 0) return 0
@@ -20,11 +54,15 @@ export const useCollectionProgressStore = defineStore('collectionProgress', () =
     completed.value = 0
     failed.value = 0
     currentAccount.value = null
+    currentAccountId.value = null
     errors.value = []
+    live.value = {}
+    connectEvents()
   }
 
-  const updateProgress = (accountName) => {
+  const updateProgress = (accountName, accountId = null) => {
     currentAccount.value = accountName
+    currentAccountId.value = accountId
   }
 
   const markCompleted = () => {
@@ -40,6 +78,8 @@ export const useCollectionProgressStore = defineStore('collectionProgress', () =
   const finishCollection = () => {
     isCollecting.value = false
     currentAccount.value = null
+    currentAccountId.value = null
+    disconnectEvents()
   }
 
   const reset = () => {
@@ -48,7 +88,10 @@ export const useCollectionProgressStore = defineStore('collectionProgress', () =
     completed.value = 0
     failed.value = 0
     currentAccount.value = null
+    currentAccountId.value = null
     errors.value = []
+    live.value = {}
+    disconnectEvents()
   }
 
   return {
@@ -58,6 +101,9 @@ export const useCollectionProgressStore = defineStore('collectionProgress', () =
     failed,
     currentAccount,
     errors,
+    live,
+    currentLive,
+    postsPerSecond,
     progress,
     startCollection,
     updateProgress,